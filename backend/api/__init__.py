@@ -8,10 +8,16 @@ router = APIRouter()
 # 导入并包含子路由
 from . import init  # 健康检查等基础路由
 from . import projects  # 项目分析相关路由
+from . import scoring  # 评分方案与批量重新打分
+from . import contributors  # 跨仓库贡献者查询
+from . import debug  # 请求剖析与慢请求记录
 
 # 注册子路由
 router.include_router(init.router)
 router.include_router(projects.router)
+router.include_router(scoring.router)
+router.include_router(contributors.router)
+router.include_router(debug.router)
 
 # 注意：未来可以将不同功能的路由拆分到不同文件（如 users.py, analysis.py等），
 # 然后在这里用 router.include_router() 进行挂载。
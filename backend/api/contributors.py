@@ -0,0 +1,103 @@
+# backend/api/contributors.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from backend.services.contributor_index import ContributorIndex, get_contributor_index
+from backend.services.metric_models import normalize_bound
+from backend.services.snapshot_store import snapshot_key
+from typing import List, Optional, Tuple
+
+router = APIRouter(prefix="/contributors")
+
+def _parse_repo(value: str) -> Tuple[str, str]:
+    parts = value.split("/")
+    if len(parts) != 2 or not all(parts):
+        raise HTTPException(status_code=400, detail=f"Invalid repo '{value}', expected owner/repo")
+    return parts[0], parts[1]
+
+def _parse_since(since: Optional[str]) -> Optional[str]:
+    try:
+        return normalize_bound(since, is_end=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _ensure_repos(contributor_index: ContributorIndex, repos: List[str], platform: str) -> List[str]:
+    """把尚未索引的仓库拉取并索引一次，返回仓库键"""
+    keys = []
+    for value in repos:
+        owner, repo = _parse_repo(value)
+        if not await run_in_threadpool(contributor_index.ensure_repo, owner, repo, platform):
+            raise HTTPException(status_code=404, detail=f"Contributor data not found for {value}")
+        keys.append(snapshot_key(owner, repo, platform))
+    return keys
+
+@router.get("/stats")
+async def get_index_stats(contributor_index: ContributorIndex = Depends(get_contributor_index)):
+    """
+    贡献者索引规模
+    """
+    await run_in_threadpool(contributor_index.sync)
+    return {"success": True, "data": contributor_index.stats()}
+
+@router.get("/shared")
+async def get_shared_contributors(
+    repo: List[str] = Query(..., description="owner/repo，可重复，至少两个"),
+    platform: str = "github",
+    since: Optional[str] = Query(None, description="只统计该周期之后的活动，YYYY 或 YYYY-MM"),
+    limit: int = Query(20, ge=1, le=200),
+    contributor_index: ContributorIndex = Depends(get_contributor_index)
+):
+    """
+    同时活跃于多个仓库的贡献者（共同维护者）
+    """
+    if len(repo) < 2:
+        raise HTTPException(status_code=400, detail="At least two repos are required")
+    since = _parse_since(since)
+    try:
+        await run_in_threadpool(contributor_index.sync)
+        keys = await _ensure_repos(contributor_index, repo, platform)
+        shared = await run_in_threadpool(contributor_index.shared_contributors, keys, since, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find shared contributors: {str(e)}")
+    return {"success": True, "data": {"repos": repo, "since": since, "contributors": shared}}
+
+@router.get("/mentors")
+async def get_mentors(
+    repo: str = Query(..., description="owner/repo"),
+    platform: str = "github",
+    since: Optional[str] = Query(None, description="近期活跃的起始周期，默认为该仓库最近 12 个月"),
+    min_periods: int = Query(6, ge=1, description="在该仓库至少有记录的周期数"),
+    limit: int = Query(10, ge=1, le=100),
+    contributor_index: ContributorIndex = Depends(get_contributor_index)
+):
+    """
+    项目中可以带新人的资深贡献者: 参与时间长且近期仍然活跃
+    """
+    since = _parse_since(since)
+    try:
+        await run_in_threadpool(contributor_index.sync)
+        key, = await _ensure_repos(contributor_index, [repo], platform)
+        mentors = await run_in_threadpool(contributor_index.mentors, key, since, min_periods, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find mentors: {str(e)}")
+    return {"success": True, "data": {"repo": repo, "mentors": mentors}}
+
+@router.get("/{login}/repos")
+async def get_contributor_repos(
+    login: str,
+    since: Optional[str] = Query(None, description="只统计该周期之后的活动，YYYY 或 YYYY-MM"),
+    limit: int = Query(20, ge=1, le=200),
+    contributor_index: ContributorIndex = Depends(get_contributor_index)
+):
+    """
+    该贡献者还活跃于哪些仓库（只在已缓存指标的仓库中查找，不重新拉取数据）
+    """
+    since = _parse_since(since)
+    await run_in_threadpool(contributor_index.sync)
+    repos = contributor_index.contributor_repos(login, since, limit)
+    if repos is None:
+        raise HTTPException(status_code=404, detail="Contributor not found in cached repos")
+    return {"success": True, "data": {"login": login, "since": since, "repos": repos}}
@@ -0,0 +1,34 @@
+# backend/api/debug.py
+from fastapi import APIRouter, Depends, Header, HTTPException
+from backend.services.request_profiler import RequestProfiler, get_request_profiler
+from typing import Optional
+
+router = APIRouter(prefix="/debug")
+
+def require_admin(
+    x_profile: Optional[str] = Header(None),
+    profiler: RequestProfiler = Depends(get_request_profiler)
+) -> RequestProfiler:
+    """需要在 X-Profile 请求头中提供 profiling_admin_token；未配置令牌时拒绝访问"""
+    if not profiler.admin_token:
+        raise HTTPException(status_code=403, detail="Profiling endpoints require profiling_admin_token")
+    if not profiler.is_admin(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile token")
+    return profiler
+
+@router.get("/profiles")
+async def list_profiles(profiler: RequestProfiler = Depends(require_admin)):
+    """
+    慢请求和被剖析请求的摘要（最新的在前），含各阶段耗时合计
+    """
+    return {"success": True, "data": {"stats": profiler.stats(), "profiles": profiler.profiles()}}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, profiler: RequestProfiler = Depends(require_admin)):
+    """
+    单个请求的阶段时间线和调用栈采样结果
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted)")
+    return {"success": True, "data": profile}
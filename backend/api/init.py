@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from backend.services.opendigger_service import get_opendigger_service
+from backend.services.request_profiler import get_request_profiler
+from backend.services.upstream_scheduler import get_upstream_scheduler
 
 router = APIRouter()
 
@@ -15,4 +18,13 @@ async def get_project_info():
         "version": "0.1.0",
         "description": "开源贡献者智能导航系统",
         "status": "开发中"
-    }
\ No newline at end of file
+    }
+
+# 运行状态（上游请求排队深度、限流情况，合并的并发指标拉取，请求剖析）
+@router.get("/stats")
+async def get_stats():
+    return {
+        "upstream": get_upstream_scheduler().stats(),
+        "metric_fetches": get_opendigger_service().fetch_stats(),
+        "profiling": get_request_profiler().stats(),
+    }
@@ -1,18 +1,118 @@
 # backend/api/projects.py
-from fastapi import APIRouter, HTTPException
-from backend.services.project_analyzer import project_analyzer
-from backend.services.opendigger_service import opendigger_service
-from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from backend.config import get_settings
+from backend.services.project_analyzer import ProjectAnalyzer, get_project_analyzer, parse_fields, project_report
+from backend.services.opendigger_service import OpenDiggerService, get_opendigger_service
+from backend.services.similarity_index import SimilarityIndex, build_vector, get_similarity_index
+from backend.services.snapshot_store import SnapshotStore, get_snapshot_store, snapshot_key
+from backend.services.change_detector import ChangeDetector, get_change_detector
+from backend.services.metric_models import normalize_bound
+from backend.services.scoring_engine import FEATURES, ScoringEngine, ScoringProfile, extract_features, get_scoring_engine
+from typing import Dict, Literal, Optional
+import hmac
+import json
+import time
 
 router = APIRouter(prefix="/projects")
 
+# /metrics 只需要报告中的这些字段
+METRICS_ENDPOINT_FIELDS = parse_fields(
+    "basic_info,activity.score,community,issues,code_quality,newbie_friendly_score"
+)
+
+def recommendation_fields(profile: ScoringProfile) -> Dict:
+    """/recommendations 只需要分数和建议规则用到的字段"""
+    return parse_fields(",".join(
+        ["newbie_friendly_score"] + [".".join(FEATURES[name]) for name in profile.rule_features()]
+    ))
+
+def require_refresh_token(x_refresh_token: Optional[str] = Header(None)) -> None:
+    """强制刷新需要在 X-Refresh-Token 请求头中提供 refresh_admin_token；未配置令牌时拒绝"""
+    token = get_settings().refresh_admin_token
+    if not token:
+        raise HTTPException(status_code=403, detail="Forced refresh requires refresh_admin_token")
+    if not x_refresh_token or not hmac.compare_digest(x_refresh_token, token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Refresh-Token")
+
+def _resolve_deadline(deadline: Optional[float], header_deadline: Optional[float]) -> Optional[float]:
+    """
+    将请求的时间预算（秒，来自查询参数或 X-Request-Deadline 请求头）转换为 time.monotonic() 截止时间点
+    两者同时提供时取较小值，并受 settings.max_request_deadline 限制
+    """
+    budgets = [b for b in (deadline, header_deadline) if b is not None]
+    if not budgets:
+        return None
+    budget = min(min(budgets), get_settings().max_request_deadline)
+    return time.monotonic() + max(budget, 0)
+
+def time_window(
+    from_: Optional[str] = Query(None, alias="from", description="起始周期，YYYY 或 YYYY-MM"),
+    to: Optional[str] = Query(None, description="结束周期（含），YYYY 或 YYYY-MM"),
+    granularity: Literal["month", "quarter", "year"] = Query("month", description="时间粒度")
+) -> Dict:
+    """解析时间范围参数，统一为月份键"""
+    try:
+        start = normalize_bound(from_, is_end=False)
+        end = normalize_bound(to, is_end=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be later than 'to'")
+    return {"start": start, "end": end, "granularity": granularity}
+
+def field_projection(
+    fields: Optional[str] = Query(
+        None, description="返回字段，逗号分隔，如 activity.score,community.bus_factor；只计算所需部分"
+    )
+):
+    """解析 fields 投影参数"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _is_default_window(window: Dict) -> bool:
+    return window["start"] is None and window["end"] is None and window["granularity"] == "month"
+
 @router.get("/{owner}/{repo}")
-async def get_project_analysis(owner: str, repo: str, platform: str = "github"):
+async def get_project_analysis(
+    owner: str,
+    repo: str,
+    platform: str = "github",
+    deadline: Optional[float] = Query(None, ge=0, description="时间预算（秒），超时返回部分结果"),
+    x_request_deadline: Optional[float] = Header(None, ge=0),
+    fresh: bool = Query(False, description="忽略预生成快照，实时计算"),
+    window: Dict = Depends(time_window),
+    fields: Optional[Dict] = Depends(field_projection),
+    project_analyzer: ProjectAnalyzer = Depends(get_project_analyzer),
+    snapshot_store: SnapshotStore = Depends(get_snapshot_store)
+):
     """
     获取项目综合分析报告
     """
     try:
-        analysis_result = project_analyzer.analyze_project(owner, repo, platform)
+        if not fresh and _is_default_window(window):
+            # 命中预生成快照时直接返回原始字节，请求路径上不做任何计算
+            snapshot = await run_in_threadpool(snapshot_store.get_report_bytes, owner, repo, platform)
+            if snapshot is not None:
+                report_bytes, generated_at = snapshot
+                if fields is not None:
+                    return {
+                        "success": True,
+                        "data": project_report(json.loads(report_bytes), fields)
+                    }
+                return Response(
+                    content=b'{"success":true,"data":' + report_bytes + b'}',
+                    media_type="application/json",
+                    headers={"X-Snapshot-Generated-At": generated_at}
+                )
+
+        analysis_result = await run_in_threadpool(
+            project_analyzer.analyze_project, owner, repo, platform,
+            _resolve_deadline(deadline, x_request_deadline), window["start"], window["end"],
+            window["granularity"], fields
+        )
         if not analysis_result:
             raise HTTPException(status_code=404, detail="Project data not found")
         
@@ -20,17 +120,31 @@ async def get_project_analysis(owner: str, repo: str, platform: str = "github"):
             "success": True,
             "data": analysis_result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @router.get("/{owner}/{repo}/metrics")
-async def get_project_metrics(owner: str, repo: str, platform: str = "github"):
+async def get_project_metrics(
+    owner: str,
+    repo: str,
+    platform: str = "github",
+    deadline: Optional[float] = Query(None, ge=0, description="时间预算（秒），超时返回部分结果"),
+    x_request_deadline: Optional[float] = Header(None, ge=0),
+    window: Dict = Depends(time_window),
+    project_analyzer: ProjectAnalyzer = Depends(get_project_analyzer)
+):
     """
     获取项目核心指标
     """
     try:
         # 获取完整分析结果
-        full_analysis = project_analyzer.analyze_project(owner, repo, platform)
+        full_analysis = await run_in_threadpool(
+            project_analyzer.analyze_project, owner, repo, platform,
+            _resolve_deadline(deadline, x_request_deadline), window["start"], window["end"],
+            window["granularity"], METRICS_ENDPOINT_FIELDS
+        )
         if not full_analysis:
             raise HTTPException(status_code=404, detail="Project data not found")
         
@@ -41,20 +155,32 @@ async def get_project_metrics(owner: str, repo: str, platform: str = "github"):
             "community_health": full_analysis.get("community", {}),
             "issues_stats": full_analysis.get("issues", {}),
             "code_quality": full_analysis.get("code_quality", {}),
-            "newbie_friendly_score": full_analysis.get("newbie_friendly_score", 0)
+            "newbie_friendly_score": full_analysis.get("newbie_friendly_score", 0),
+            "partial": full_analysis.get("partial", False),
+            "missing_metrics": full_analysis.get("missing_metrics", [])
         }
         
         return {
             "success": True,
             "data": key_metrics
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch metrics: {str(e)}")
 
 @router.get("/{owner}/{repo}/raw/{metric}")
-async def get_raw_metric(owner: str, repo: str, metric: str, platform: str = "github"):
+async def get_raw_metric(
+    owner: str,
+    repo: str,
+    metric: str,
+    platform: str = "github",
+    window: Dict = Depends(time_window),
+    opendigger_service: OpenDiggerService = Depends(get_opendigger_service)
+):
     """
     获取原始指标数据
+    指定 from/to/granularity 时在服务端切片、重采样后返回
     """
     try:
         # 验证指标名称
@@ -72,7 +198,18 @@ async def get_raw_metric(owner: str, repo: str, metric: str, platform: str = "gi
         if metric not in valid_metrics:
             raise HTTPException(status_code=400, detail=f"Invalid metric name. Valid metrics: {', '.join(valid_metrics)}")
         
-        raw_data = opendigger_service.get_specific_metric(owner, repo, metric, platform)
+        if _is_default_window(window):
+            raw_data = await opendigger_service.get_specific_metric_async(owner, repo, metric, platform)
+        else:
+            models, _, invalid = await run_in_threadpool(
+                opendigger_service.get_typed_metrics, owner, repo, [metric], platform
+            )
+            if metric in invalid:
+                raise HTTPException(status_code=422, detail=f"Metric '{metric}' has unexpected shape: {invalid[metric]}")
+            model = models.get(metric)
+            raw_data = None if model is None else model.resample(
+                window["start"], window["end"], window["granularity"]
+            )
         if raw_data is None:
             raise HTTPException(status_code=404, detail=f"Metric '{metric}' not found")
         
@@ -87,77 +224,128 @@ async def get_raw_metric(owner: str, repo: str, metric: str, platform: str = "gi
         raise HTTPException(status_code=500, detail=f"Failed to fetch raw metric: {str(e)}")
 
 @router.get("/{owner}/{repo}/recommendations")
-async def get_project_recommendations(owner: str, repo: str, platform: str = "github"):
+async def get_project_recommendations(
+    owner: str,
+    repo: str,
+    platform: str = "github",
+    deadline: Optional[float] = Query(None, ge=0, description="时间预算（秒），超时返回部分结果"),
+    x_request_deadline: Optional[float] = Header(None, ge=0),
+    window: Dict = Depends(time_window),
+    project_analyzer: ProjectAnalyzer = Depends(get_project_analyzer),
+    scoring_engine: ScoringEngine = Depends(get_scoring_engine)
+):
     """
     获取项目贡献建议
     """
     try:
         # 获取分析结果
-        analysis = project_analyzer.analyze_project(owner, repo, platform)
+        analysis = await run_in_threadpool(
+            project_analyzer.analyze_project, owner, repo, platform,
+            _resolve_deadline(deadline, x_request_deadline), window["start"], window["end"],
+            window["granularity"], recommendation_fields(scoring_engine.profile())
+        )
         if not analysis:
             raise HTTPException(status_code=404, detail="Project data not found")
         
-        recommendations = []
-        
-        # 基于新手友好度给出建议
+        # 按评分方案中的建议规则生成建议
         newbie_score = analysis.get("newbie_friendly_score", 0)
-        if newbie_score >= 80:
-            recommendations.append({
-                "type": "beginner",
-                "priority": "high",
-                "title": "非常适合新手贡献",
-                "description": "该项目对新手非常友好，社区活跃，问题响应迅速"
-            })
-        elif newbie_score >= 60:
-            recommendations.append({
-                "type": "beginner",
-                "priority": "medium",
-                "title": "适合有一定经验的贡献者",
-                "description": "项目对新手较友好，建议先熟悉代码库和贡献流程"
-            })
-        else:
-            recommendations.append({
-                "type": "beginner",
-                "priority": "low",
-                "title": "适合经验丰富的贡献者",
-                "description": "项目复杂度较高，建议深入了解后再贡献"
-            })
-        
-        # 基于社区健康度给出建议
-        community = analysis.get("community", {})
-        if community.get("bus_factor", 0) < 3:
-            recommendations.append({
-                "type": "community",
-                "priority": "high",
-                "title": "核心贡献者较少",
-                "description": "项目依赖少数核心贡献者，你的贡献将非常有价值"
-            })
-        
-        # 基于问题数据给出建议
-        issues = analysis.get("issues", {})
-        if issues.get("resolution_efficiency", 0) < 50:
-            recommendations.append({
-                "type": "maintenance",
-                "priority": "medium",
-                "title": "问题积压较多",
-                "description": "项目存在较多未解决问题，修复bug是很好的贡献方向"
-            })
-        
-        # 通用建议
-        recommendations.append({
-            "type": "general",
-            "priority": "medium",
-            "title": "阅读贡献指南",
-            "description": "建议先仔细阅读项目的CONTRIBUTING.md文件和代码规范"
-        })
+        recommendations = scoring_engine.recommend(extract_features(analysis), newbie_score)
         
         return {
             "success": True,
             "data": {
                 "project": f"{owner}/{repo}",
                 "newbie_friendly_score": newbie_score,
-                "recommendations": recommendations
+                "recommendations": recommendations,
+                "partial": analysis.get("partial", False),
+                "missing_metrics": analysis.get("missing_metrics", [])
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
+
+@router.get("/{owner}/{repo}/similar")
+async def get_similar_projects(
+    owner: str,
+    repo: str,
+    platform: str = "github",
+    limit: int = Query(10, ge=1, le=100, description="返回的相似项目数量"),
+    deadline: Optional[float] = Query(None, ge=0, description="时间预算（秒），超时返回部分结果"),
+    x_request_deadline: Optional[float] = Header(None, ge=0),
+    project_analyzer: ProjectAnalyzer = Depends(get_project_analyzer),
+    snapshot_store: SnapshotStore = Depends(get_snapshot_store),
+    similarity_index: SimilarityIndex = Depends(get_similarity_index)
+):
+    """
+    获取与该项目相似的项目（在已分析过、以及预生成快照中的项目里查找）
+    """
+    try:
+        await run_in_threadpool(similarity_index.sync_snapshots, snapshot_store)
+        key = snapshot_key(owner, repo, platform)
+        partial = False
+        analysis = None
+        if key not in similarity_index:
+            # 尚未分析过的项目先分析一次，完整的报告由分析器写入索引
+            analysis = await run_in_threadpool(
+                project_analyzer.analyze_project, owner, repo, platform,
+                _resolve_deadline(deadline, x_request_deadline)
+            )
+            if not analysis:
+                raise HTTPException(status_code=404, detail="Project data not found")
+            partial = analysis.get("partial", False)
+
+        if key in similarity_index:
+            features = similarity_index.features(key)
+            similar = similarity_index.query(key, limit)
+        else:
+            # 不完整或基于本地样例数据的报告不写入索引，只用于本次查询；之后的完整分析会写入索引
+            features = build_vector(analysis)[1]
+            similar = similarity_index.query_report(analysis, limit)
+
+        return {
+            "success": True,
+            "data": {
+                "project": f"{owner}/{repo}",
+                "features": features,
+                "similar": similar,
+                "indexed_repos": len(similarity_index),
+                "partial": partial
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find similar projects: {str(e)}")
+
+@router.post("/{owner}/{repo}/refresh")
+async def refresh_project(
+    owner: str,
+    repo: str,
+    platform: str = "github",
+    force: bool = Query(False, description="不探测数据版本，直接失效缓存（需要 X-Refresh-Token）"),
+    x_refresh_token: Optional[str] = Header(None),
+    change_detector: ChangeDetector = Depends(get_change_detector)
+):
+    """
+    检查上游数据是否更新，更新时失效该仓库的缓存（可作为数据更新 webhook 的回调）
+    """
+    if force:
+        # 强制失效会丢弃缓存并触发重新拉取，需要刷新令牌（可配置给数据更新 webhook）
+        require_refresh_token(x_refresh_token)
+    try:
+        if force:
+            await run_in_threadpool(change_detector.invalidate, owner, repo, platform)
+            changed = True
+        else:
+            changed = await run_in_threadpool(change_detector.check, owner, repo, platform)
+        return {
+            "success": True,
+            "data": {
+                "project": f"{owner}/{repo}",
+                "changed": changed
             }
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Refresh failed: {str(e)}")
@@ -0,0 +1,66 @@
+# backend/api/scoring.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from backend.services.scoring_engine import FEATURE_NAMES, ScoringEngine, get_scoring_engine
+from backend.services.snapshot_store import SnapshotStore, get_snapshot_store
+from typing import Any, Dict, List, Optional, Union
+import time
+
+router = APIRouter(prefix="/scoring")
+
+class RankRequest(BaseModel):
+    # 方案名，或内联的方案定义（只用于本次打分，不注册）
+    profiles: List[Union[str, Dict[str, Any]]] = Field(default_factory=lambda: ["default"])
+    sort_by: Optional[str] = None
+    limit: int = Field(50, ge=1, le=10000)
+
+@router.get("/profiles")
+async def list_profiles(scoring_engine: ScoringEngine = Depends(get_scoring_engine)):
+    """
+    已注册的评分方案和可用特征
+    """
+    return {
+        "success": True,
+        "data": {
+            "active": scoring_engine.active,
+            "profiles": scoring_engine.profiles(),
+            "features": list(FEATURE_NAMES),
+            "backend": scoring_engine.backend,
+            "cached_repos": len(scoring_engine),
+        }
+    }
+
+@router.post("/rank")
+async def rank_projects(
+    body: RankRequest,
+    scoring_engine: ScoringEngine = Depends(get_scoring_engine),
+    snapshot_store: SnapshotStore = Depends(get_snapshot_store)
+):
+    """
+    用一个或多个评分方案给所有已缓存特征的仓库（含预生成快照中的仓库）重新打分，不重新拉取数据
+    """
+    try:
+        profiles = scoring_engine.resolve(body.profiles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        await run_in_threadpool(scoring_engine.sync_snapshots, snapshot_store)
+        started = time.perf_counter()
+        ranked = await run_in_threadpool(scoring_engine.rank, profiles, body.limit, body.sort_by)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rank projects: {str(e)}")
+
+    return {
+        "success": True,
+        "data": {
+            "profiles": [profile.name for profile in profiles],
+            "repos_scored": len(scoring_engine),
+            "elapsed_ms": elapsed_ms,
+            "results": ranked,
+        }
+    }
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from functools import lru_cache
 from typing import Optional
 
 class Settings(BaseSettings):
@@ -18,7 +19,60 @@ class Settings(BaseSettings):
     # GitHub API配置
     github_token: Optional[str] = None
     github_api_base: str = "https://api.github.com"
+    github_timeout: float = 10.0
+    # 分析报告中加入 GitHub 新手信号（good first issue 等）；未设置时仅在配置了 github_token 时启用，
+    # 无 token 的 REST 限额（60 次/小时）只够十来个仓库
+    github_enrichment: Optional[bool] = None
+    github_enrichment_timeout: float = 2.0  # 分析时最多等待新手信号的秒数，超时则该模块标记为不完整
+    github_cache_path: str = "data/github_cache.sqlite3"  # 新手信号和 REST 响应（ETag）的持久化缓存
+    github_cache_ttl: int = 21600  # 新手信号有效期（秒）
+    github_batch_size: int = 25  # 每次 GraphQL 查询覆盖的仓库数
+    github_batch_window: float = 0.02  # 合并并发请求的等待窗口（秒）
     
+    # OpenDigger数据源配置
+    opendigger_base_url: str = "https://oss.open-digger.cn"
+    opendigger_local_data_path: str = "opendigger-api"
+    opendigger_timeout: float = 10.0
+    metrics_cache_ttl: int = 3600  # 指标缓存有效期（秒）
+    fetch_max_workers: int = 8  # 并发拉取指标的线程数
+    change_detection_interval: int = 0  # 轮询上游数据版本的间隔（秒），0 表示不轮询
+    change_detection_sentinel: str = "activity"  # 用于判断仓库数据是否更新的哨兵指标
+    refresh_admin_token: Optional[str] = None  # POST /refresh?force=true 需要在 X-Refresh-Token 请求头中提供，未配置时不允许强制刷新
+    
+    # 跨进程共享缓存（多 worker 部署时避免各自重复拉取）: none / sqlite / redis
+    shared_cache_backend: str = "none"
+    shared_cache_path: str = "data/shared_cache.sqlite3"
+    redis_url: Optional[str] = None
+    # 大体积指标的 mmap 二进制快照目录（如 data/metric_snapshots），默认不使用；
+    # 每个仓库每个指标一个文件，重新拉取时覆盖，不会自动删除
+    metric_snapshot_dir: Optional[str] = None
+    
+    # 上游请求限速（每个 host 每秒请求数，<= 0 表示不限速）
+    upstream_rate_limit: float = 50.0
+    upstream_burst: int = 100
+    # 单独限速的 host；GitHub API 带 token 时为 5000 次/小时
+    upstream_host_limits: dict = {"api.github.com": 1.3}
+    
+    # 新手友好度评分方案（见 backend/services/scoring_engine.py）
+    scoring_profiles_path: Optional[str] = None  # 自定义评分方案 JSON 文件
+    scoring_profile: str = "default"  # 报告中使用的评分方案
+    
+    # 预生成报告快照目录（由 backend/regenerate_snapshots.py 生成）
+    snapshot_dir: str = "data/snapshots"
+    
+    # 启动配置
+    warmup_on_startup: bool = True  # 启动时预热 default_repos 的指标缓存，完成后 /ready 才返回就绪
+    
+    # 请求截止时间配置（秒）
+    max_request_deadline: float = 60.0
+
+    # 请求性能剖析（见 backend/services/request_profiler.py）
+    profiling_admin_token: Optional[str] = None  # 请求头 X-Profile 等于该值时剖析本次请求，并允许访问 /debug/profiles
+    profiling_sample_rate: float = 0.0  # 随机剖析的请求比例（0~1）
+    profiling_slow_threshold: float = 2.0  # 耗时超过该秒数的未剖析请求也保存到缓冲区（只有耗时），<= 0 表示不保存
+    profiling_buffer_size: int = 50  # 剖析记录缓冲区容量
+    profiling_sample_interval: float = 0.005  # 剖析时调用栈采样间隔（秒），<= 0 表示不采样
+
     # 第三方服务配置
     openai_api_key: Optional[str] = None
     
@@ -33,4 +87,13 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
 
-settings = Settings()
\ No newline at end of file
+@lru_cache()
+def get_settings() -> Settings:
+    """首次使用时才构造 Settings（读取环境变量和 .env）"""
+    return Settings()
+
+def __getattr__(name: str):
+    # 兼容 from backend.config import settings，访问时才构造
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
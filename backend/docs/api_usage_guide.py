@@ -9,6 +9,13 @@ OpenDigger API 使用指南
 GET /api/v1/health
 检查API服务状态
 
+### 就绪检查
+GET /ready
+启动预热（default_repos 指标缓存）完成前返回 503，完成后返回 200；
+/health 只表示进程存活。编排系统应以 /ready 作为流量接入条件
+
+启动导入耗时基准: python backend/utils/benchmark_startup.py --budget-ms 800
+
 ### 项目综合分析
 GET /api/v1/projects/{owner}/{repo}
 获取项目的完整分析报告
@@ -25,6 +32,150 @@ GET /api/v1/projects/{owner}/{repo}/recommendations
 GET /api/v1/projects/{owner}/{repo}/raw/{metric}
 获取特定指标的原始数据
 
+## 请求截止时间
+
+项目分析相关端点（/projects/{owner}/{repo}、/metrics、/recommendations）支持时间预算：
+- 查询参数 deadline=<秒>，或请求头 X-Request-Deadline: <秒>
+- 到期时返回已计算的部分，响应中 partial 为 true，missing_metrics 列出未取回的指标
+- 未完成的指标会在后台继续拉取并写入缓存，下一次请求即可命中
+离线验证: python backend/utils/test_request_deadline.py
+
+## 时间范围与粒度
+
+项目分析相关端点和 /raw/{metric} 支持:
+- from=YYYY[-MM]、to=YYYY[-MM]: 时间窗口（含两端）
+- granularity=month|quarter|year: 时间粒度
+/raw/{metric} 在服务端切片、重采样后返回；分析端点按窗口计算各模块，activity.series 为窗口内按粒度聚合的数据。
+示例: GET /api/v1/projects/apache/iotdb/raw/activity?from=2024-01&to=2024-03
+贡献者名单类指标（contributors_detail、activity_details 等）按季度/年重采样时，同一登录名只出现一次（activity_details 合计活跃度）。
+离线验证: python backend/utils/test_metric_resample.py
+
+## 字段投影
+
+/projects/{owner}/{repo}?fields=activity.score,community.bus_factor
+只拉取、计算并返回所列字段（模块名表示整个模块），未用到的指标不会请求上游。
+可用模块: basic_info, window, activity, community, issues, code_quality, newbie_friendly_score
+离线验证: python backend/utils/test_field_projection.py
+
+## 预生成报告快照
+
+夜间任务可批量生成分析报告快照:
+    python -m backend.regenerate_snapshots repos.txt --concurrency 8
+每次运行先写入 data/snapshots/reports.jsonl.run，全部完成后原子替换 reports.jsonl，生成期间 API 继续使用旧快照；
+运行中断后再次执行会从断点继续（--restart 丢弃未完成的运行重新开始）。失败的仓库沿用旧快照中的记录。
+不完整（partial）或上游不可用时基于本地样例数据（fallback_metrics 非空）的报告计为失败，不写入快照，下次运行时重试。
+/projects/{owner}/{repo} 命中快照时直接返回，响应头 X-Snapshot-Generated-At 为生成时间；
+加 fresh=true 可跳过快照实时计算。
+
+## 大体积指标的二进制快照
+
+设置 METRIC_SNAPSHOT_DIR（如 data/metric_snapshots）后，activity_details、active_dates_and_times、
+contributors_detail 和各类分布指标拉取后写为列式二进制文件（{METRIC_SNAPSHOT_DIR}/{platform}/{owner}/{repo}/{metric}.bin，
+默认不启用），以 mmap 只读打开，分析和 /raw 切片时只解码用到的周期。有效期内的文件在重启后和其他 worker 中直接复用。
+内存测量: python backend/utils/benchmark_metric_memory.py --repos 50
+
+## 多 worker 部署
+
+多个 uvicorn worker 可以共享指标缓存和完整报告，避免每个进程各自冷启动、重复请求上游:
+- SHARED_CACHE_BACKEND=sqlite: 使用 data/shared_cache.sqlite3（SHARED_CACHE_PATH 可修改），适合单机
+- SHARED_CACHE_BACKEND=redis, REDIS_URL=redis://...: 适合多机（需安装 redis 包）
+同一个指标同一时间只有一个 worker 请求上游，其他 worker 等待其结果。
+SQLite 后端写入时每 5 分钟顺带删除已过期的条目。
+基准: python backend/utils/benchmark_shared_cache.py --workers 4
+离线验证（Redis 后端使用进程内替身）: python backend/utils/test_shared_cache.py
+
+## 上游限速与优先级
+
+所有上游请求按 host 经令牌桶限速（UPSTREAM_RATE_LIMIT 次/秒，UPSTREAM_BURST 突发；
+UPSTREAM_HOST_LIMITS 可单独配置，如 GitHub API），并按优先级排队: 实时请求 > 批量任务（regenerate_snapshots）
+> 预热与后台轮询。上游返回 429/503 + Retry-After 时暂停该 host 后重试。
+GET /api/v1/stats 返回各 host、各优先级的排队深度、放行数、平均等待时间和限流次数；
+metric_fetches 为进程内发起的指标加载数（started）、合并进进行中加载的并发请求数（collapsed）
+和各优先级排队等待拉取线程的指标数（queued）；拉取线程同样先执行实时请求的指标。
+同一指标的并发请求（如前端同时请求报告、/metrics、/recommendations 和 /raw）只拉取、解析一次。
+离线验证: python backend/utils/test_fetch_coalescing.py
+
+## 数据更新检测
+
+每个仓库只用 HEAD 请求探测哨兵指标（默认 activity.json）的 ETag/Last-Modified，
+数据版本变化时失效该仓库的指标缓存、趋势状态和快照。
+- CHANGE_DETECTION_INTERVAL=<秒>: 后台定期检查所有已缓存的仓库（默认 0，不轮询）
+- POST /api/v1/projects/{owner}/{repo}/refresh: 立即检查单个仓库，可用作数据更新 webhook；
+  force=true 时不探测直接失效，需要在 X-Refresh-Token 请求头中提供 REFRESH_ADMIN_TOKEN（未配置时不允许强制刷新）
+
+## GitHub 新手信号
+
+GitHub 上的项目报告包含 newcomer 模块: good first issue / help wanted 数量、未关闭问题数、
+常用标签和是否有 CONTRIBUTING 指南，并计入新手友好度（有数据时占 15%）。
+- 配置 GITHUB_TOKEN 时用 GraphQL 批量查询，并发请求的仓库合并为一次调用（GITHUB_BATCH_SIZE，默认 25）；
+  未配置时回退 REST，带 If-None-Match 条件请求
+- 结果缓存在 GITHUB_CACHE_PATH（默认 data/github_cache.sqlite3），有效期 GITHUB_CACHE_TTL 秒
+- 分析时最多等待 GITHUB_ENRICHMENT_TIMEOUT 秒，超时则 newcomer 记入 incomplete_sections；
+  默认只在配置了 GITHUB_TOKEN 时启用（无 token 的 REST 限额很快耗尽），GITHUB_ENRICHMENT=true/false 强制开关
+- 触发 GitHub 限流时返回上一次缓存的信号（标记 stale），报告不因此变为 partial
+- 离线验证: python backend/utils/test_github_enrichment.py
+
+## 相似项目
+
+GET /api/v1/projects/{owner}/{repo}/similar?limit=10 返回与该项目最相似的项目，
+按活跃度、活跃度趋势、Bus Factor、活跃贡献者、问题响应时间与解决率、PR 接受率、代码变更量和技术分叉数比较。
+候选范围为本进程分析过的项目和预生成快照中的项目；目标项目未分析过时先分析一次。
+离线验证: python backend/utils/test_similar_projects.py
+
+## 评分方案
+
+新手友好度分数和 /recommendations 的建议由评分方案决定（backend/services/scoring_engine.py）:
+每个特征的权重、饱和值（达到该值得满分），以及 {特征: {运算符: 阈值}} 形式的建议规则。
+- SCORING_PROFILES_PATH: 自定义方案 JSON 文件；SCORING_PROFILE: 报告使用的方案（默认 default）
+- GET /api/v1/scoring/profiles: 已注册的方案和可用特征
+- POST /api/v1/scoring/rank: 用一个或多个方案（方案名或内联定义）给所有已分析过、
+  以及预生成快照中的仓库重新打分，不重新拉取数据
+- 离线验证（默认方案与原先写死的公式和建议规则一致）: python backend/utils/test_scoring_profile.py
+
+```python
+requests.post("http://localhost:8000/api/v1/scoring/rank", json={
+    "profiles": ["default", {"name": "maintainers", "components": [
+        {"feature": "bus_factor", "weight": 60, "saturation": 5},
+        {"feature": "resolution_efficiency", "weight": 40, "saturation": 80}
+    ]}],
+    "sort_by": "maintainers",
+    "limit": 20
+})
+```
+
+## 跨仓库贡献者
+
+由已缓存的 contributors_detail / new_contributors_detail / activity_details 建立贡献者倒排索引
+（backend/services/contributor_index.py），查询时不重新拉取数据:
+- GET /api/v1/contributors/{login}/repos?since=2023: 该贡献者活跃过的仓库，按活跃度排序
+- GET /api/v1/contributors/shared?repo=a/b&repo=c/d: 同时活跃于这些仓库的贡献者
+- GET /api/v1/contributors/mentors?repo=a/b&min_periods=6: 参与时间长且最近 12 个月仍活跃的贡献者
+- GET /api/v1/contributors/stats: 索引规模
+shared 和 mentors 中尚未索引的仓库优先使用缓存或二进制快照，都没有时先拉取一次这三项指标；
+/repos 只在已缓存的仓库中查找。后台同步读取的快照不放入进程内缓存。
+基准: python backend/utils/benchmark_contributor_index.py
+离线验证: python backend/utils/test_contributor_index.py
+
+## 请求剖析与慢请求
+
+- 配置 PROFILING_ADMIN_TOKEN 后，请求头带 X-Profile: <token> 的请求会被剖析，响应头 X-Profile-Id 给出记录 id
+- PROFILING_SAMPLE_RATE（0~1）按比例随机剖析请求
+- 剖析记录包含阶段时间线（各指标的 load_metric / upstream_request / json_decode / parse_metric，
+  fetch_metrics、analyze_* 等，含线程池中的阶段）和调用栈采样（间隔 PROFILING_SAMPLE_INTERVAL）
+- 被剖析的请求（请求头或随机抽样）都会记录；未剖析的请求耗时超过 PROFILING_SLOW_THRESHOLD 秒（默认 2）时
+  只记录耗时。保留最近 PROFILING_BUFFER_SIZE 条
+- GET /api/v1/debug/profiles: 记录摘要；GET /api/v1/debug/profiles/{id}: 完整时间线和调用栈。
+  同样需要 X-Profile 请求头，未配置 PROFILING_ADMIN_TOKEN 时不可用
+- 离线验证: python backend/utils/test_request_profiling.py
+
+```python
+r = requests.get("http://localhost:8000/api/v1/projects/apache/iotdb", headers={"X-Profile": token})
+profile = requests.get(
+    f"http://localhost:8000/api/v1/debug/profiles/{r.headers['X-Profile-Id']}", headers={"X-Profile": token}
+).json()["data"]
+print(profile["stage_totals"])
+```
+
 ## 支持的指标
 
 - activity: 活跃度
@@ -1,21 +1,63 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import uvicorn
+from fastapi.responses import JSONResponse
+import threading
 
-from backend.config import settings
+from backend.config import get_settings
 from backend.api import router as api_router
+from backend.services.change_detector import get_change_detector
+from backend.services.opendigger_service import get_opendigger_service
+from backend.services.project_analyzer import get_project_analyzer
+from backend.services.request_profiler import ProfilingMiddleware
+from backend.services.upstream_scheduler import PREFETCH, upstream_priority
+
+def warm_up(app: FastAPI) -> None:
+    """预热 default_repos 的指标缓存，完成后标记服务就绪"""
+    settings = get_settings()
+    analyzer = get_project_analyzer()
+    with upstream_priority(PREFETCH):
+        # 新手信号合并为一次批量查询，与下面的指标拉取并行
+        if analyzer.github is not None:
+            analyzer.github.prefetch(name.split("/", 1) for name in settings.default_repos)
+        for full_name in settings.default_repos:
+            owner, repo = full_name.split("/", 1)
+            try:
+                analyzer.analyze_project(owner, repo)
+            except Exception as e:
+                print(f"Warm-up failed for {full_name}: {e}")
+    app.state.ready = True
+    print("Warm-up finished, service is ready")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时创建服务实例并在后台预热缓存，不阻塞进程启动"""
+    settings = get_settings()
+    get_opendigger_service()
+    get_project_analyzer()
+
+    app.state.ready = not settings.warmup_on_startup
+    if settings.warmup_on_startup:
+        threading.Thread(target=warm_up, args=(app,), name="warm-up", daemon=True).start()
+    if settings.change_detection_interval > 0:
+        get_change_detector().start(settings.change_detection_interval)
+    yield
+    if settings.change_detection_interval > 0:
+        get_change_detector().stop()
 
 def create_app() -> FastAPI:
     """创建FastAPI应用"""
+    settings = get_settings()
     app = FastAPI(
         title=settings.app_name,
         version=settings.app_version,
         description="开源贡献者智能导航系统",
         docs_url="/api/docs" if settings.debug else None,
         redoc_url="/api/redoc" if settings.debug else None,
+        lifespan=lifespan,
     )
-    
+    app.state.ready = False
+
     # 配置CORS
     app.add_middleware(
         CORSMiddleware,
@@ -24,31 +66,45 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    
+
+    # 请求计时、按需剖析和慢请求记录（见 /api/v1/debug/profiles）
+    app.add_middleware(ProfilingMiddleware)
+
     # 注册路由
     app.include_router(api_router, prefix=settings.api_prefix)
-    
+
     # 挂载静态文件
     #app.mount("/static", StaticFiles(directory="frontend/assets"), name="static")
-    
-    # 健康检查端点
+
+    # 健康检查端点（进程存活即返回）
     @app.get("/health")
     async def health_check():
         return {"status": "healthy", "version": settings.app_version}
-    
+
+    # 就绪检查端点（缓存预热完成后才返回200，供编排系统决定何时转发流量）
+    @app.get("/ready")
+    async def readiness_check():
+        if not app.state.ready:
+            return JSONResponse(status_code=503, content={"status": "warming_up"})
+        return {"status": "ready"}
+
     @app.get("/")
     async def root():
         return {
             "message": "欢迎使用开源罗盘API",
             "docs": "/api/docs" if settings.debug else "/api/redoc",
-            "health": "/health"
+            "health": "/health",
+            "ready": "/ready"
         }
-    
+
     return app
 
 app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
+    settings = get_settings()
     uvicorn.run(
         "backend.main:app",
         host=settings.api_host,
@@ -0,0 +1,182 @@
+# backend/regenerate_snapshots.py
+"""
+批量离线重新生成项目分析报告快照
+
+用法:
+    python -m backend.regenerate_snapshots repos.txt --concurrency 8
+    python -m backend.regenerate_snapshots repos.txt --restart
+
+repos.txt 每行一个仓库，格式为 owner/repo 或 platform/owner/repo，# 开头为注释。
+每次运行把报告以 JSON Lines 追加写入 <output>/reports.jsonl.run，全部仓库处理完后
+用 os.replace 原子替换 <output>/reports.jsonl，生成期间 API 继续使用上一份快照。
+reports.jsonl.run 同时作为本次运行的检查点：运行中断后再次执行时跳过已生成的仓库，
+--restart 丢弃未完成的运行重新开始。
+
+不完整（partial）或上游不可用时基于本地样例数据的报告计为失败，不写入本次运行的文件；
+替换时沿用上一份快照中这些仓库的记录（若有），下次运行重新生成。
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Optional, Set, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+
+from backend.config import get_settings
+from backend.services.project_analyzer import get_project_analyzer
+from backend.services.snapshot_store import (
+    REPORTS_FILE, REPORT_MARKER, encode_snapshot_line, iter_snapshot_lines, snapshot_key
+)
+
+# 进行中的运行写入的文件，完成后替换 REPORTS_FILE
+RUN_FILE = REPORTS_FILE + ".run"
+from backend.services.upstream_scheduler import BATCH, upstream_priority
+
+def load_repo_list(path: str) -> List[Tuple[str, str, str]]:
+    """读取仓库列表，返回 (platform, owner, repo)"""
+    repos = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split("/")
+            if len(parts) == 2:
+                repos.append(("github", parts[0], parts[1]))
+            elif len(parts) == 3:
+                repos.append((parts[0], parts[1], parts[2]))
+            else:
+                print(f"Skipping invalid repo entry: {line}")
+    return repos
+
+def _line_key(line: bytes) -> Optional[str]:
+    marker = line.find(REPORT_MARKER)
+    return json.loads(line[:marker] + b"}")["repo"] if marker > 0 else None
+
+def load_checkpoint(run_path: str) -> Set[str]:
+    """读取本次运行已完成的仓库键，并截掉上次中断时写了一半的行"""
+    done = set()
+    if not os.path.exists(run_path):
+        return done
+
+    end = 0
+    for offset, line in iter_snapshot_lines(run_path):
+        end = offset + len(line)
+        key = _line_key(line)
+        if key is not None:
+            done.add(key)
+    if end != os.path.getsize(run_path):
+        with open(run_path, "r+b") as f:
+            f.truncate(end)
+    return done
+
+def publish(run_path: str, reports_path: str, failed: Set[str]) -> int:
+    """
+    把本次运行的文件原子替换为正式快照，返回沿用的旧记录数
+    本次失败的仓库沿用上一份快照中的记录（每个仓库只保留最后一条）
+    """
+    carried = {}
+    if failed and os.path.exists(reports_path):
+        for _, line in iter_snapshot_lines(reports_path):
+            key = _line_key(line)
+            if key in failed:
+                carried[key] = line
+    with open(run_path, "ab") as out:
+        for line in carried.values():
+            out.write(line)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(run_path, reports_path)
+    return len(carried)
+
+def analyze_one(platform: str, owner: str, repo: str) -> bytes:
+    # 批量任务走 batch 通道，与线上服务共用上游配额时让位于实时请求
+    with upstream_priority(BATCH):
+        report = get_project_analyzer().analyze_project(owner, repo, platform)
+    # 不完整或基于本地样例数据的报告不写入快照，也不进入检查点，下次运行时重试
+    if report.get("partial"):
+        raise RuntimeError(f"incomplete report (missing {report.get('missing_metrics')}, "
+                           f"incomplete {report.get('incomplete_sections')})")
+    if report.get("fallback_metrics"):
+        raise RuntimeError(f"upstream unavailable, local fallback data for {report['fallback_metrics']}")
+    return encode_snapshot_line(snapshot_key(owner, repo, platform), report)
+
+def regenerate(repos: List[Tuple[str, str, str]], output_dir: str, concurrency: int,
+               restart: bool = False) -> int:
+    """生成快照，返回失败的仓库数量"""
+    os.makedirs(output_dir, exist_ok=True)
+    reports_path = os.path.join(output_dir, REPORTS_FILE)
+    run_path = os.path.join(output_dir, RUN_FILE)
+    if restart and os.path.exists(run_path):
+        os.remove(run_path)
+
+    # 列表中重复的仓库只生成一次
+    repos = list({snapshot_key(owner, repo, platform): (platform, owner, repo)
+                  for platform, owner, repo in repos}.values())
+    done = load_checkpoint(run_path)
+    todo = [r for r in repos if snapshot_key(r[1], r[2], r[0]) not in done]
+    print(f"{len(repos)} repos, {len(repos) - len(todo)} already done in this run, {len(todo)} to generate")
+
+    failed: Set[str] = set()
+    finished = 0
+    started = time.time()
+    pending = {}
+    queue = enumerate(todo)
+    github = get_project_analyzer().github
+    batch_size = get_settings().github_batch_size
+
+    with open(run_path, "ab") as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next() -> bool:
+            index, item = next(queue, (None, None))
+            if item is None:
+                return False
+            if github is not None and index % batch_size == 0:
+                # 每 batch_size 个仓库预取一次 GitHub 新手信号，合并为一次 GraphQL 查询
+                with upstream_priority(BATCH):
+                    github.prefetch((o, r) for p, o, r in todo[index:index + batch_size] if p == "github")
+            pending[executor.submit(analyze_one, *item)] = item
+            return True
+
+        # 只保留有限数量的在途任务，避免一次性提交数千个仓库
+        for _ in range(concurrency * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                platform, owner, repo = pending.pop(future)
+                try:
+                    out.write(future.result())
+                    out.flush()
+                except Exception as e:
+                    failed.add(snapshot_key(owner, repo, platform))
+                    print(f"Failed to analyze {platform}/{owner}/{repo}: {e}")
+                finished += 1
+                if finished % 100 == 0:
+                    rate = finished / max(time.time() - started, 1e-6)
+                    print(f"{finished}/{len(todo)} done ({rate:.1f} repos/s)")
+                submit_next()
+
+    carried = publish(run_path, reports_path, failed)
+    print(f"Finished {finished} repos in {time.time() - started:.1f}s, {len(failed)} failed "
+          f"({carried} kept from the previous snapshot)")
+    return len(failed)
+
+def main(argv=None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="批量重新生成项目分析报告快照")
+    parser.add_argument("repo_list", help="仓库列表文件")
+    parser.add_argument("--output", default=settings.snapshot_dir, help="快照输出目录")
+    parser.add_argument("--concurrency", type=int, default=settings.fetch_max_workers,
+                        help="同时分析的仓库数量")
+    parser.add_argument("--restart", action="store_true", help="丢弃未完成的运行，全部重新生成")
+    args = parser.parse_args(argv)
+
+    repos = load_repo_list(args.repo_list)
+    failed = regenerate(repos, args.output, max(args.concurrency, 1), args.restart)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# backend/services/change_detector.py
+"""
+上游数据变更检测
+
+OpenDigger 按月整体刷新数据。每个仓库只探测一个哨兵指标（默认 activity.json），
+用 HEAD + If-None-Match/If-Modified-Since 比较数据版本；版本变化时精确失效该仓库的
+指标缓存和派生结果，而不是依赖固定的 TTL。
+既可以后台定时轮询所有已缓存的仓库，也可以由 webhook 触发单个仓库的检查。
+"""
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+
+from backend.config import get_settings
+from backend.services.opendigger_service import OpenDiggerService, get_opendigger_service
+from backend.services.project_analyzer import get_project_analyzer
+from backend.services.snapshot_store import get_snapshot_store
+from backend.services.trend_engine import TrendEngine, get_trend_engine
+from backend.services.upstream_scheduler import PREFETCH, upstream_priority
+
+InvalidationListener = Callable[[str, str, str], None]
+
+class ChangeDetector:
+    def __init__(self, opendigger: Optional[OpenDiggerService] = None,
+                 trend_engine: Optional[TrendEngine] = None,
+                 sentinel_metric: Optional[str] = None):
+        self.opendigger = opendigger or get_opendigger_service()
+        self.trend_engine = trend_engine or get_trend_engine()
+        self.sentinel_metric = sentinel_metric or get_settings().change_detection_sentinel
+        # (platform, owner, repo) -> 最近一次看到的数据版本
+        self._versions: Dict[Tuple[str, str, str], str] = {}
+        self._listeners: List[InvalidationListener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"probes": 0, "not_modified": 0, "changes": 0, "errors": 0}
+
+    def add_listener(self, listener: InvalidationListener) -> None:
+        """注册失效回调 listener(owner, repo, platform)，用于清理其他派生缓存"""
+        self._listeners.append(listener)
+
+    def probe(self, owner: str, repo: str, platform: str = "github",
+              known_version: Optional[str] = None) -> Optional[str]:
+        """探测哨兵指标的当前版本；未变化时返回 known_version，失败时返回 None"""
+        url = self.opendigger.get_metric_url(owner, repo, self.sentinel_metric, platform)
+        headers = dict(self.opendigger.headers)
+        if known_version:
+            if known_version.startswith(('"', 'W/')):
+                headers["If-None-Match"] = known_version
+            else:
+                headers["If-Modified-Since"] = known_version
+
+        self.stats["probes"] += 1
+        try:
+            response = self.opendigger.scheduler.request(
+                "HEAD", url, headers=headers, timeout=self.opendigger.timeout
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error probing {url}: {e}")
+            return None
+
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return known_version
+        if response.status_code != 200:
+            self.stats["errors"] += 1
+            print(f"Failed to probe {url}: {response.status_code}")
+            return None
+        return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+    def check(self, owner: str, repo: str, platform: str = "github") -> bool:
+        """检查单个仓库，数据版本变化时失效其缓存并返回 True"""
+        key = (platform, owner, repo)
+        with self._lock:
+            known = self._versions.get(key)
+        if known is None:
+            known = self.opendigger.cached_version(owner, repo, self.sentinel_metric, platform)
+
+        current = self.probe(owner, repo, platform, known)
+        if current is None:
+            return False
+        with self._lock:
+            self._versions[key] = current
+
+        if known is not None and current != known:
+            self.invalidate(owner, repo, platform)
+            return True
+        return False
+
+    def invalidate(self, owner: str, repo: str, platform: str = "github") -> None:
+        """失效某个仓库的指标缓存、趋势状态及已注册的派生缓存"""
+        self.stats["changes"] += 1
+        removed = self.opendigger.invalidate_repo(owner, repo, platform)
+        self.trend_engine.forget(f"{platform}/{owner}/{repo}")
+        for listener in self._listeners:
+            try:
+                listener(owner, repo, platform)
+            except Exception as e:
+                print(f"Invalidation listener failed for {platform}/{owner}/{repo}: {e}")
+        print(f"Data changed for {platform}/{owner}/{repo}, invalidated {removed} cached metrics")
+
+    def poll_once(self) -> List[Tuple[str, str, str]]:
+        """检查所有已缓存的仓库，返回数据发生变化的仓库"""
+        changed = []
+        # 后台轮询优先级最低，不占用实时请求的上游配额
+        with upstream_priority(PREFETCH):
+            for platform, owner, repo in sorted(self.opendigger.cached_repos()):
+                if self._stop.is_set():
+                    break
+                if self.check(owner, repo, platform):
+                    changed.append((platform, owner, repo))
+        return changed
+
+    def start(self, interval: float) -> None:
+        """启动后台轮询线程"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    print(f"Change detection poll failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="change-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+@lru_cache()
+def get_change_detector() -> ChangeDetector:
+    """全局实例，首次使用时创建；数据变化时同时丢弃该仓库的共享报告和预生成快照"""
+    detector = ChangeDetector()
+    detector.add_listener(get_project_analyzer().invalidate_report)
+    detector.add_listener(get_snapshot_store().invalidate)
+    return detector
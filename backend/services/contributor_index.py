@@ -0,0 +1,302 @@
+# backend/services/contributor_index.py
+"""
+跨仓库贡献者倒排索引
+
+由已缓存的 contributors_detail / new_contributors_detail / activity_details 指标建立
+贡献者登录名 -> (仓库, 周期, 活跃度) 的倒排表，支持:
+- 某个贡献者还在哪些仓库活跃
+- 多个仓库共同的核心贡献者
+- 某个仓库中可以带新人的资深贡献者
+
+登录名、仓库键和周期键都映射为整数 id，每个贡献者的倒排表是几个并列的紧凑数组
+（仓库 id、周期 id、活跃度、角色标记），不保留任何 Python 对象形式的明细。
+后台同步只读取进程内缓存和本地二进制快照中的指标，不请求上游，读取的快照也不放入进程内缓存；
+查询尚未索引的仓库时，缓存和快照中都没有完整数据才请求上游。
+"""
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import threading
+import time
+
+from backend.services.metric_models import PeriodModel, bucket_of
+from backend.services.opendigger_service import OpenDiggerService, get_opendigger_service
+from backend.services.snapshot_store import snapshot_key
+
+CONTRIBUTOR_METRICS = ("contributors_detail", "new_contributors_detail", "activity_details")
+
+# 角色标记
+CONTRIBUTOR, NEW_CONTRIBUTOR, ACTIVE = 1, 2, 4
+ROLE_NAMES = ((CONTRIBUTOR, "contributor"), (NEW_CONTRIBUTOR, "new_contributor"), (ACTIVE, "active"))
+
+def leaf_periods(model: PeriodModel) -> List[str]:
+    """
+    互不重叠的最细粒度周期: 全部月份，加上没有月份数据的季度，再加上没有月份和季度数据的年份
+    （避免同一时间段被年、季度、月重复计入）
+    """
+    covered_quarters = {bucket_of(month, "quarter") for month in model.month_keys}
+    leaves = model.month_keys + [quarter for quarter in model.quarter_keys if quarter not in covered_quarters]
+    covered_years = {key[:4] for key in leaves}
+    leaves += [year for year in model.year_keys if year not in covered_years]
+    return leaves
+
+def period_start(period: str) -> str:
+    """周期的第一个月，用于与 since 比较"""
+    if len(period) == 4:
+        return f"{period}-01"
+    if period[4] == "Q":
+        return f"{period[:4]}-{(int(period[5]) - 1) * 3 + 1:02d}"
+    return period
+
+class Postings:
+    """一个贡献者的倒排表，四个数组按下标对应"""
+    __slots__ = ("repos", "periods", "scores", "roles")
+
+    def __init__(self):
+        self.repos = array("I")
+        self.periods = array("I")
+        self.scores = array("f")
+        self.roles = array("B")
+
+    def __len__(self) -> int:
+        return len(self.repos)
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.repos, self.periods, self.scores, self.roles))
+
+    def remove_repo(self, repo_id: int) -> None:
+        keep = [i for i, r in enumerate(self.repos) if r != repo_id]
+        self.repos = array("I", (self.repos[i] for i in keep))
+        self.periods = array("I", (self.periods[i] for i in keep))
+        self.scores = array("f", (self.scores[i] for i in keep))
+        self.roles = array("B", (self.roles[i] for i in keep))
+
+class ContributorIndex:
+    def __init__(self, opendigger: Optional[OpenDiggerService] = None, sync_interval: float = 30.0):
+        self.opendigger = opendigger or get_opendigger_service()
+        self.sync_interval = sync_interval
+        self._ids: Dict[str, int] = {}
+        self._logins: List[str] = []
+        self._repo_ids: Dict[str, int] = {}
+        self._repos: List[str] = []
+        self._period_ids: Dict[str, int] = {}
+        self._periods: List[str] = []
+        self._postings: List[Postings] = []
+        self._members: Dict[int, array] = {}  # 仓库 id -> 贡献者 id
+        self._signatures: Dict[int, Tuple] = {}  # 仓库 id -> 索引时的指标版本
+        self._last_sync = 0.0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _intern(ids: Dict[str, int], names: List[str], name: str) -> int:
+        i = ids.get(name)
+        if i is None:
+            i = ids[name] = len(names)
+            names.append(name)
+        return i
+
+    # ---- 写入 ----
+
+    def index_repo(self, repo_key: str, models: Dict[str, Any]) -> int:
+        """用一个仓库的贡献者指标模型（重新）建立其倒排项，返回写入的条数"""
+        # (贡献者, 周期) -> [活跃度, 角色]
+        entries: Dict[Tuple[str, str], List] = {}
+        for metric, role in (("contributors_detail", CONTRIBUTOR), ("new_contributors_detail", NEW_CONTRIBUTOR)):
+            model = models.get(metric)
+            if model is None:
+                continue
+            for period in leaf_periods(model):
+                for login in model.values[period]:
+                    entries.setdefault((login, period), [0.0, 0])[1] |= role
+        activity = models.get("activity_details")
+        if activity is not None:
+            for period in leaf_periods(activity):
+                for login, score in activity.values[period]:
+                    entry = entries.setdefault((login, period), [0.0, 0])
+                    entry[0] += score
+                    entry[1] |= ACTIVE
+
+        with self._lock:
+            repo_id = self._intern(self._repo_ids, self._repos, repo_key)
+            for login_id in self._members.pop(repo_id, ()):
+                self._postings[login_id].remove_repo(repo_id)
+
+            members = set()
+            for (login, period), (score, roles) in entries.items():
+                login_id = self._intern(self._ids, self._logins, login)
+                if login_id == len(self._postings):
+                    self._postings.append(Postings())
+                postings = self._postings[login_id]
+                postings.repos.append(repo_id)
+                postings.periods.append(self._intern(self._period_ids, self._periods, period))
+                postings.scores.append(score)
+                postings.roles.append(roles)
+                members.add(login_id)
+            self._members[repo_id] = array("I", sorted(members))
+        return len(entries)
+
+    def sync(self, force: bool = False) -> int:
+        """索引缓存中新增或更新过的仓库，返回重新索引的仓库数；距上次同步不足 sync_interval 秒时跳过"""
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return 0
+        self._last_sync = now
+
+        updated = 0
+        for platform, owner, repo in self.opendigger.cached_repos() | self.opendigger.snapshot_repos():
+            if self._sync_repo(owner, repo, platform):
+                updated += 1
+        return updated
+
+    def _sync_repo(self, owner: str, repo: str, platform: str,
+                   entries: Optional[Dict[str, Any]] = None) -> bool:
+        """按缓存或快照中的指标（重新）索引一个仓库；指标版本与上次索引时相同则跳过，返回是否重新索引"""
+        if entries is None:
+            entries = self.opendigger.peek_metrics(owner, repo, CONTRIBUTOR_METRICS, platform)
+        if not entries:
+            return False
+        key = snapshot_key(owner, repo, platform)
+        signature = tuple((metric, entries[metric].version, entries[metric].stored_at) for metric in sorted(entries))
+        with self._lock:
+            repo_id = self._repo_ids.get(key)
+            if repo_id is not None and self._signatures.get(repo_id) == signature:
+                return False
+        self.index_repo(key, {metric: entry.model for metric, entry in entries.items()})
+        with self._lock:
+            self._signatures[self._repo_ids[key]] = signature
+        return True
+
+    def ensure_repo(self, owner: str, repo: str, platform: str = "github") -> bool:
+        """
+        仓库尚未索引时索引其贡献者指标；进程内缓存或快照中已有全部指标时直接使用，
+        否则拉取一次。返回是否有数据
+        """
+        if snapshot_key(owner, repo, platform) in self._repo_ids:
+            return True
+        entries = self.opendigger.peek_metrics(owner, repo, CONTRIBUTOR_METRICS, platform)
+        if len(entries) < len(CONTRIBUTOR_METRICS):
+            self.opendigger.get_typed_metrics(owner, repo, CONTRIBUTOR_METRICS, platform)
+            entries = None
+        self._sync_repo(owner, repo, platform, entries)
+        return snapshot_key(owner, repo, platform) in self._repo_ids
+
+    # ---- 查询 ----
+
+    def _iter_postings(self, login_id: int, since: Optional[str]) -> Iterable[Tuple[int, str, float, int]]:
+        postings = self._postings[login_id]
+        for repo_id, period_id, score, roles in zip(postings.repos, postings.periods, postings.scores, postings.roles):
+            period = self._periods[period_id]
+            if since is None or period_start(period) >= since:
+                yield repo_id, period, score, roles
+
+    def _summaries(self, login_id: int, since: Optional[str],
+                   repo_filter: Optional[Set[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """按仓库汇总一个贡献者的倒排项"""
+        result: Dict[int, Dict[str, Any]] = {}
+        for repo_id, period, score, roles in self._iter_postings(login_id, since):
+            if repo_filter is not None and repo_id not in repo_filter:
+                continue
+            summary = result.get(repo_id)
+            if summary is None:
+                summary = result[repo_id] = {"activity": 0.0, "periods": 0, "first": period, "last": period, "roles": 0}
+            summary["activity"] += score
+            summary["periods"] += 1
+            summary["first"] = min(summary["first"], period)
+            summary["last"] = max(summary["last"], period)
+            summary["roles"] |= roles
+        return result
+
+    def _format(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "activity": round(summary["activity"], 2),
+            "periods": summary["periods"],
+            "first_period": summary["first"],
+            "last_period": summary["last"],
+            "roles": [name for flag, name in ROLE_NAMES if summary["roles"] & flag],
+        }
+
+    def contributor_repos(self, login: str, since: Optional[str] = None, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """某个贡献者活跃过的仓库，按活跃度降序；不认识该贡献者时返回 None"""
+        with self._lock:
+            login_id = self._ids.get(login)
+            if login_id is None:
+                return None
+            summaries = self._summaries(login_id, since)
+            ranked = sorted(summaries.items(), key=lambda item: (-item[1]["activity"], -item[1]["periods"]))
+            return [{"repo": self._repos[repo_id], **self._format(summary)} for repo_id, summary in ranked[:limit]]
+
+    def shared_contributors(self, repo_keys: List[str], since: Optional[str] = None,
+                            limit: int = 20) -> List[Dict[str, Any]]:
+        """同时在所有给定仓库中出现的贡献者，按其在各仓库中最低的活跃度降序（即在每个仓库都足够活跃）"""
+        with self._lock:
+            repo_ids = [self._repo_ids.get(key) for key in repo_keys]
+            if any(repo_id is None for repo_id in repo_ids):
+                return []
+            shared = set(self._members[repo_ids[0]])
+            for repo_id in repo_ids[1:]:
+                shared.intersection_update(self._members[repo_id])
+
+            results = []
+            wanted = set(repo_ids)
+            for login_id in shared:
+                summaries = self._summaries(login_id, since, wanted)
+                if len(summaries) < len(wanted):
+                    continue
+                results.append({
+                    "login": self._logins[login_id],
+                    "min_activity": round(min(s["activity"] for s in summaries.values()), 2),
+                    "repos": {self._repos[repo_id]: self._format(s) for repo_id, s in summaries.items()},
+                })
+            results.sort(key=lambda r: (-r["min_activity"], r["login"]))
+            return results[:limit]
+
+    def mentors(self, repo_key: str, since: Optional[str] = None, min_periods: int = 6,
+                limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        仓库中可以带新人的贡献者: 在该仓库有至少 min_periods 个周期的记录（资历），
+        且 since 之后（默认该仓库最近 12 个月）仍然活跃，按近期活跃度降序
+        """
+        with self._lock:
+            repo_id = self._repo_ids.get(repo_key)
+            if repo_id is None:
+                return []
+            members = self._members[repo_id]
+            history = {login_id: self._summaries(login_id, None, {repo_id}).get(repo_id) for login_id in members}
+            if since is None:
+                latest = max((s["last"] for s in history.values() if s), default=None)
+                if latest is None:
+                    return []
+                year, month = int(latest[:4]), int(period_start(latest)[5:7])
+                since = f"{year - 1}-{month:02d}"
+
+            results = []
+            for login_id, summary in history.items():
+                if summary is None or summary["periods"] < min_periods:
+                    continue
+                recent = self._summaries(login_id, since, {repo_id}).get(repo_id)
+                if recent is None or not recent["roles"] & ACTIVE:
+                    continue
+                results.append({
+                    "login": self._logins[login_id],
+                    "recent_activity": round(recent["activity"], 2),
+                    "tenure_periods": summary["periods"],
+                    "since": summary["first"],
+                    "other_repos": len({r for r in self._postings[login_id].repos if r != repo_id}),
+                })
+            results.sort(key=lambda r: (-r["recent_activity"], r["login"]))
+            return results[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "contributors": len(self._logins),
+                "repos": len(self._members),
+                "periods": len(self._periods),
+                "postings": sum(len(p) for p in self._postings),
+                "postings_bytes": sum(p.nbytes() for p in self._postings),
+            }
+
+@lru_cache()
+def get_contributor_index() -> ContributorIndex:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    return ContributorIndex()
@@ -0,0 +1,344 @@
+# backend/services/github_service.py
+"""
+GitHub 新手信号
+
+从 GitHub 获取 OpenDigger 没有的新手相关信号: good first issue / help wanted 数量、
+未关闭问题数及其常用标签、是否有 CONTRIBUTING 指南。
+
+- 配置了 github_token 时用 GraphQL 批量查询，一次调用覆盖多个仓库（用别名 r0, r1, ...）；
+  同一时间窗口内各请求线程提交的仓库会被合并进同一批
+- 没有 token 或 GraphQL 失败时回退到 REST，所有 REST 请求带 If-None-Match，
+  304 响应不消耗 GitHub 的主限额
+- 信号和 REST 响应（含 ETag）持久化在 data/ 下的 SQLite 文件中，重启后仍然有效
+- 触发 GitHub 限流时，在限额重置前返回上一次缓存的信号（即使已过期，标记 stale），不再请求上游
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import contextvars
+import json
+import threading
+import time
+
+from backend.config import get_settings
+from backend.services.shared_cache import SQLiteSharedCache
+from backend.services.upstream_scheduler import UpstreamThrottled, get_upstream_scheduler
+
+GOOD_FIRST_ISSUE_LABEL = "good first issue"
+HELP_WANTED_LABEL = "help wanted"
+TOP_LABELS = 10
+
+# 每个仓库在批量查询中的字段；$o{i}/$n{i} 为该仓库的 owner/name 变量
+REPO_FRAGMENT = """
+  r{i}: repository(owner: $o{i}, name: $n{i}) {{
+    goodFirstIssues: issues(states: OPEN, labels: ["good first issue"]) {{ totalCount }}
+    helpWanted: issues(states: OPEN, labels: ["help wanted"]) {{ totalCount }}
+    openIssues: issues(states: OPEN) {{ totalCount }}
+    contributingGuidelines {{ url }}
+    labels(first: 50) {{ nodes {{ name issues(states: OPEN) {{ totalCount }} }} }}
+  }}"""
+
+RepoKey = Tuple[str, str]
+
+class GitHubRateLimited(RuntimeError):
+    """GitHub 限额耗尽；reset_at 为预计恢复的时间戳"""
+
+    def __init__(self, message: str, reset_at: float):
+        super().__init__(message)
+        self.reset_at = reset_at
+
+def build_batch_query(repos: List[RepoKey]) -> Tuple[str, Dict[str, str]]:
+    """构建覆盖多个仓库的 GraphQL 查询，返回 (query, variables)"""
+    params = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(len(repos)))
+    fields = "".join(REPO_FRAGMENT.format(i=i) for i in range(len(repos)))
+    variables = {}
+    for i, (owner, repo) in enumerate(repos):
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = repo
+    return f"query({params}) {{{fields}\n}}", variables
+
+def _top_labels(counts: Dict[str, int]) -> List[Dict[str, Any]]:
+    ranked = sorted(((name, n) for name, n in counts.items() if n > 0), key=lambda item: (-item[1], item[0]))
+    return [{"name": name, "open_issues": n} for name, n in ranked[:TOP_LABELS]]
+
+def signals_from_graphql(node: Dict[str, Any]) -> Dict[str, Any]:
+    """把 GraphQL 中一个仓库的结果转换为信号"""
+    labels = {label["name"]: label["issues"]["totalCount"] for label in node["labels"]["nodes"]}
+    return {
+        "good_first_issues": node["goodFirstIssues"]["totalCount"],
+        "help_wanted_issues": node["helpWanted"]["totalCount"],
+        "open_issues": node["openIssues"]["totalCount"],
+        "top_labels": _top_labels(labels),
+        "has_contributing": node["contributingGuidelines"] is not None,
+        "source": "graphql",
+    }
+
+class GitHubService:
+    def __init__(self):
+        settings = get_settings()
+        self.api_base = settings.github_api_base.rstrip("/")
+        self.token = settings.github_token
+        self.timeout = settings.github_timeout
+        self.batch_size = settings.github_batch_size
+        self.batch_window = settings.github_batch_window
+        self.cache_ttl = settings.github_cache_ttl
+        self.headers = {
+            "User-Agent": "OpenCompass/1.0",
+            "Accept": "application/vnd.github+json",
+        }
+        if self.token:
+            self.headers["Authorization"] = f"Bearer {self.token}"
+
+        # 持久化缓存: 信号（按 TTL 过期）和 REST 响应（按 ETag 重新验证）
+        self.cache = SQLiteSharedCache(settings.github_cache_path) if settings.github_cache_path else None
+        self.scheduler = get_upstream_scheduler()
+
+        # 等待合并进下一次批量查询的仓库
+        self._pending: Dict[RepoKey, Future] = {}
+        self._queue: List[RepoKey] = []
+        self._flushing = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="github-fetch")
+        # 限流恢复前（time.time() 时间点）未命中缓存的仓库直接返回过期的缓存信号
+        self._rate_limited_until = 0.0
+        self.stats = {"graphql_calls": 0, "graphql_repos": 0, "rest_calls": 0, "not_modified": 0, "cache_hits": 0,
+                      "stale_served": 0, "rate_limited": 0}
+
+    @staticmethod
+    def _key(owner: str, repo: str) -> RepoKey:
+        # GitHub 仓库名不区分大小写
+        return owner.lower(), repo.lower()
+
+    def _signals_cache_key(self, key: RepoKey) -> str:
+        return f"github:signals:{key[0]}/{key[1]}"
+
+    def get_signals(self, owner: str, repo: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        获取仓库的新手信号；仓库不存在或 timeout 秒内未取回时返回 None
+        超时的查询继续在后台完成并写入缓存
+        """
+        try:
+            return self.request_signals(owner, repo).result(timeout)
+        except FutureTimeout:
+            return None
+        except Exception as e:
+            print(f"Error fetching GitHub signals for {owner}/{repo}: {e}")
+            return None
+
+    def request_signals(self, owner: str, repo: str) -> Future:
+        """
+        返回仓库信号的 Future: 已缓存时直接完成，否则把仓库加入下一次批量查询
+        （同一仓库的并发请求共享一个 Future）
+        """
+        key = self._key(owner, repo)
+        found, signals = self._cached_signals(key)
+        if not found and time.time() < self._rate_limited_until:
+            found, signals = self._stale_signals(key)
+        if found:
+            future = Future()
+            future.set_result(signals)
+            return future
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._pending[key] = Future()
+            self._queue.append(key)
+            if not self._flushing:
+                self._flushing = True
+                self._executor.submit(contextvars.copy_context().run, self._flush)
+        return future
+
+    def prefetch(self, repos: Iterable[Tuple[str, str]]) -> None:
+        """批量预取（如快照生成前），未缓存的仓库按 batch_size 合并查询"""
+        for owner, repo in repos:
+            self.request_signals(owner, repo)
+
+    def _cached_signals(self, key: RepoKey, max_age: Optional[float] = None) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """返回 (是否命中, 信号)；命中但仓库不存在时信号为 None；max_age 默认为 cache_ttl"""
+        if self.cache is None:
+            return False, None
+        try:
+            found = self.cache.get(self._signals_cache_key(key), max_age or self.cache_ttl)
+        except Exception as e:
+            print(f"GitHub cache unavailable: {e}")
+            return False, None
+        if found is None:
+            return False, None
+        self.stats["cache_hits"] += 1
+        signals = json.loads(found[0])
+        return True, signals if signals.get("found", True) else None
+
+    def _stale_signals(self, key: RepoKey) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """限流时使用的上一次信号，不论是否过期"""
+        found, signals = self._cached_signals(key, max_age=float("inf"))
+        if found:
+            self.stats["stale_served"] += 1
+            if signals is not None:
+                signals = {**signals, "stale": True}
+        return found, signals
+
+    def _store_signals(self, key: RepoKey, signals: Optional[Dict[str, Any]]) -> None:
+        if self.cache is None:
+            return
+        value = signals if signals is not None else {"found": False}
+        try:
+            # 不设过期时间: 读取时按 cache_ttl 判断是否新鲜，过期的记录在限流时仍可使用
+            self.cache.set(self._signals_cache_key(key), json.dumps(value).encode("utf-8"))
+        except Exception as e:
+            print(f"Failed to cache GitHub signals for {key[0]}/{key[1]}: {e}")
+
+    def _flush(self) -> None:
+        """等待一个合并窗口后按 batch_size 分批查询队列中的仓库"""
+        time.sleep(self.batch_window)
+        while True:
+            with self._lock:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                if not batch:
+                    self._flushing = False
+                    return
+
+            try:
+                results = self._fetch_batch(batch)
+                error = None
+            except Exception as e:
+                results, error = {}, e
+
+            for key in batch:
+                with self._lock:
+                    future = self._pending.pop(key)
+                if key in results:
+                    signals = results[key]
+                    self._store_signals(key, signals)
+                    future.set_result(signals)
+                    continue
+                # 限流或出错时未取回: 有缓存（即使已过期）则返回缓存
+                found, signals = self._stale_signals(key)
+                if found:
+                    future.set_result(signals)
+                else:
+                    future.set_exception(error or RuntimeError("GitHub rate limit exceeded"))
+
+    def _fetch_batch(self, batch: List[RepoKey]) -> Dict[RepoKey, Optional[Dict[str, Any]]]:
+        """查询一批仓库；限流时停止并返回已取回的部分"""
+        results: Dict[RepoKey, Optional[Dict[str, Any]]] = {}
+        if self.token:
+            try:
+                results = self._fetch_graphql(batch)
+            except Exception as e:
+                print(f"GitHub GraphQL batch failed, falling back to REST: {e}")
+        for key in batch:
+            if key in results:
+                continue
+            try:
+                results[key] = self._fetch_rest(*key)
+            except GitHubRateLimited as e:
+                self._note_rate_limit(e.reset_at)
+                break
+            except UpstreamThrottled:
+                self._note_rate_limit(time.time() + self.timeout)
+                break
+        return results
+
+    def _note_rate_limit(self, reset_at: float) -> None:
+        self.stats["rate_limited"] += 1
+        self._rate_limited_until = max(self._rate_limited_until, reset_at)
+        print(f"GitHub rate limit hit, serving cached signals for {max(reset_at - time.time(), 0):.0f}s")
+
+    def _fetch_graphql(self, batch: List[RepoKey]) -> Dict[RepoKey, Optional[Dict[str, Any]]]:
+        """一次 GraphQL 调用查询整批仓库；不存在的仓库结果为 None"""
+        query, variables = build_batch_query(batch)
+        response = self.scheduler.request(
+            "POST", f"{self.api_base}/graphql", max_wait=self.timeout,
+            json={"query": query, "variables": variables}, headers=self.headers, timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"GraphQL request failed: {response.status_code}")
+        payload = response.json()
+        data = payload.get("data")
+        if data is None:
+            raise RuntimeError(f"GraphQL errors: {payload.get('errors')}")
+        # 不存在的仓库对应的别名为 null 并附带 NOT_FOUND 错误，其余错误（如限流）整批重试 REST
+        for error in payload.get("errors") or []:
+            if error.get("type") != "NOT_FOUND":
+                raise RuntimeError(f"GraphQL error: {error.get('message')}")
+
+        self.stats["graphql_calls"] += 1
+        self.stats["graphql_repos"] += len(batch)
+        return {
+            key: signals_from_graphql(data[f"r{i}"]) if data.get(f"r{i}") is not None else None
+            for i, key in enumerate(batch)
+        }
+
+    def _rest_get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """带 ETag 条件请求的 REST GET；404 返回 None"""
+        url = f"{self.api_base}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        cache_key = f"github:rest:{url}"
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+
+        headers = dict(self.headers)
+        if cached is not None and cached[1]:
+            headers["If-None-Match"] = cached[1]
+        response = self.scheduler.request("GET", url, max_wait=self.timeout, headers=headers, timeout=self.timeout)
+        self.stats["rest_calls"] += 1
+
+        if response.status_code == 304 and cached is not None:
+            self.stats["not_modified"] += 1
+            return json.loads(cached[0])
+        if response.status_code == 404:
+            return None
+        if response.status_code in (403, 429) and (
+                response.status_code == 429 or response.headers.get("X-RateLimit-Remaining") == "0"):
+            reset = response.headers.get("X-RateLimit-Reset", "")
+            retry_after = response.headers.get("Retry-After", "")
+            reset_at = float(reset) if reset.isdigit() else \
+                time.time() + (float(retry_after) if retry_after.isdigit() else 60)
+            raise GitHubRateLimited(f"GitHub REST {path} rate limited", reset_at)
+        if response.status_code != 200:
+            raise RuntimeError(f"GitHub REST {path} failed: {response.status_code}")
+
+        etag = response.headers.get("ETag")
+        if etag and self.cache is not None:
+            self.cache.set(cache_key, response.content, etag)
+        return response.json()
+
+    def _fetch_rest(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """用 REST 接口收集信号（每页最多 100 条，超过时计数按 100 截断）"""
+        base = f"/repos/{quote(owner, safe='')}/{quote(repo, safe='')}"
+        info = self._rest_get(base)
+        if info is None:
+            return None
+
+        def open_issues(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+            items = self._rest_get(f"{base}/issues", {"state": "open", "per_page": 100, **params}) or []
+            # issues 接口同时返回 PR
+            return [item for item in items if "pull_request" not in item]
+
+        sample = open_issues({})
+        labels: Dict[str, int] = {}
+        for issue in sample:
+            for label in issue.get("labels", []):
+                labels[label["name"]] = labels.get(label["name"], 0) + 1
+        profile = self._rest_get(f"{base}/community/profile") or {}
+
+        return {
+            "good_first_issues": len(open_issues({"labels": GOOD_FIRST_ISSUE_LABEL})),
+            "help_wanted_issues": len(open_issues({"labels": HELP_WANTED_LABEL})),
+            # open_issues_count 包含 PR，这里只统计第一页中的问题
+            "open_issues": len(sample),
+            "top_labels": _top_labels(labels),
+            "has_contributing": (profile.get("files") or {}).get("contributing") is not None,
+            "source": "rest",
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+@lru_cache()
+def get_github_service() -> GitHubService:
+    """全局实例，首次使用时创建"""
+    return GitHubService()
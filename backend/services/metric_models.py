@@ -0,0 +1,337 @@
+# backend/services/metric_models.py
+"""
+OpenDigger 指标的类型化模型
+
+每个指标在拉取后只解析、校验一次，分析器直接使用解析结果，不再逐值做类型判断。
+周期键分为四类: 年 "2021"、季度 "2021Q1"、月 "2021-01"、原始月 "2021-10-raw"。
+形状不符合预期的指标抛出 MetricShapeError，而不是被静默当作 0 处理。
+
+月份键有序存放，按时间范围切片用二分查找；按季度/年重采样时，范围完整覆盖的周期
+直接使用 OpenDigger 预先计算好的季度/年数值，其余由月度数据聚合得到。
+贡献者名单类指标的预计算数值只是各月列表的拼接（同一登录名重复出现），总是由月度数据聚合。
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+GRANULARITIES = ("month", "quarter", "year")
+
+# 可按月相加得到季度/年数值的指标；其余数值指标（如 bus_factor、contributors）取均值
+ADDITIVE_METRICS = {
+    "activity", "change_requests", "change_requests_accepted", "change_requests_reviews",
+    "code_change_lines_add", "code_change_lines_remove", "code_change_lines_sum",
+    "issues_closed", "issues_new", "new_contributors", "technical_fork",
+}
+
+class MetricShapeError(ValueError):
+    """指标数据形状与模型不符"""
+
+def _period_kind(key: str) -> str:
+    """判断周期键的类型"""
+    size = len(key)
+    if size == 7 and key[4] == "-":
+        return "month"
+    if size == 4:
+        return "year"
+    if size == 6 and key[4] == "Q":
+        return "quarter"
+    if key.endswith("-raw"):
+        return "raw"
+    raise MetricShapeError(f"unexpected period key {key!r}")
+
+def normalize_bound(value: Optional[str], is_end: bool) -> Optional[str]:
+    """把 "2021" 或 "2021-03" 形式的范围边界统一为月份键"""
+    if value is None:
+        return None
+    if len(value) == 4 and value.isdigit():
+        return f"{value}-12" if is_end else f"{value}-01"
+    if len(value) == 7 and value[4] == "-" and value[:4].isdigit() and value[5:].isdigit() \
+            and 1 <= int(value[5:]) <= 12:
+        return value
+    raise ValueError(f"invalid period {value!r}, expected YYYY or YYYY-MM")
+
+def bucket_of(month: str, granularity: str) -> str:
+    """月份所属的季度/年键"""
+    if granularity == "year":
+        return month[:4]
+    if granularity == "quarter":
+        return f"{month[:4]}Q{(int(month[5:7]) - 1) // 3 + 1}"
+    return month
+
+def bucket_months(bucket: str) -> Tuple[str, str]:
+    """季度/年键覆盖的首尾月份"""
+    if len(bucket) == 4:
+        return f"{bucket}-01", f"{bucket}-12"
+    first = (int(bucket[5]) - 1) * 3 + 1
+    return f"{bucket[:4]}-{first:02d}", f"{bucket[:4]}-{first + 2:02d}"
+
+class PeriodModel(ABC):
+    """按周期组织的指标基类，维护年/季度/月的有序索引；子类实现取值校验和重采样聚合"""
+    __slots__ = ("values", "year_keys", "quarter_keys", "month_keys")
+    # 重采样时能否直接使用上游预计算的季度/年数值
+    use_precomputed = True
+
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+        years, quarters, months = [], [], []
+        for key in values:
+            kind = _period_kind(key)
+            if kind == "month":
+                months.append(key)
+            elif kind == "year":
+                years.append(key)
+            elif kind == "quarter":
+                quarters.append(key)
+        years.sort()
+        quarters.sort()
+        months.sort()
+        self.year_keys: List[str] = years
+        self.quarter_keys: List[str] = quarters
+        self.month_keys: List[str] = months
+
+    @classmethod
+    def parse(cls, data: Any) -> "PeriodModel":
+        if not isinstance(data, dict):
+            raise MetricShapeError(f"expected object keyed by period, got {type(data).__name__}")
+        for key, value in data.items():
+            cls._check_value(key, value)
+        return cls(data)
+
+    @staticmethod
+    @abstractmethod
+    def _check_value(key: str, value: Any) -> None:
+        """校验一个周期的取值，不符合时抛出 MetricShapeError"""
+
+    def latest_month(self) -> Optional[str]:
+        return self.month_keys[-1] if self.month_keys else None
+
+    def latest_year(self) -> Optional[str]:
+        return self.year_keys[-1] if self.year_keys else None
+
+    def month_span(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """[start, end] 月份范围在 month_keys 中的下标区间 [i, j)，边界为 None 表示不限"""
+        i = bisect_left(self.month_keys, start) if start else 0
+        j = bisect_right(self.month_keys, end) if end else len(self.month_keys)
+        return i, max(i, j)
+
+    def months_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        i, j = self.month_span(start, end)
+        return self.month_keys[i:j]
+
+    @abstractmethod
+    def _aggregate(self, values: List[Any]) -> Any:
+        """把同一季度/年内各月的取值聚合为一个"""
+
+    def resample(self, start: Optional[str] = None, end: Optional[str] = None,
+                 granularity: str = "month") -> Dict[str, Any]:
+        """按时间范围切片并重采样为 month/quarter/year 粒度，返回 周期 -> 数值"""
+        months = self.months_between(start, end)
+        if granularity == "month":
+            return {month: self.values[month] for month in months}
+
+        buckets: Dict[str, List[Any]] = {}
+        for month in months:
+            buckets.setdefault(bucket_of(month, granularity), []).append(self.values[month])
+
+        result = {}
+        for bucket, values in buckets.items():
+            first, last = bucket_months(bucket)
+            covered = (start is None or start <= first) and (end is None or last <= end)
+            if covered and self.use_precomputed and bucket in self.values:
+                result[bucket] = self.values[bucket]
+            else:
+                result[bucket] = self._aggregate(values)
+        return result
+
+class PeriodSeries(PeriodModel):
+    """周期 -> 数值，如 activity、bus_factor、issues_new"""
+    __slots__ = ("month_values", "additive")
+
+    def __init__(self, values: Dict[str, float]):
+        super().__init__(values)
+        self.month_values: List[float] = [values[key] for key in self.month_keys]
+        self.additive = False
+
+    def _aggregate(self, values: List[float]) -> float:
+        if self.additive:
+            return round(sum(values), 2)
+        return round(sum(values) / len(values), 2)
+
+    @staticmethod
+    def _check_value(key: str, value: Any) -> None:
+        if type(value) is not int and type(value) is not float:
+            raise MetricShapeError(f"period {key!r}: expected number, got {type(value).__name__}")
+
+    def recent_months(self, count: int) -> List[Tuple[str, float]]:
+        """最近 count 个月的 (月份, 数值)，按时间倒序"""
+        start = max(len(self.month_keys) - count, 0)
+        return list(zip(reversed(self.month_keys[start:]), reversed(self.month_values[start:])))
+
+    def latest_month_value(self) -> Optional[float]:
+        return self.month_values[-1] if self.month_values else None
+
+    def window(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Tuple[str, float]]:
+        """[start, end] 范围内的 (月份, 数值)，按时间倒序"""
+        i, j = self.month_span(start, end)
+        return list(zip(reversed(self.month_keys[i:j]), reversed(self.month_values[i:j])))
+
+    def latest_in(self, start: Optional[str] = None, end: Optional[str] = None) -> Optional[float]:
+        """[start, end] 范围内最近一个月的数值"""
+        i, j = self.month_span(start, end)
+        return self.month_values[j - 1] if j > i else None
+
+class NameListSeries(PeriodModel):
+    """周期 -> 贡献者登录名列表，如 contributors_detail"""
+    __slots__ = ()
+    use_precomputed = False
+
+    @staticmethod
+    def _check_value(key: str, value: Any) -> None:
+        if type(value) is not list or not all(type(name) is str for name in value):
+            raise MetricShapeError(f"period {key!r}: expected list of names")
+
+    def distinct_names(self, start: Optional[str] = None, end: Optional[str] = None) -> set:
+        names = set()
+        for key in self.months_between(start, end):
+            names.update(self.values[key])
+        return names
+
+    def _aggregate(self, values: List[List[str]]) -> List[str]:
+        # 保持首次出现的顺序去重
+        return list(dict.fromkeys(name for names in values for name in names))
+
+class ScoredNameSeries(PeriodModel):
+    """周期 -> [[登录名, 活跃度], ...]，如 activity_details"""
+    __slots__ = ()
+    use_precomputed = False
+
+    @staticmethod
+    def _check_value(key: str, value: Any) -> None:
+        if type(value) is not list:
+            raise MetricShapeError(f"period {key!r}: expected list of [name, score] pairs")
+        for pair in value:
+            if (type(pair) is not list or len(pair) != 2 or type(pair[0]) is not str
+                    or (type(pair[1]) is not int and type(pair[1]) is not float)):
+                raise MetricShapeError(f"period {key!r}: expected [name, score] pair, got {pair!r}")
+
+    def _aggregate(self, values: List[list]) -> list:
+        # 同一贡献者在各周期的活跃度相加，按合计降序
+        return [[name, round(score, 2)] for name, score in self._top(
+            (pair for pairs in values for pair in pairs), None
+        )]
+
+    def top(self, period: str, count: int) -> List[Tuple[str, float]]:
+        """某周期内按活跃度合计排名前 count 的贡献者"""
+        return self._top(self.values.get(period, ()), count)
+
+    def top_between(self, start: Optional[str], end: Optional[str], count: int) -> List[Tuple[str, float]]:
+        """[start, end] 月份范围内按活跃度合计排名前 count 的贡献者"""
+        return self._top((pair for month in self.months_between(start, end) for pair in self.values[month]), count)
+
+    @staticmethod
+    def _top(pairs, count: Optional[int]) -> List[Tuple[str, float]]:
+        totals: Dict[str, float] = {}
+        for name, score in pairs:
+            totals[name] = totals.get(name, 0) + score
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+class HourlyActivitySeries(PeriodModel):
+    """周期 -> 一周 7x24 小时的活跃计数，如 active_dates_and_times"""
+    __slots__ = ()
+
+    @staticmethod
+    def _check_value(key: str, value: Any) -> None:
+        if type(value) is not list or len(value) != 168 or not all(type(v) is int for v in value):
+            raise MetricShapeError(f"period {key!r}: expected 168 hourly counts")
+
+    def _aggregate(self, values: List[List[int]]) -> List[int]:
+        return [sum(hour) for hour in zip(*values)]
+
+class DistributionSeries:
+    """{avg, levels, quantile_0..4} 形式的分布指标，如 issue_response_time"""
+    __slots__ = ("avg", "levels", "quantiles")
+
+    def __init__(self, avg: PeriodSeries, levels: Dict[str, List[int]], quantiles: Dict[str, PeriodSeries]):
+        self.avg = avg
+        self.levels = levels
+        self.quantiles = quantiles
+
+    @classmethod
+    def parse(cls, data: Any) -> "DistributionSeries":
+        if not isinstance(data, dict) or "avg" not in data:
+            raise MetricShapeError("expected distribution object with 'avg'")
+
+        quantiles = {}
+        levels: Dict[str, List[int]] = {}
+        for name, series in data.items():
+            if name == "avg":
+                continue
+            if name == "levels":
+                if not isinstance(series, dict):
+                    raise MetricShapeError("'levels' must be keyed by period")
+                for key, value in series.items():
+                    _LevelSeries._check_value(key, value)
+                levels = series
+            elif name.startswith("quantile_"):
+                quantiles[name] = PeriodSeries.parse(series)
+            else:
+                raise MetricShapeError(f"unexpected distribution field {name!r}")
+        return cls(PeriodSeries.parse(data["avg"]), levels, quantiles)
+
+    def resample(self, start: Optional[str] = None, end: Optional[str] = None,
+                 granularity: str = "month") -> Dict[str, Any]:
+        """对 avg、quantile_* 和 levels 分别切片重采样；levels 按档位相加"""
+        result = {"avg": self.avg.resample(start, end, granularity)}
+        if self.levels:
+            result["levels"] = _LevelSeries(self.levels).resample(start, end, granularity)
+        for name, series in self.quantiles.items():
+            result[name] = series.resample(start, end, granularity)
+        return result
+
+class _LevelSeries(PeriodModel):
+    """分布指标中的 levels 部分（在 DistributionSeries.parse 中校验）"""
+    __slots__ = ()
+
+    @staticmethod
+    def _check_value(key: str, value: Any) -> None:
+        if type(value) is not list or not all(type(v) is int for v in value):
+            raise MetricShapeError(f"levels {key!r}: expected list of counts")
+
+    def _aggregate(self, values: List[List[int]]) -> List[int]:
+        return [sum(level) for level in zip(*values)]
+
+DISTRIBUTION_METRICS = (
+    "change_request_age", "change_request_resolution_duration", "change_request_response_time",
+    "issue_age", "issue_resolution_duration", "issue_response_time",
+)
+
+METRIC_MODELS = {
+    "activity_details": ScoredNameSeries,
+    "contributors_detail": NameListSeries,
+    "new_contributors_detail": NameListSeries,
+    "active_dates_and_times": HourlyActivitySeries,
+}
+METRIC_MODELS.update({name: DistributionSeries for name in DISTRIBUTION_METRICS})
+
+def parse_metric(metric: str, data: Any):
+    """按指标名称解析原始数据，未登记的指标视为 周期 -> 数值"""
+    model = METRIC_MODELS.get(metric, PeriodSeries).parse(data)
+    if isinstance(model, PeriodSeries):
+        model.additive = metric in ADDITIVE_METRICS
+    return model
+
+def parse_metrics(raw_metrics: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    解析一组原始指标
+    返回 (解析成功的模型, 解析失败的指标及原因)；值为 None 的指标直接跳过
+    """
+    parsed: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for metric, data in raw_metrics.items():
+        if data is None:
+            continue
+        try:
+            parsed[metric] = parse_metric(metric, data)
+        except MetricShapeError as e:
+            errors[metric] = str(e)
+    return parsed, errors
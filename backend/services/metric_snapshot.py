@@ -0,0 +1,311 @@
+# backend/services/metric_snapshot.py
+"""
+指标的二进制快照格式（mmap 只读访问）
+
+activity_details、active_dates_and_times、各类分布指标等体积较大，解析成 Python 对象树后
+每个缓存的仓库都要占用大量内存。这里把单个指标编码为定长数值列 + 字符串表的二进制文件，
+读取时 mmap 打开，类型化模型的 values 只是文件上的只读视图，按周期访问时才解码对应的切片；
+多个 worker 进程映射同一个文件时共享操作系统页缓存。
+
+文件布局（小端序，各数组按 8 字节对齐）:
+    文件头     magic, 格式版本, 表数量, 写入时间, 字符串数量, 字符串区长度, 指标名 id, 数据版本 id
+    字符串表   u32 偏移量[字符串数量+1] + UTF-8 字符串区（周期键、贡献者登录名等均去重存放）
+    表目录     每张表: 名称 id, 类型, 周期数, 元素总数, 数据偏移
+    表数据     u32 周期键 id[周期数] + 按类型的数值列:
+               NUMBER  f64 数值[周期数]
+               NAMES   u32 偏移[周期数+1], u32 登录名 id[总数]
+               SCORED  u32 偏移[周期数+1], u32 登录名 id[总数], f64 分数[总数]
+               COUNTS  u32 偏移[周期数+1], u32 计数[总数]
+普通指标只有一张表；分布指标的 avg、levels、quantile_* 各为一张表。
+"""
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import weakref
+
+from backend.services.metric_models import (
+    ADDITIVE_METRICS, METRIC_MODELS, DistributionSeries, HourlyActivitySeries,
+    NameListSeries, PeriodSeries, ScoredNameSeries
+)
+
+# 使用二进制快照缓存的指标（体积大、解析成对象树后占内存多）
+MAPPED_METRICS = frozenset(METRIC_MODELS)
+
+MAGIC = b"OCMS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHdIIII")
+TABLE = struct.Struct("<IIIIQ")
+NO_STRING = 0xFFFFFFFF
+
+KIND_NUMBER, KIND_NAMES, KIND_SCORED, KIND_COUNTS = range(4)
+
+# Python 3.13 之前 mmap 会复制并一直持有文件描述符，同时映射的文件数超过此上限后
+# 改为把文件读入内存（仍是紧凑的列式数据，只是不再与其他进程共享页缓存）
+MAX_MAPPED_FILES = 512
+_KEEPS_FD = sys.version_info < (3, 13)
+_mapped_files = 0
+_mapped_lock = threading.Lock()
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+def _number(value: float):
+    # 数值统一存为 f64；上游 JSON 由 JS 生成，整数不会写成 x.0，解码时还原为 int
+    return int(value) if value.is_integer() else value
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+        return string_id
+
+    def encode(self) -> Tuple[bytes, bytes]:
+        offsets = array("I", [0])
+        blob = bytearray()
+        for value in self.ids:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return offsets.tobytes(), bytes(blob)
+
+def _tables_for(metric: str, data: Dict[str, Any]) -> List[Tuple[str, int, Dict[str, Any]]]:
+    """按指标模型确定要写入的表: (表名, 类型, 周期 -> 值)"""
+    model = METRIC_MODELS.get(metric, PeriodSeries)
+    if model is DistributionSeries:
+        return [
+            (name, KIND_COUNTS if name == "levels" else KIND_NUMBER, series)
+            for name, series in data.items()
+        ]
+    if model is ScoredNameSeries:
+        return [("", KIND_SCORED, data)]
+    if model is NameListSeries:
+        return [("", KIND_NAMES, data)]
+    if model is HourlyActivitySeries:
+        return [("", KIND_COUNTS, data)]
+    return [("", KIND_NUMBER, data)]
+
+def _encode_table(kind: int, series: Dict[str, Any], strings: _StringTable) -> Tuple[int, List[array]]:
+    """返回 (元素总数, 依次写入的数组)"""
+    keys = array("I", (strings.intern(key) for key in series))
+    if kind == KIND_NUMBER:
+        return len(series), [keys, array("d", series.values())]
+
+    offsets = array("I", [0])
+    if kind == KIND_SCORED:
+        ids, scores = array("I"), array("d")
+        for pairs in series.values():
+            for name, score in pairs:
+                ids.append(strings.intern(name))
+                scores.append(score)
+            offsets.append(len(ids))
+        return len(ids), [keys, offsets, ids, scores]
+    if kind == KIND_NAMES:
+        ids = array("I")
+        for names in series.values():
+            ids.extend(strings.intern(name) for name in names)
+            offsets.append(len(ids))
+        return len(ids), [keys, offsets, ids]
+
+    counts = array("I")
+    for values in series.values():
+        counts.extend(values)
+        offsets.append(len(counts))
+    return len(counts), [keys, offsets, counts]
+
+def encode_metric_snapshot(metric: str, data: Dict[str, Any], version: Optional[str] = None,
+                           stored_at: Optional[float] = None) -> bytes:
+    """把已通过形状校验的指标数据编码为二进制快照"""
+    strings = _StringTable()
+    metric_id = strings.intern(metric)
+    version_id = strings.intern(version) if version is not None else NO_STRING
+
+    tables = []
+    for name, kind, series in _tables_for(metric, data):
+        total, arrays = _encode_table(kind, series, strings)
+        tables.append((strings.intern(name), kind, len(series), total, arrays))
+
+    string_offsets, blob = strings.encode()
+    header_size = HEADER.size + len(string_offsets)
+    blob_start = header_size
+    directory_start = _align(blob_start + len(blob))
+    body_start = _align(directory_start + TABLE.size * len(tables))
+    position = body_start
+
+    directory = bytearray()
+    body = bytearray()
+    for name_id, kind, count, total, arrays in tables:
+        directory += TABLE.pack(name_id, kind, count, total, position)
+        for values in arrays:
+            chunk = values.tobytes()
+            padded = _align(len(chunk))
+            body += chunk + b"\0" * (padded - len(chunk))
+            position += padded
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(tables), stored_at or time.time(),
+                         len(strings.ids), len(blob), metric_id, version_id)
+    return b"".join([
+        header, string_offsets, blob, b"\0" * (directory_start - blob_start - len(blob)),
+        bytes(directory), b"\0" * (body_start - directory_start - len(directory)), bytes(body)
+    ])
+
+def write_metric_snapshot(path: str, metric: str, data: Dict[str, Any],
+                          version: Optional[str] = None) -> None:
+    """原子地写入快照文件（先写临时文件再替换，已映射旧文件的读者不受影响）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_metric_snapshot(metric, data, version))
+    os.replace(tmp_path, path)
+
+def _release_mapping() -> None:
+    global _mapped_files
+    with _mapped_lock:
+        _mapped_files -= 1
+
+def _map_file(f):
+    global _mapped_files
+    if not _KEEPS_FD:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, trackfd=False)
+    with _mapped_lock:
+        if _mapped_files >= MAX_MAPPED_FILES:
+            return f.read()
+        _mapped_files += 1
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        _release_mapping()
+        raise
+    weakref.finalize(mapped, _release_mapping)
+    return mapped
+
+class MappedTable:
+    """快照中的一张表，按周期下标解码值"""
+    __slots__ = ("snapshot", "kind", "keys", "_values", "_offsets", "_ids", "_scores", "_counts")
+
+    def __init__(self, snapshot: "MetricSnapshot", kind: int, count: int, total: int, offset: int):
+        view = snapshot.view
+        self.snapshot = snapshot
+        self.kind = kind
+
+        end = offset + 4 * count
+        # 周期键在所有仓库间取值范围很小，驻留后所有快照共享同一批字符串对象
+        self.keys: Tuple[str, ...] = tuple(sys.intern(snapshot.string(i)) for i in view[offset:end].cast("I"))
+        offset = _align(end)
+        self._values = self._offsets = self._ids = self._scores = self._counts = None
+        if kind == KIND_NUMBER:
+            self._values = view[offset:offset + 8 * count].cast("d")
+            return
+
+        end = offset + 4 * (count + 1)
+        self._offsets = view[offset:end].cast("I")
+        offset = _align(end)
+        if kind in (KIND_NAMES, KIND_SCORED):
+            end = offset + 4 * total
+            self._ids = view[offset:end].cast("I")
+            offset = _align(end)
+        if kind == KIND_SCORED:
+            self._scores = view[offset:offset + 8 * total].cast("d")
+        elif kind == KIND_COUNTS:
+            self._counts = view[offset:offset + 4 * total].cast("I")
+
+    def value(self, index: int) -> Any:
+        if self.kind == KIND_NUMBER:
+            return _number(self._values[index])
+
+        start, end = self._offsets[index], self._offsets[index + 1]
+        if self.kind == KIND_COUNTS:
+            return self._counts[start:end].tolist()
+        string = self.snapshot.string
+        if self.kind == KIND_NAMES:
+            return [string(i) for i in self._ids[start:end].tolist()]
+        return [[string(i), _number(score)]
+                for i, score in zip(self._ids[start:end].tolist(), self._scores[start:end].tolist())]
+
+@lru_cache(maxsize=4096)
+def _key_index(keys: Tuple[str, ...]) -> Dict[str, int]:
+    """周期键 -> 下标；相同周期序列（同一指标的各个分表、历史长度相同的仓库）共享同一个索引"""
+    return {key: i for i, key in enumerate(keys)}
+
+class MappedValues(Mapping):
+    """周期 -> 值 的只读映射，值在访问时才从快照中解码"""
+    __slots__ = ("table", "_index")
+
+    def __init__(self, table: MappedTable):
+        self.table = table
+        self._index = _key_index(table.keys)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.table.value(self._index[key])
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.keys)
+
+    def __len__(self) -> int:
+        return len(self.table.keys)
+
+class MetricSnapshot:
+    """mmap 打开的单个指标快照"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.view = memoryview(_map_file(f))
+
+        magic, format_version, table_count, self.stored_at, string_count, blob_len, metric_id, version_id = \
+            HEADER.unpack_from(self.view)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a metric snapshot (format {format_version})")
+
+        offsets_end = HEADER.size + 4 * (string_count + 1)
+        self._string_offsets = self.view[HEADER.size:offsets_end].cast("I")
+        self._blob_start = offsets_end
+        self.metric = self.string(metric_id)
+        self.version = self.string(version_id) if version_id != NO_STRING else None
+
+        directory_start = _align(offsets_end + blob_len)
+        self.tables: Dict[str, MappedTable] = {}
+        for i in range(table_count):
+            name_id, kind, count, total, offset = TABLE.unpack_from(self.view, directory_start + i * TABLE.size)
+            self.tables[self.string(name_id)] = MappedTable(self, kind, count, total, offset)
+        self._model = None
+
+    def string(self, string_id: int) -> str:
+        start = self._blob_start + self._string_offsets[string_id]
+        end = self._blob_start + self._string_offsets[string_id + 1]
+        return str(self.view[start:end], "utf-8")
+
+    def model(self):
+        """构建以快照为数据源的类型化模型（只构建一次）"""
+        if self._model is None:
+            model_class = METRIC_MODELS.get(self.metric, PeriodSeries)
+            if model_class is DistributionSeries:
+                tables = self.tables
+                self._model = DistributionSeries(
+                    PeriodSeries(MappedValues(tables["avg"])),
+                    MappedValues(tables["levels"]) if "levels" in tables else {},
+                    {name: PeriodSeries(MappedValues(table))
+                     for name, table in tables.items() if name.startswith("quantile_")}
+                )
+            else:
+                self._model = model_class(MappedValues(self.tables[""]))
+                if isinstance(self._model, PeriodSeries):
+                    self._model.additive = self.metric in ADDITIVE_METRICS
+        return self._model
+
+    def to_raw(self) -> Dict[str, Any]:
+        """还原为与上游 JSON 相同结构的字典（完整返回原始数据时使用）"""
+        if "" in self.tables:
+            return dict(MappedValues(self.tables[""]))
+        return {name: dict(MappedValues(table)) for name, table in self.tables.items()}
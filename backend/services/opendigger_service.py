@@ -1,85 +1,457 @@
 # backend/services/opendigger_service.py
-import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import Future, wait
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+import asyncio
 import json
 import os
+import threading
+import time
+
+from backend.config import get_settings
+from backend.services.metric_models import MetricShapeError, parse_metric
+from backend.services.metric_snapshot import MAPPED_METRICS, MetricSnapshot, write_metric_snapshot
+from backend.services.request_profiler import stage
+from backend.services.shared_cache import get_shared_cache
+from backend.services.upstream_scheduler import PriorityExecutor, current_priority, get_upstream_scheduler
+
+# 所有可用的指标
+METRIC_NAMES = [
+    "activity", "activity_details",
+    "bus_factor",
+    "change_request_age",
+    "change_request_resolution_duration",
+    "change_request_response_time",
+    "change_requests",
+    "change_requests_accepted",
+    "change_requests_reviews",
+    "code_change_lines_add",
+    "code_change_lines_remove",
+    "code_change_lines_sum",
+    "contributors",
+    "contributors_detail",
+    "inactive_contributors",
+    "issue_age",
+    "issue_resolution_duration",
+    "issue_response_time",
+    "issues_closed",
+    "issues_new",
+    "new_contributors",
+    "new_contributors_detail",
+    "technical_fork",
+    "active_dates_and_times"
+]
+
+class CachedMetric:
+    """
+    缓存中的一条指标: 原始数据、拉取时解析好的类型化模型及上游数据版本（ETag/Last-Modified）
+    大体积指标以 mmap 二进制快照为数据源，此时不保留 raw，需要时由 snapshot 还原；
+    fallback 表示上游不可用时读取的本地样例数据，不写快照
+    """
+    __slots__ = ("stored_at", "raw", "model", "error", "version", "snapshot", "fallback")
+
+    def __init__(self, raw: Optional[Dict], model: Any, error: Optional[str], version: Optional[str] = None,
+                 snapshot: Optional[MetricSnapshot] = None, fallback: bool = False):
+        self.stored_at = snapshot.stored_at if snapshot is not None else time.time()
+        self.raw = raw
+        self.model = model
+        self.error = error
+        self.version = version
+        self.snapshot = snapshot
+        self.fallback = fallback
+
+    def raw_data(self) -> Dict:
+        return self.raw if self.raw is not None else self.snapshot.to_raw()
 
 class OpenDiggerService:
     def __init__(self):
+        settings = get_settings()
         # 根据文档，使用正确的基础URL
-        self.base_url = "https://oss.open-digger.cn"
+        self.base_url = settings.opendigger_base_url
         self.headers = {
             "User-Agent": "OpenCompass/1.0",
             "Accept": "application/json"
         }
         # 用于本地测试的本地文件路径（如果需要）
-        self.local_data_path = "opendigger-api"
-    
+        self.local_data_path = settings.opendigger_local_data_path
+        self.timeout = settings.opendigger_timeout
+
+        # 指标缓存: url -> CachedMetric
+        # 超过截止时间仍在拉取的指标会在完成后写入缓存，供下一次请求使用
+        self.cache_ttl = settings.metrics_cache_ttl
+        self._cache: Dict[str, CachedMetric] = {}
+        self._cache_lock = threading.Lock()
+        # 跨进程共享缓存（多 worker 部署时启用），进程内缓存未命中时先查这里
+        self.shared_cache = get_shared_cache()
+        # 大体积指标的二进制快照目录，为空时全部以 Python 对象缓存
+        self.metric_snapshot_dir = settings.metric_snapshot_dir
+        # 所有上游请求经调度器限速、按优先级排队
+        self.scheduler = get_upstream_scheduler()
+        # 拉取线程按上游优先级取任务: 批量任务和预热排满线程池时，实时请求的指标仍然先执行
+        self._executor = PriorityExecutor(
+            max_workers=settings.fetch_max_workers,
+            thread_name_prefix="opendigger-fetch"
+        )
+        # 正在拉取的指标: url -> Future；同一 url 的并发请求共享一次拉取和解析
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._fetch_counts = {"started": 0, "collapsed": 0}
+
     def get_repo_base_url(self, owner: str, repo: str, platform: str = "github") -> str:
         """构建仓库基础URL"""
         return f"{self.base_url}/{platform}/{owner}/{repo}"
-    
+
+    def get_metric_url(self, owner: str, repo: str, metric: str, platform: str = "github") -> str:
+        """构建指标文件URL"""
+        return f"{self.get_repo_base_url(owner, repo, platform)}/{metric}.json"
+
     def get_specific_metric(self, owner: str, repo: str, metric: str, platform: str = "github") -> Optional[Dict]:
-        """获取特定指标数据"""
-        # 首先尝试从网络获取
-        base_url = self.get_repo_base_url(owner, repo, platform)
-        url = f"{base_url}/{metric}.json"
-        
+        """获取特定指标数据（优先读取缓存）"""
+        entry = self._get_cached(self.get_metric_url(owner, repo, metric, platform))
+        if entry is None:
+            entry = self._metric_future(owner, repo, metric, platform).result()
+        return entry.raw_data() if entry is not None else None
+
+    async def get_specific_metric_async(self, owner: str, repo: str, metric: str,
+                                        platform: str = "github") -> Optional[Dict]:
+        """get_specific_metric 的协程版本，等待拉取时不占用线程"""
+        entry = self._get_cached(self.get_metric_url(owner, repo, metric, platform))
+        if entry is None:
+            entry = await asyncio.wrap_future(self._metric_future(owner, repo, metric, platform))
+        return entry.raw_data() if entry is not None else None
+
+    def _metric_future(self, owner: str, repo: str, metric: str, platform: str) -> Future:
+        """
+        返回加载某个指标的 Future: 已有同一 url 的拉取在进行时直接复用（计入 collapsed），
+        否则提交到线程池（携带调用方的上下文，即上游请求优先级）
+        """
+        url = self.get_metric_url(owner, repo, metric, platform)
+        with self._inflight_lock:
+            future = self._inflight.get(url)
+            if future is not None:
+                self._fetch_counts["collapsed"] += 1
+                # 合并进仍在排队的低优先级拉取时，按当前请求的优先级执行
+                self._executor.promote(future, current_priority())
+                return future
+            # 上一次拉取可能刚刚完成并写入缓存
+            cached = self._get_cached(url)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._executor.submit(self._load_metric, owner, repo, metric, platform)
+            self._inflight[url] = future
+            self._fetch_counts["started"] += 1
+        future.add_done_callback(lambda done: self._finish_inflight(url, done))
+        return future
+
+    def _finish_inflight(self, url: str, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(url) is future:
+                del self._inflight[url]
+
+    def fetch_stats(self) -> Dict[str, Any]:
+        """已发起的指标加载数、因合并进进行中的加载而省去的次数、当前进行中的数量，以及各通道排队中的数量"""
+        with self._inflight_lock:
+            stats = {**self._fetch_counts, "in_flight": len(self._inflight)}
+        stats["queued"] = self._executor.queued()
+        return stats
+
+    def _load_metric(self, owner: str, repo: str, metric: str, platform: str) -> Optional[CachedMetric]:
+        """读取缓存，未命中时拉取并解析一次后写入缓存"""
+        with stage("load_metric", metric):
+            return self._load_metric_uncached(owner, repo, metric, platform)
+
+    def _load_metric_uncached(self, owner: str, repo: str, metric: str, platform: str) -> Optional[CachedMetric]:
+        url = self.get_metric_url(owner, repo, metric, platform)
+
+        cached = self._get_cached(url)
+        if cached is not None:
+            return cached
+
+        snapshot_path = self._snapshot_path(owner, repo, metric, platform)
+        entry = self._open_snapshot(snapshot_path)
+        if entry is not None:
+            self._set_cached(url, entry)
+            return entry
+
+        if self.shared_cache is not None:
+            data, version = self._fetch_shared(url, metric)
+        else:
+            data, version = self._fetch_metric(url, metric)
+        fallback = data is None
+        if fallback:
+            # 上游失败时回退到本地文件（开发测试用）；本地数据只留在进程内缓存，不写入共享缓存和快照
+            data, version = self._read_local(metric), None
+            if data is None:
+                return None
+
+        try:
+            with stage("parse_metric", metric):
+                model = parse_metric(metric, data)
+        except MetricShapeError as e:
+            print(f"Invalid shape for {url}: {e}")
+            entry = CachedMetric(data, None, str(e), version, fallback=fallback)
+        else:
+            entry = None
+            if not fallback:
+                with stage("write_snapshot", metric):
+                    entry = self._write_snapshot(snapshot_path, metric, data, version)
+            entry = entry or CachedMetric(data, model, None, version, fallback=fallback)
+        self._set_cached(url, entry)
+        return entry
+
+    def _snapshot_path(self, owner: str, repo: str, metric: str, platform: str) -> Optional[str]:
+        """大体积指标的二进制快照路径；未启用或名称不安全时返回 None"""
+        if not self.metric_snapshot_dir or metric not in MAPPED_METRICS:
+            return None
+        if any(not part or part in (".", "..") or os.sep in part for part in (platform, owner, repo)):
+            return None
+        return os.path.join(self.metric_snapshot_dir, platform, owner, repo, f"{metric}.bin")
+
+    def _open_snapshot(self, path: Optional[str]) -> Optional[CachedMetric]:
+        """打开有效期内的二进制快照（例如重启前或其他 worker 写入的）"""
+        if path is None or not os.path.exists(path):
+            return None
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            with stage("open_snapshot", os.path.basename(path)):
+                snapshot = MetricSnapshot(path)
+        except Exception as e:
+            print(f"Ignoring unreadable metric snapshot {path}: {e}")
+            return None
+        if time.time() - snapshot.stored_at > self.cache_ttl:
+            return None
+        return CachedMetric(None, snapshot.model(), None, snapshot.version, snapshot)
+
+    def _write_snapshot(self, path: Optional[str], metric: str, data: Dict,
+                        version: Optional[str]) -> Optional[CachedMetric]:
+        """把已校验的指标写为二进制快照并以 mmap 打开；失败时返回 None，改用 Python 对象缓存"""
+        if path is None:
+            return None
+        try:
+            write_metric_snapshot(path, metric, data, version)
+            snapshot = MetricSnapshot(path)
+        except Exception as e:
+            print(f"Failed to write metric snapshot {path}: {e}")
+            return None
+        return CachedMetric(None, snapshot.model(), None, version, snapshot)
+
+    def _fetch_metric(self, url: str, metric: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """从上游拉取指标，返回 (数据, 上游数据版本)；失败时返回 (None, None)"""
+        try:
+            with stage("upstream_request", metric):
+                response = self.scheduler.request("GET", url, headers=self.headers, timeout=self.timeout)
             if response.status_code == 200:
-                return response.json()
+                version = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                with stage("json_decode", metric):
+                    return response.json(), version
             else:
                 print(f"Failed to fetch {url}: {response.status_code}")
         except Exception as e:
             print(f"Error fetching {url}: {e}")
-        
-        # 如果网络获取失败，尝试从本地文件获取（开发测试用）
+        return None, None
+
+    def _read_local(self, metric: str) -> Optional[Dict]:
+        """读取本地样例数据（所有仓库相同，仅在上游不可用时使用）"""
+        local_file = os.path.join(self.local_data_path, f"{metric}.json")
         try:
-            local_file = os.path.join(self.local_data_path, f"{metric}.json")
             if os.path.exists(local_file):
-                with open(local_file, 'r', encoding='utf-8') as f:
+                with open(local_file, 'r', encoding='utf-8') as f, stage("json_decode", metric):
                     return json.load(f)
         except Exception as e:
             print(f"Error reading local file {local_file}: {e}")
-        
         return None
-    
-    def get_all_metrics(self, owner: str, repo: str, platform: str = "github") -> Dict[str, Any]:
-        """获取所有可用指标数据"""
-        metrics = {}
-        
-        # 所有可用的指标
-        metric_names = [
-            "activity", "activity_details",
-            "bus_factor",
-            "change_request_age",
-            "change_request_resolution_duration",
-            "change_request_response_time",
-            "change_requests",
-            "change_requests_accepted",
-            "change_requests_reviews",
-            "code_change_lines_add",
-            "code_change_lines_remove",
-            "code_change_lines_sum",
-            "contributors",
-            "contributors_detail",
-            "inactive_contributors",
-            "issue_age",
-            "issue_resolution_duration",
-            "issue_response_time",
-            "issues_closed",
-            "issues_new",
-            "new_contributors",
-            "new_contributors_detail",
-            "technical_fork",
-            "active_dates_and_times"
+
+    def _fetch_shared(self, url: str, metric: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        经共享缓存拉取指标: 其他 worker 已拉取过时直接复用；
+        同一时间只有一个 worker 请求上游，其余 worker 等待其结果。只有上游数据会写入共享缓存
+        """
+        try:
+            with self.shared_cache.single_flight(url, ttl=self.timeout * 2, max_age=self.cache_ttl) as found:
+                if found is not None:
+                    value, version = found
+                    with stage("json_decode", metric):
+                        return json.loads(value), version
+                data, version = self._fetch_metric(url, metric)
+                if data is not None:
+                    self.shared_cache.set(
+                        url, json.dumps(data, separators=(",", ":")).encode("utf-8"), version, ttl=self.cache_ttl
+                    )
+                return data, version
+        except Exception as e:
+            print(f"Shared cache unavailable for {url}: {e}")
+        return self._fetch_metric(url, metric)
+
+    def _get_cached(self, url: str) -> Optional[CachedMetric]:
+        with self._cache_lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None
+            if time.time() - entry.stored_at > self.cache_ttl:
+                del self._cache[url]
+                return None
+            return entry
+
+    def _set_cached(self, url: str, entry: CachedMetric) -> None:
+        with self._cache_lock:
+            self._cache[url] = entry
+
+    def cached_version(self, owner: str, repo: str, metric: str, platform: str = "github") -> Optional[str]:
+        """缓存中某个指标的上游数据版本"""
+        entry = self._get_cached(self.get_metric_url(owner, repo, metric, platform))
+        return entry.version if entry is not None else None
+
+    def cached_repos(self) -> Set[Tuple[str, str, str]]:
+        """缓存中有数据的仓库 (platform, owner, repo)"""
+        prefix = self.base_url + "/"
+        repos = set()
+        with self._cache_lock:
+            urls = list(self._cache)
+        for url in urls:
+            if url.startswith(prefix):
+                parts = url[len(prefix):].split("/")
+                if len(parts) == 4:
+                    repos.add((parts[0], parts[1], parts[2]))
+        return repos
+
+    def snapshot_repos(self) -> Set[Tuple[str, str, str]]:
+        """二进制快照目录中有数据的仓库 (platform, owner, repo)"""
+        repos = set()
+        if not self.metric_snapshot_dir or not os.path.isdir(self.metric_snapshot_dir):
+            return repos
+        for platform in os.listdir(self.metric_snapshot_dir):
+            platform_dir = os.path.join(self.metric_snapshot_dir, platform)
+            if not os.path.isdir(platform_dir):
+                continue
+            for owner in os.listdir(platform_dir):
+                owner_dir = os.path.join(platform_dir, owner)
+                if os.path.isdir(owner_dir):
+                    repos.update((platform, owner, repo) for repo in os.listdir(owner_dir))
+        return repos
+
+    def peek_metrics(self, owner: str, repo: str, metric_names: Iterable[str],
+                     platform: str = "github") -> Dict[str, CachedMetric]:
+        """
+        只从进程内缓存和二进制快照读取指标，不请求上游；没有数据或校验失败的指标不出现在结果中。
+        快照只为调用方打开，不放入进程内缓存（用于遍历全部快照的后台索引，避免缓存随快照数量增长）
+        """
+        entries = {}
+        for metric in metric_names:
+            entry = self._get_cached(self.get_metric_url(owner, repo, metric, platform))
+            if entry is None:
+                entry = self._open_snapshot(self._snapshot_path(owner, repo, metric, platform))
+            if entry is not None and entry.error is None:
+                entries[metric] = entry
+        return entries
+
+    def fallback_metrics(self, owner: str, repo: str, metric_names: Iterable[str],
+                         platform: str = "github") -> List[str]:
+        """进程内缓存中来自本地样例数据（而非上游）的指标"""
+        return [
+            metric for metric in metric_names
+            if getattr(self._get_cached(self.get_metric_url(owner, repo, metric, platform)), "fallback", False)
         ]
-        
+
+    def invalidate_repo(self, owner: str, repo: str, platform: str = "github") -> int:
+        """删除某个仓库的全部缓存指标，返回删除的条数"""
+        prefix = self.get_repo_base_url(owner, repo, platform) + "/"
+        with self._cache_lock:
+            urls = [url for url in self._cache if url.startswith(prefix)]
+            for url in urls:
+                del self._cache[url]
+        for metric in MAPPED_METRICS:
+            path = self._snapshot_path(owner, repo, metric, platform)
+            if path is not None and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Failed to remove metric snapshot {path}: {e}")
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.delete_prefix(prefix)
+            except Exception as e:
+                print(f"Failed to invalidate shared cache for {prefix}: {e}")
+        return len(urls)
+
+    def _collect(self, owner: str, repo: str, metric_names: List[str], platform: str,
+                 deadline: Optional[float]) -> Dict[str, Optional[CachedMetric]]:
+        """
+        并发获取一组指标的缓存条目
+
+        deadline 为 time.monotonic() 时间点；到期时只返回已完成的指标，
+        未完成的拉取任务继续在后台运行，完成后写入缓存。
+        """
+        entries: Dict[str, Optional[CachedMetric]] = {}
+        pending = {}
+
         for metric in metric_names:
-            metrics[metric] = self.get_specific_metric(owner, repo, metric, platform)
-        
+            cached = self._get_cached(self.get_metric_url(owner, repo, metric, platform))
+            if cached is not None:
+                entries[metric] = cached
+            else:
+                pending[self._metric_future(owner, repo, metric, platform)] = metric
+
+        if pending:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            with stage("wait_metrics", f"{len(pending)} pending"):
+                done, _ = wait(pending, timeout=timeout)
+            for future in done:
+                try:
+                    entries[pending[future]] = future.result()
+                except Exception as e:
+                    print(f"Error fetching metric {pending[future]}: {e}")
+                    entries[pending[future]] = None
+
+        return entries
+
+    def get_metrics(self, owner: str, repo: str, metric_names: Iterable[str],
+                    platform: str = "github",
+                    deadline: Optional[float] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """并发获取一组原始指标，返回 (指标数据, 截止时间内未取回的指标)"""
+        metric_names = list(metric_names)
+        entries = self._collect(owner, repo, metric_names, platform, deadline)
+        metrics = {metric: entry.raw_data() if entry is not None else None for metric, entry in entries.items()}
+        missing = [metric for metric in metric_names if metric not in entries]
+        return metrics, missing
+
+    def get_typed_metrics(self, owner: str, repo: str, metric_names: Iterable[str],
+                          platform: str = "github",
+                          deadline: Optional[float] = None) -> Tuple[Dict[str, Any], List[str], Dict[str, str]]:
+        """
+        并发获取一组类型化指标模型
+        返回 (指标模型, 截止时间内未取回的指标, 形状校验失败的指标及原因)；不存在的指标不出现在结果中
+        """
+        metric_names = list(metric_names)
+        entries = self._collect(owner, repo, metric_names, platform, deadline)
+        models = {}
+        invalid = {}
+        for metric, entry in entries.items():
+            if entry is None:
+                continue
+            if entry.error is not None:
+                invalid[metric] = entry.error
+            else:
+                models[metric] = entry.model
+        missing = [metric for metric in metric_names if metric not in entries]
+        return models, missing, invalid
+
+    def close(self) -> None:
+        """停止后台拉取线程"""
+        self._executor.shutdown(wait=False)
+
+    def get_all_metrics(self, owner: str, repo: str, platform: str = "github") -> Dict[str, Any]:
+        """获取所有可用指标数据"""
+        metrics, _ = self.get_metrics(owner, repo, METRIC_NAMES, platform)
         return metrics
 
-# 创建全局实例
-opendigger_service = OpenDiggerService()
\ No newline at end of file
+@lru_cache()
+def get_opendigger_service() -> OpenDiggerService:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    return OpenDiggerService()
+
+def __getattr__(name: str):
+    # 兼容 from backend.services.opendigger_service import opendigger_service
+    if name == "opendigger_service":
+        return get_opendigger_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,19 +1,251 @@
 # backend/services/project_analyzer.py
-from backend.services.opendigger_service import opendigger_service
-from typing import Dict, Any, List
+from backend.services.opendigger_service import OpenDiggerService, get_opendigger_service
+from backend.services.metric_models import DistributionSeries, NameListSeries, PeriodSeries, ScoredNameSeries
+from backend.services.github_service import GitHubService, get_github_service
+from backend.services.request_profiler import stage
+from backend.services.scoring_engine import ScoringEngine, extract_features, get_scoring_engine
+from backend.services.shared_cache import SharedCache, get_shared_cache
+from backend.services.similarity_index import SimilarityIndex, get_similarity_index
+from backend.services.trend_engine import TREND_METRICS, TrendEngine, get_trend_engine
+from backend.config import get_settings
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set, Tuple
 import json
+import time
+
+# 各分析模块中每个字段依赖的指标
+FIELD_METRICS = {
+    "activity": {
+        "score": ["activity"],
+        "trend": ["activity"],
+        "recent_months": ["activity"],
+        "series": ["activity"],
+    },
+    "community": {
+        "total_contributors": ["contributors_detail", "contributors"],
+        "active_contributors": ["contributors"],
+        "bus_factor": ["bus_factor"],
+        "key_contributors": ["activity_details"],
+        "technical_forks": ["technical_fork"],
+    },
+    "issues": {
+        "new_issues": ["issues_new"],
+        "closed_issues": ["issues_closed"],
+        "resolution_efficiency": ["issues_new", "issues_closed"],
+        "avg_response_time": ["issue_response_time"],
+    },
+    "code_quality": {
+        "pr_acceptance_rate": ["change_requests", "change_requests_accepted"],
+        "code_changes": ["code_change_lines_sum"],
+        "activity_level": ["code_change_lines_sum"],
+    },
+    "trends": {metric: [metric] for metric in TREND_METRICS},
+    # 来自 GitHub 而非 OpenDigger（见 github_service.py），不依赖指标
+    "newcomer": {
+        "good_first_issues": [],
+        "help_wanted_issues": [],
+        "open_issues": [],
+        "top_labels": [],
+        "has_contributing": [],
+    },
+}
+
+# 新手友好度分数用到的字段
+SCORE_FIELDS = {
+    "activity": {"score"},
+    "community": {"total_contributors", "bus_factor"},
+    "issues": {"resolution_efficiency"},
+    "code_quality": {"pr_acceptance_rate"},
+    "newcomer": {"good_first_issues", "has_contributing"},
+}
+
+# 各分析模块依赖的指标
+SECTION_METRICS = {
+    section: sorted({metric for names in fields.values() for metric in names})
+    for section, fields in FIELD_METRICS.items()
+}
+SECTION_METRICS["newbie_friendly_score"] = sorted(
+    {metric for section, fields in SCORE_FIELDS.items() for field in fields
+     for metric in FIELD_METRICS[section][field]}
+)
+
+# 无需计算、总是可以投影的字段
+STATIC_FIELDS = ("basic_info", "window")
+# 投影时总是保留的元信息字段
+REPORT_META_FIELDS = ("partial", "missing_metrics", "invalid_metrics", "fallback_metrics", "incomplete_sections")
+
+def parse_fields(value: Optional[str]) -> Optional[Dict[str, Optional[Set[str]]]]:
+    """
+    解析 fields 投影参数，如 "activity.score,community.bus_factor,newbie_friendly_score"
+    返回 模块 -> 字段集合（None 表示整个模块）；value 为空时返回 None 表示不投影
+    """
+    if not value:
+        return None
+
+    spec: Dict[str, Optional[Set[str]]] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        section, _, field = item.partition(".")
+        if section in FIELD_METRICS:
+            if field and field not in FIELD_METRICS[section]:
+                raise ValueError(f"unknown field {item!r}")
+        elif section in STATIC_FIELDS or section == "newbie_friendly_score":
+            if field:
+                raise ValueError(f"field {section!r} has no sub-fields")
+        else:
+            raise ValueError(f"unknown field {item!r}")
+
+        if not field or spec.get(section, set()) is None:
+            spec[section] = None
+        else:
+            spec.setdefault(section, set()).add(field)
+    return spec or None
+
+def project_report(report: Dict[str, Any], fields: Dict[str, Optional[Set[str]]]) -> Dict[str, Any]:
+    """按投影规格裁剪分析报告"""
+    projected = {}
+    for section, names in fields.items():
+        if section not in report:
+            continue
+        value = report[section]
+        if names is None or not isinstance(value, dict):
+            projected[section] = value
+        else:
+            projected[section] = {name: value[name] for name in names if name in value}
+    for name in REPORT_META_FIELDS:
+        if name in report:
+            projected[name] = report[name]
+    return projected
 
 class ProjectAnalyzer:
-    def __init__(self):
-        self.opendigger = opendigger_service
-    
-    def analyze_project(self, owner: str, repo: str, platform: str = "github") -> Dict[str, Any]:
+    def __init__(self, opendigger: Optional[OpenDiggerService] = None,
+                 trend_engine: Optional[TrendEngine] = None,
+                 shared_cache: Optional[SharedCache] = None,
+                 github: Optional[GitHubService] = None,
+                 scoring: Optional[ScoringEngine] = None,
+                 similarity: Optional[SimilarityIndex] = None):
+        self.opendigger = opendigger or get_opendigger_service()
+        self.trend_engine = trend_engine or get_trend_engine()
+        # 评分引擎定义了 __len__，为空时也为假，不能用 or 取默认值
+        self.scoring = scoring if scoring is not None else get_scoring_engine()
+        self.similarity = similarity if similarity is not None else get_similarity_index()
+        settings = get_settings()
+        # GitHub 新手信号，为 None 时不获取
+        enrichment = settings.github_enrichment
+        if enrichment is None:
+            enrichment = bool(settings.github_token)
+        self.github = github or (get_github_service() if enrichment else None)
+        self.github_timeout = settings.github_enrichment_timeout
+        # 完整报告（默认时间窗口）在多个 worker 之间共享
+        self.shared_cache = shared_cache or get_shared_cache()
+
+    @staticmethod
+    def _report_key(owner: str, repo: str, platform: str) -> str:
+        return f"report:{platform}/{owner}/{repo}"
+
+    def invalidate_report(self, owner: str, repo: str, platform: str = "github") -> None:
+        """删除共享缓存中某个仓库的报告"""
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._report_key(owner, repo, platform))
+
+    @staticmethod
+    def _computed_fields(fields: Optional[Dict[str, Optional[Set[str]]]]) -> Dict[str, Optional[Set[str]]]:
+        """投影规格展开为需要计算的 模块 -> 字段（新手友好度分数依赖 SCORE_FIELDS）"""
+        if fields is None:
+            return {section: None for section in FIELD_METRICS}
+
+        computed: Dict[str, Optional[Set[str]]] = {
+            section: (None if names is None else set(names))
+            for section, names in fields.items() if section in FIELD_METRICS
+        }
+        if "newbie_friendly_score" in fields:
+            for section, names in SCORE_FIELDS.items():
+                if section not in computed:
+                    computed[section] = set(names)
+                elif computed[section] is not None:
+                    computed[section] |= names
+        return computed
+
+    @staticmethod
+    def required_metrics(computed: Dict[str, Optional[Set[str]]]) -> List[str]:
+        """计算给定字段所需拉取的指标"""
+        metrics = set()
+        for section, names in computed.items():
+            for field, field_metrics in FIELD_METRICS[section].items():
+                if names is None or field in names:
+                    metrics.update(field_metrics)
+        return sorted(metrics)
+
+    def analyze_project(self, owner: str, repo: str, platform: str = "github",
+                        deadline: Optional[float] = None, start: Optional[str] = None,
+                        end: Optional[str] = None, granularity: str = "month",
+                        fields: Optional[Dict[str, Optional[Set[str]]]] = None) -> Dict[str, Any]:
         """
         使用OpenDigger数据综合分析项目各项指标
+
+        deadline 为 time.monotonic() 时间点。到期未取回的指标记录在 missing_metrics 中，
+        依赖它们的模块记录在 incomplete_sections 中，并标记 partial 为 True。
+        形状不符合预期的指标记录在 invalid_metrics 中，不参与计算。
+        上游不可用、改用本地样例数据的指标记录在 fallback_metrics 中，这样的报告不写入共享缓存和索引。
+        start/end 为 "YYYY-MM" 月份键，限定分析的时间窗口（未指定时活跃度取最近12个月，
+        其他模块取最近一个月）；granularity 决定活跃度 series 的粒度。
+        fields 为 parse_fields 返回的投影规格，只拉取、计算并返回其中的字段。
         """
-        # 获取关键指标数据
-        metrics = self.opendigger.get_all_metrics(owner, repo, platform)
-        
+        with stage("analyze_project", f"{platform}/{owner}/{repo}"):
+            return self._analyze_project(owner, repo, platform, deadline, start, end, granularity, fields)
+
+    def _analyze_project(self, owner: str, repo: str, platform: str, deadline: Optional[float],
+                         start: Optional[str], end: Optional[str], granularity: str,
+                         fields: Optional[Dict[str, Optional[Set[str]]]]) -> Dict[str, Any]:
+        shareable = self.shared_cache is not None and start is None and end is None and granularity == "month"
+        if shareable:
+            report = self._get_shared_report(owner, repo, platform)
+            if report is not None:
+                self._index_report(owner, repo, platform, report)
+                return project_report(report, fields) if fields is not None else report
+
+        computed = self._computed_fields(fields)
+
+        # GitHub 新手信号与 OpenDigger 指标同时获取
+        newcomer_future = None
+        if "newcomer" in computed and self.github is not None and platform == "github":
+            newcomer_future = self.github.request_signals(owner, repo)
+
+        # 获取所需指标数据（拉取时已解析为类型化模型）
+        with stage("fetch_metrics"):
+            required = self.required_metrics(computed)
+            metrics, missing, invalid = self.opendigger.get_typed_metrics(
+                owner, repo, required, platform, deadline=deadline
+            )
+            fallback = self.opendigger.fallback_metrics(owner, repo, required, platform)
+        with stage("newcomer_signals"):
+            newcomer, newcomer_ready = self._collect_newcomer(newcomer_future, computed.get("newcomer"), deadline)
+
+        # 趋势分析（活跃度模块的 trend 字段也来自这里）
+        trend_names = []
+        if "trends" in computed:
+            trend_names = list(TREND_METRICS) if computed["trends"] is None else sorted(computed["trends"])
+        if "activity" in computed and "activity" not in trend_names:
+            trend_names.append("activity")
+        with stage("analyze_trends"):
+            trends = self.trend_engine.analyze(
+                f"{platform}/{owner}/{repo}", metrics, start, end, trend_names
+            )
+
+        with stage("analyze_activity"):
+            activity = self._analyze_activity(
+                metrics, start, end, granularity, trends.get("activity")
+            ) if "activity" in computed else {}
+        with stage("analyze_community"):
+            community = self._analyze_community(metrics, start, end) if "community" in computed else {}
+        with stage("analyze_issues"):
+            issues = self._analyze_issues(metrics, start, end) if "issues" in computed else {}
+        with stage("analyze_code_quality"):
+            code_quality = self._analyze_code_quality(metrics, start, end) if "code_quality" in computed else {}
+
         # 整合数据
         project_metrics = {
             "basic_info": {
@@ -22,239 +254,269 @@ class ProjectAnalyzer:
                 "name": repo,
                 "platform": platform
             },
-            "activity": self._analyze_activity(metrics),
-            "community": self._analyze_community(metrics),
-            "issues": self._analyze_issues(metrics),
-            "code_quality": self._analyze_code_quality(metrics),
-            "newbie_friendly_score": self._calculate_newbie_friendly_score(metrics)
+            "window": {"from": start, "to": end, "granularity": granularity},
+            "activity": activity,
+            "community": community,
+            "issues": issues,
+            "code_quality": code_quality,
+            "trends": {name: trends[name] for name in trends if "trends" in computed},
+            "newcomer": newcomer,
+            "newbie_friendly_score": self._calculate_newbie_friendly_score(
+                activity, community, issues, code_quality, newcomer
+            ),
+            "partial": bool(missing) or not newcomer_ready,
+            "missing_metrics": missing,
+            "invalid_metrics": invalid,
+            "fallback_metrics": fallback,
+            "incomplete_sections": [
+                section for section, names in SECTION_METRICS.items()
+                if (fields is None or section in fields) and any(name in missing for name in names)
+            ]
         }
-        
+        if not newcomer_ready:
+            project_metrics["incomplete_sections"].append("newcomer")
+        complete = not project_metrics["partial"] and not fallback
+        if start is None and end is None and fields is None and complete:
+            # 缓存默认时间窗口下完整报告的特征，调整评分方案后可直接重新打分，同时写入相似项目索引；
+            # 投影报告中未计算的字段为 0，不能用于覆盖已缓存的特征
+            self._index_report(owner, repo, platform, project_metrics)
+
+        if fields is not None:
+            return project_report(project_metrics, fields)
+        if shareable and complete:
+            self._set_shared_report(owner, repo, platform, project_metrics)
         return project_metrics
-    
-    def _analyze_activity(self, metrics: Dict) -> Dict:
-        """分析活跃度数据"""
-        activity_data = metrics.get("activity", {})
-        if not activity_data:
-            return {"score": 0, "trend": "unknown", "recent_months": []}
-        
+
+    def _index_report(self, owner: str, repo: str, platform: str, report: Dict[str, Any]) -> None:
+        """完整报告的特征写入评分引擎和相似项目索引"""
+        key = f"{platform}/{owner}/{repo}"
+        self.scoring.record(key, extract_features(report))
+        self.similarity.add(key, report)
+
+    def _get_shared_report(self, owner: str, repo: str, platform: str) -> Optional[Dict[str, Any]]:
         try:
-            # 获取最近12个月的数据
-            sorted_months = sorted(activity_data.keys(), reverse=True)[:12]
-            recent_data = [{"month": month, "value": activity_data[month]} for month in sorted_months]
-            
-            # 计算平均活跃度
-            recent_values = [item["value"] for item in recent_data]
-            avg_score = sum(recent_values) / len(recent_values) if recent_values else 0
-            
-            # 判断趋势（最近3个月）
-            trend = "stable"
-            if len(recent_values) >= 3:
-                recent_3 = recent_values[:3]
-                older_3 = recent_values[3:6] if len(recent_values) >= 6 else []
-                if older_3:
-                    recent_avg = sum(recent_3) / len(recent_3)
-                    older_avg = sum(older_3) / len(older_3)
-                    if recent_avg > older_avg * 1.1:  # 增长超过10%
-                        trend = "increasing"
-                    elif recent_avg < older_avg * 0.9:  # 下降超过10%
-                        trend = "decreasing"
-            
-            return {
-                "score": round(avg_score, 2),
-                "trend": trend,
-                "recent_months": recent_data[:6]  # 返回最近6个月数据
-            }
+            found = self.shared_cache.get(self._report_key(owner, repo, platform), self.opendigger.cache_ttl)
         except Exception as e:
-            print(f"Error analyzing activity: {e}")
+            print(f"Shared cache unavailable for report {platform}/{owner}/{repo}: {e}")
+            return None
+        if found is None:
+            return None
+        with stage("json_decode", "shared report"):
+            return json.loads(found[0])
+
+    def _set_shared_report(self, owner: str, repo: str, platform: str, report: Dict[str, Any]) -> None:
+        try:
+            self.shared_cache.set(
+                self._report_key(owner, repo, platform),
+                json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                ttl=self.opendigger.cache_ttl
+            )
+        except Exception as e:
+            print(f"Failed to store report {platform}/{owner}/{repo} in shared cache: {e}")
+
+    def _collect_newcomer(self, future: Optional[Future], names: Optional[Set[str]],
+                          deadline: Optional[float]) -> Tuple[Dict[str, Any], bool]:
+        """
+        等待 GitHub 新手信号，返回 (新手模块, 是否完整)
+        最多等待 github_timeout 秒（且不超过 deadline），超时或出错时模块为空并标记为不完整；
+        仓库不在 GitHub 上或不存在时模块为空但视为完整
+        """
+        if future is None:
+            return {}, True
+        timeout = self.github_timeout
+        if deadline is not None:
+            timeout = max(min(timeout, deadline - time.monotonic()), 0)
+        try:
+            signals = future.result(timeout)
+        except FutureTimeout:
+            return {}, False
+        except Exception as e:
+            print(f"Error fetching GitHub signals: {e}")
+            return {}, False
+        if signals is None:
+            return {}, True
+        return {name: value for name, value in signals.items() if names is None or name in names}, True
+
+    def _analyze_activity(self, metrics: Dict, start: Optional[str] = None,
+                          end: Optional[str] = None, granularity: str = "month",
+                          trend_summary: Optional[Dict] = None) -> Dict:
+        """分析活跃度数据"""
+        activity: Optional[PeriodSeries] = metrics.get("activity")
+        if activity is None:
             return {"score": 0, "trend": "unknown", "recent_months": []}
-    
-    def _analyze_community(self, metrics: Dict) -> Dict:
+
+        # 获取时间窗口内（默认最近12个月）的数据（按时间倒序）
+        if start is None and end is None:
+            recent = activity.recent_months(12)
+        else:
+            recent = activity.window(start, end)
+        if not recent:
+            return {"score": 0, "trend": "unknown", "recent_months": []}
+        recent_data = [{"month": month, "value": value} for month, value in recent]
+
+        # 计算平均活跃度
+        recent_values = [value for _, value in recent]
+        avg_score = sum(recent_values) / len(recent_values)
+
+        # 趋势由趋势引擎给出（优先同比，数据不足时用最近3个月环比）
+        trend = trend_summary["trend"] if trend_summary else "stable"
+
+        result = {
+            "score": round(avg_score, 2),
+            "trend": trend,
+            "recent_months": recent_data[:6]  # 返回最近6个月数据
+        }
+        if start is not None or end is not None or granularity != "month":
+            window_start = start or recent[-1][0]
+            result["series"] = activity.resample(window_start, end, granularity)
+        return result
+
+    def _analyze_community(self, metrics: Dict, start: Optional[str] = None,
+                           end: Optional[str] = None) -> Dict:
         """分析社区数据"""
-        contributors_data = metrics.get("contributors", {})
-        bus_factor_data = metrics.get("bus_factor", {})
-        
+        contributors: Optional[PeriodSeries] = metrics.get("contributors")
+        contributors_detail: Optional[NameListSeries] = metrics.get("contributors_detail")
+        bus_factor: Optional[PeriodSeries] = metrics.get("bus_factor")
+        activity_details: Optional[ScoredNameSeries] = metrics.get("activity_details")
+        technical_fork: Optional[PeriodSeries] = metrics.get("technical_fork")
+
         result = {
             "total_contributors": 0,
             "active_contributors": 0,
             "bus_factor": 0,
-            "key_contributors": []
+            "key_contributors": [],
+            "technical_forks": 0
         }
-        
-        try:
-            # 分析贡献者数据
-            if contributors_data and isinstance(contributors_data, dict):
-                result["total_contributors"] = len(contributors_data)
-                
-                # 计算活跃贡献者（贡献次数大于平均值的贡献者）
-                # 过滤出数值类型的值
-                contributions = [v for v in contributors_data.values() if isinstance(v, (int, float))]
-                if contributions:
-                    avg_contributions = sum(contributions) / len(contributions)
-                    # 确保比较的是数值类型
-                    active_contributors = [name for name, count in contributors_data.items() 
-                                        if isinstance(count, (int, float)) and count > avg_contributions]
-                    result["active_contributors"] = len(active_contributors)
-                    
-                    # 获取关键贡献者（前5名）
-                    # 确保只处理数值类型的贡献次数
-                    numeric_contributors = {name: count for name, count in contributors_data.items() 
-                                        if isinstance(count, (int, float))}
-                    sorted_contributors = sorted(numeric_contributors.items(), 
-                                            key=lambda x: x[1], reverse=True)[:5]
-                    result["key_contributors"] = [
-                        {"name": name, "contributions": count} 
-                        for name, count in sorted_contributors
-                    ]
-            
-            # 分析Bus Factor
-            if bus_factor_data:
-                if isinstance(bus_factor_data, dict):
-                    result["bus_factor"] = bus_factor_data.get("bus_factor", 
-                                                            bus_factor_data.get("value", 0))
-                elif isinstance(bus_factor_data, (int, float)):
-                    result["bus_factor"] = bus_factor_data
-                    
-        except Exception as e:
-            print(f"Error analyzing community: {e}")
-        
+
+        # 时间窗口内（默认全部历史）出现过的贡献者总数
+        if contributors_detail is not None:
+            result["total_contributors"] = len(contributors_detail.distinct_names(start, end))
+
+        # 窗口内最近一个月的活跃贡献者数
+        if contributors is not None:
+            active = contributors.latest_in(start, end)
+            if active is not None:
+                result["active_contributors"] = active
+                if not result["total_contributors"]:
+                    result["total_contributors"] = max(value for _, value in contributors.window(start, end))
+
+        # Bus Factor 按周期给出，取窗口内最近一个月
+        if bus_factor is not None:
+            result["bus_factor"] = bus_factor.latest_in(start, end) or 0
+
+        # 关键贡献者（窗口内活跃度前5名；未指定窗口时取最近一年）
+        if activity_details is not None:
+            if start is None and end is None:
+                top = activity_details.top(activity_details.latest_year(), 5) if activity_details.year_keys else []
+            else:
+                top = activity_details.top_between(start, end, 5)
+            result["key_contributors"] = [
+                {"name": name, "contributions": round(score, 2)} for name, score in top
+            ]
+
+        # 窗口内（默认最近12个月）的技术分叉数
+        if technical_fork is not None:
+            months = technical_fork.recent_months(12) if start is None and end is None \
+                else technical_fork.window(start, end)
+            result["technical_forks"] = sum(value for _, value in months)
+
         return result
 
-    def _analyze_issues(self, metrics: Dict) -> Dict:
+    def _analyze_issues(self, metrics: Dict, start: Optional[str] = None,
+                        end: Optional[str] = None) -> Dict:
         """分析问题数据"""
-        issues_new_data = metrics.get("issues_new", {})
-        issues_closed_data = metrics.get("issues_closed", {})
-        issue_response_data = metrics.get("issue_response_time", {})
-        
+        issues_new: Optional[PeriodSeries] = metrics.get("issues_new")
+        issues_closed: Optional[PeriodSeries] = metrics.get("issues_closed")
+        issue_response: Optional[DistributionSeries] = metrics.get("issue_response_time")
+
         result = {
             "new_issues": 0,
             "closed_issues": 0,
             "resolution_efficiency": 0,
             "avg_response_time": 0
         }
-        
-        try:
-            # 获取最近一个月的数据
-            if issues_new_data and isinstance(issues_new_data, dict):
-                if issues_new_data:  # 确保字典不为空
-                    latest_month = max(issues_new_data.keys())
-                    new_issues_val = issues_new_data.get(latest_month, 0)
-                    # 确保值是数字类型
-                    if isinstance(new_issues_val, (int, float)):
-                        result["new_issues"] = new_issues_val
-            
-            if issues_closed_data and isinstance(issues_closed_data, dict):
-                if issues_closed_data:  # 确保字典不为空
-                    latest_month = max(issues_closed_data.keys())
-                    closed_issues_val = issues_closed_data.get(latest_month, 0)
-                    # 确保值是数字类型
-                    if isinstance(closed_issues_val, (int, float)):
-                        result["closed_issues"] = closed_issues_val
-            
-            # 计算解决效率
-            if result["new_issues"] > 0:
-                result["resolution_efficiency"] = round(
-                    (result["closed_issues"] / result["new_issues"]) * 100, 2
-                )
-            
-            # 分析响应时间
-            if issue_response_data and isinstance(issue_response_data, dict):
-                # 过滤出数值类型的值
-                response_times = [v for v in issue_response_data.values() if isinstance(v, (int, float))]
-                if response_times:
-                    result["avg_response_time"] = round(sum(response_times) / len(response_times), 2)
-                    
-        except Exception as e:
-            print(f"Error analyzing issues: {e}")
-        
+
+        # 获取窗口内最近一个月的数据
+        if issues_new is not None:
+            result["new_issues"] = issues_new.latest_in(start, end) or 0
+
+        if issues_closed is not None:
+            result["closed_issues"] = issues_closed.latest_in(start, end) or 0
+
+        # 计算解决效率
+        if result["new_issues"] > 0:
+            result["resolution_efficiency"] = round(
+                (result["closed_issues"] / result["new_issues"]) * 100, 2
+            )
+
+        # 分析响应时间（窗口内各月平均响应时间的均值）
+        if issue_response is not None:
+            response_times = [value for _, value in issue_response.avg.window(start, end)]
+            if response_times:
+                result["avg_response_time"] = round(sum(response_times) / len(response_times), 2)
+
         return result
-    
-    def _analyze_code_quality(self, metrics: Dict) -> Dict:
+
+    def _analyze_code_quality(self, metrics: Dict, start: Optional[str] = None,
+                              end: Optional[str] = None) -> Dict:
         """分析代码质量相关数据"""
-        change_requests_data = metrics.get("change_requests", {})
-        change_requests_accepted_data = metrics.get("change_requests_accepted", {})
-        code_changes_sum_data = metrics.get("code_change_lines_sum", {})
-        
+        change_requests: Optional[PeriodSeries] = metrics.get("change_requests")
+        change_requests_accepted: Optional[PeriodSeries] = metrics.get("change_requests_accepted")
+        code_changes_sum: Optional[PeriodSeries] = metrics.get("code_change_lines_sum")
+
         result = {
             "pr_acceptance_rate": 0,
             "code_changes": 0,
             "activity_level": "low"
         }
-        
-        try:
-            # 计算PR接受率
-            if (change_requests_data and isinstance(change_requests_data, dict) and 
-                change_requests_accepted_data and isinstance(change_requests_accepted_data, dict)):
-                # 获取最近有数据的月份
-                cr_keys = set([k for k, v in change_requests_data.items() if isinstance(v, (int, float))])
-                cra_keys = set([k for k, v in change_requests_accepted_data.items() if isinstance(v, (int, float))])
-                common_months = cr_keys & cra_keys
-                if common_months:
-                    latest_month = max(common_months)
-                    total_prs = change_requests_data.get(latest_month, 0)
-                    accepted_prs = change_requests_accepted_data.get(latest_month, 0)
-                    
-                    if isinstance(total_prs, (int, float)) and isinstance(accepted_prs, (int, float)):
-                        if total_prs > 0:
-                            result["pr_acceptance_rate"] = round((accepted_prs / total_prs) * 100, 2)
-            
-            # 获取代码变更量
-            if code_changes_sum_data and isinstance(code_changes_sum_data, dict):
-                if code_changes_sum_data:  # 确保字典不为空
-                    latest_month = max(code_changes_sum_data.keys())
-                    code_changes_val = code_changes_sum_data.get(latest_month, 0)
-                    # 确保值是数字类型
-                    if isinstance(code_changes_val, (int, float)):
-                        result["code_changes"] = code_changes_val
-            
-            # 根据代码变更量判断活跃度
-            if isinstance(result["code_changes"], (int, float)):
-                if result["code_changes"] > 10000:
-                    result["activity_level"] = "high"
-                elif result["code_changes"] > 1000:
-                    result["activity_level"] = "medium"
-                else:
-                    result["activity_level"] = "low"
-                    
-        except Exception as e:
-            print(f"Error analyzing code quality: {e}")
-        
+
+        # 计算PR接受率（取两者都有数据的最近一个月）
+        if change_requests is not None and change_requests_accepted is not None:
+            common_months = set(change_requests.months_between(start, end)) & \
+                set(change_requests_accepted.months_between(start, end))
+            if common_months:
+                latest_month = max(common_months)
+                total_prs = change_requests.values[latest_month]
+                accepted_prs = change_requests_accepted.values[latest_month]
+                if total_prs > 0:
+                    result["pr_acceptance_rate"] = round((accepted_prs / total_prs) * 100, 2)
+
+        # 获取代码变更量
+        if code_changes_sum is not None:
+            result["code_changes"] = code_changes_sum.latest_in(start, end) or 0
+
+        # 根据代码变更量判断活跃度
+        if result["code_changes"] > 10000:
+            result["activity_level"] = "high"
+        elif result["code_changes"] > 1000:
+            result["activity_level"] = "medium"
+        else:
+            result["activity_level"] = "low"
+
         return result
-    def _calculate_newbie_friendly_score(self, metrics: Dict) -> float:
+
+    def _calculate_newbie_friendly_score(self, activity: Dict, community: Dict,
+                                         issues: Dict, code_quality: Dict,
+                                         newcomer: Optional[Dict] = None) -> float:
         """
-        计算新手友好度分数
-        综合考虑项目活跃度、社区健康度、问题处理效率等因素
+        按当前评分方案计算新手友好度分数（权重和饱和值见 scoring_engine.DEFAULT_PROFILE）
+        综合考虑项目活跃度、社区健康度、问题处理效率等因素；有 GitHub 新手信号时一并计入
         """
-        score = 0.0
-        
-        try:
-            # 基于活跃度 (25%权重)
-            activity = self._analyze_activity(metrics)
-            activity_score = activity.get("score", 0)
-            score += min(activity_score / 1000, 0.25)  # 1000分以上得满分
-            
-            # 基于贡献者数量 (20%权重)
-            community = self._analyze_community(metrics)
-            contributor_count = community.get("total_contributors", 0)
-            score += min(contributor_count / 100, 0.20)  # 100个贡献者以上得满分
-            
-            # 基于Bus Factor (20%权重)
-            bus_factor = community.get("bus_factor", 0)
-            score += min(bus_factor / 10, 0.20)  # 10以上得满分
-            
-            # 基于问题解决效率 (20%权重)
-            issues = self._analyze_issues(metrics)
-            resolution_efficiency = issues.get("resolution_efficiency", 0)
-            score += min(resolution_efficiency / 100, 0.20)  # 100%解决率得满分
-            
-            # 基于PR接受率 (15%权重)
-            code_quality = self._analyze_code_quality(metrics)
-            pr_acceptance_rate = code_quality.get("pr_acceptance_rate", 0)
-            score += min(pr_acceptance_rate / 100, 0.15)  # 100%接受率得满分
-            
-        except Exception as e:
-            print(f"Error calculating newbie friendly score: {e}")
-        
-        return round(score * 100, 2)
+        return self.scoring.score(extract_features({
+            "activity": activity,
+            "community": community,
+            "issues": issues,
+            "code_quality": code_quality,
+            "newcomer": newcomer or {},
+        }))
+
+@lru_cache()
+def get_project_analyzer() -> ProjectAnalyzer:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    return ProjectAnalyzer()
 
-# 创建全局实例
-project_analyzer = ProjectAnalyzer()
\ No newline at end of file
+def __getattr__(name: str):
+    # 兼容 from backend.services.project_analyzer import project_analyzer
+    if name == "project_analyzer":
+        return get_project_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
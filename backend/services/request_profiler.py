@@ -0,0 +1,359 @@
+# backend/services/request_profiler.py
+"""
+按需的请求性能剖析与慢请求记录
+
+被剖析的请求（请求头 X-Profile 等于 profiling_admin_token，或按 profiling_sample_rate 随机抽样）记录:
+- 阶段时间线: 代码中用 stage("名称") 标出的阶段（指标拉取、上游请求、JSON 解码、各 _analyze_* 计算等），
+  包括在线程池中执行的部分（提交任务时携带请求上下文）
+- 调用栈采样: 后台线程按 profiling_sample_interval 对正处于某个阶段内的线程采样，汇总为调用栈和函数计数
+
+所有被剖析的请求以及耗时超过 profiling_slow_threshold 的未剖析请求（只有耗时）
+保存在有界环形缓冲区中，由 /debug/profiles 查看。
+
+未剖析的请求中 stage() 只读取一次 ContextVar 并返回共享的空上下文管理器，开销可以忽略。
+"""
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from backend.config import get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+class _NullStage:
+    """未剖析时 stage() 返回的空上下文管理器"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name: str, detail: Optional[str] = None):
+    """
+    标记一个阶段，用法 with stage("fetch_metrics"): ...
+    当前请求未被剖析时什么也不做
+    """
+    profile = _active.get()
+    if profile is None:
+        return _NULL_STAGE
+    return _Stage(profile, name, detail)
+
+class _Stage:
+    __slots__ = ("profile", "name", "detail", "thread", "depth", "started")
+
+    def __init__(self, profile: "RequestProfile", name: str, detail: Optional[str]):
+        self.profile = profile
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.thread = threading.get_ident()
+        self.depth = self.profile._enter(self.thread)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        ended = time.perf_counter()
+        self.profile._exit(self.thread)
+        self.profile._record(self, ended, exc_type)
+        return False
+
+class RequestProfile:
+    """一次请求的剖析结果"""
+    max_stages = 5000
+
+    def __init__(self, method: str, path: str, query: str, reason: Optional[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.query = query
+        self.reason = reason  # "header" / "sample"；None 表示未剖析，只记录了耗时
+        self.started_at = time.time()
+        self.status: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+        self._origin = time.perf_counter()
+        self._stages: List[tuple] = []
+        self._dropped = 0
+        self._threads: Dict[int, int] = {}  # 线程 -> 当前阶段嵌套深度
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[StackSampler] = None
+
+    def _enter(self, thread: int) -> int:
+        with self._lock:
+            depth = self._threads.get(thread, 0)
+            self._threads[thread] = depth + 1
+            if thread not in self._thread_names:
+                self._thread_names[thread] = threading.current_thread().name
+            return depth
+
+    def _exit(self, thread: int) -> None:
+        with self._lock:
+            depth = self._threads.get(thread, 1) - 1
+            if depth:
+                self._threads[thread] = depth
+            else:
+                self._threads.pop(thread, None)
+
+    def _record(self, stage: _Stage, ended: float, exc_type) -> None:
+        with self._lock:
+            if len(self._stages) >= self.max_stages:
+                self._dropped += 1
+                return
+            self._stages.append((
+                stage.name, stage.detail, stage.thread, stage.depth,
+                stage.started - self._origin, ended - stage.started,
+                exc_type.__name__ if exc_type is not None else None
+            ))
+
+    def active_threads(self) -> List[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def to_dict(self, detail: bool = True) -> Dict[str, Any]:
+        result = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "profiled": self.reason is not None,
+            "reason": self.reason,
+        }
+        with self._lock:
+            stages = sorted(self._stages, key=lambda s: s[4])
+            thread_names = dict(self._thread_names)
+        totals: Dict[str, Dict[str, float]] = {}
+        for name, _, _, _, _, duration, _ in stages:
+            total = totals.setdefault(name, {"count": 0, "total_ms": 0.0})
+            total["count"] += 1
+            total["total_ms"] += duration * 1000
+        result["stage_totals"] = {
+            name: {"count": t["count"], "total_ms": round(t["total_ms"], 3)}
+            for name, t in sorted(totals.items(), key=lambda item: -item[1]["total_ms"])
+        }
+        if not detail:
+            return result
+        result["stages"] = [
+            {
+                "name": name,
+                "detail": stage_detail,
+                "thread": thread_names.get(thread, str(thread)),
+                "depth": depth,
+                "start_ms": round(start * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "error": error,
+            }
+            for name, stage_detail, thread, depth, start, duration, error in stages
+        ]
+        result["dropped_stages"] = self._dropped
+        result["call_profile"] = self._sampler.summary() if self._sampler is not None else None
+        return result
+
+class StackSampler:
+    """定时采样正处于剖析阶段内的线程的调用栈"""
+
+    def __init__(self, profile: RequestProfile, interval: float, max_depth: int = 64):
+        self.profile = profile
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile.id}", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """通知采样线程退出；不等待线程结束（在事件循环中调用，join 会阻塞其他请求）"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            threads = self.profile.active_threads()
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            if self._stop.is_set():
+                return
+            for thread in threads:
+                frame = frames.get(thread)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack = tuple(reversed(stack))
+                with self._lock:
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                    self.samples += 1
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        """出现最多的调用栈，以及各函数作为栈顶（self）和出现在栈中（total）的采样数"""
+        with self._lock:
+            stacks = dict(self._stacks)
+            samples = self.samples
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        for stack, count in stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for function in set(stack):
+                total[function] = total.get(function, 0) + count
+        top_stacks = sorted(stacks.items(), key=lambda item: -item[1])[:limit]
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": samples,
+            "functions": [
+                {"function": function, "self_samples": count, "total_samples": total[function]}
+                for function, count in sorted(own.items(), key=lambda item: -item[1])[:limit]
+            ],
+            "stacks": [{"stack": " > ".join(stack), "samples": count} for stack, count in top_stacks],
+        }
+
+class RequestProfiler:
+    def __init__(self, admin_token: Optional[str] = None, sample_rate: float = 0.0,
+                 slow_threshold: float = 2.0, buffer_size: int = 50, sample_interval: float = 0.005):
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.sample_interval = sample_interval
+        self._buffer: Deque[RequestProfile] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._counts = {"profiled": 0, "captured": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0 or self.slow_threshold > 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token) and token == self.admin_token
+
+    def begin(self, method: str, path: str, query: str, headers) -> Optional[RequestProfile]:
+        """决定是否剖析本次请求；剖析时开始调用栈采样并把剖析对象设为当前上下文"""
+        reason = None
+        if self.admin_token:
+            for name, value in headers:
+                if name == PROFILE_HEADER:
+                    if self.is_admin(value.decode("latin-1")):
+                        reason = "header"
+                    break
+        if reason is None and self.sample_rate > 0 and random.random() < self.sample_rate:
+            reason = "sample"
+        if reason is None:
+            return None
+        profile = RequestProfile(method, path, query, reason)
+        if self.sample_interval > 0:
+            profile._sampler = StackSampler(profile, self.sample_interval).start()
+        with self._lock:
+            self._counts["profiled"] += 1
+        return profile
+
+    def finish(self, profile: Optional[RequestProfile], method: str, path: str, query: str,
+               status: Optional[int], duration: float) -> None:
+        """结束剖析；被剖析的请求和未剖析的慢请求写入缓冲区"""
+        if profile is not None and profile._sampler is not None:
+            profile._sampler.stop()
+        slow = self.slow_threshold > 0 and duration >= self.slow_threshold
+        if profile is None and not slow:
+            return
+        if profile is None:
+            profile = RequestProfile(method, path, query, None)
+        profile.status = status
+        profile.duration_ms = round(duration * 1000, 3)
+        with self._lock:
+            self._buffer.append(profile)
+            self._counts["captured"] += 1
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """缓冲区中的请求摘要，最新的在前"""
+        with self._lock:
+            profiles = list(self._buffer)
+        return [profile.to_dict(detail=False) for profile in reversed(profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            found = next((profile for profile in self._buffer if profile.id == profile_id), None)
+        return found.to_dict() if found is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counts,
+                "buffered": len(self._buffer),
+                "sample_rate": self.sample_rate,
+                "slow_threshold": self.slow_threshold,
+            }
+
+class ProfilingMiddleware:
+    """
+    ASGI 中间件: 为每个 HTTP 请求计时，按 RequestProfiler 的设置剖析请求并记录慢请求
+    剖析的请求在响应头 X-Profile-Id 中返回剖析记录的 id
+    """
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or get_request_profiler()
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        query = scope.get("query_string", b"").decode("latin-1")
+        profile = profiler.begin(method, path, query, scope["headers"])
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    message = {**message, "headers": [
+                        *message.get("headers", []), (PROFILE_ID_HEADER, profile.id.encode("latin-1"))
+                    ]}
+            await send(message)
+
+        token = _active.set(profile) if profile is not None else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                _active.reset(token)
+            profiler.finish(profile, method, path, query, status, time.perf_counter() - started)
+
+@lru_cache()
+def get_request_profiler() -> RequestProfiler:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    settings = get_settings()
+    return RequestProfiler(
+        admin_token=settings.profiling_admin_token,
+        sample_rate=settings.profiling_sample_rate,
+        slow_threshold=settings.profiling_slow_threshold,
+        buffer_size=settings.profiling_buffer_size,
+        sample_interval=settings.profiling_sample_interval,
+    )
@@ -0,0 +1,376 @@
+# backend/services/scoring_engine.py
+"""
+声明式评分与建议规则
+
+新手友好度分数和贡献建议由评分方案（profile）描述，而不是写死在代码里:
+- components: 每个特征的权重和饱和值（特征达到饱和值时得到全部权重）；
+  optional 的特征（如 GitHub 新手信号）全部可用时才计分，并按其权重等比压缩其余部分
+- rules: 建议规则，条件为 {特征: {运算符: 阈值}}，特征 score 表示本方案的分数；
+  同一 group 内取第一条满足的规则；未给出时使用默认方案的规则
+
+每个仓库分析后的特征向量缓存在引擎中（也可从预生成快照导入），
+修改权重后可以把多个方案一次性作用到所有已缓存的仓库上（特征矩阵 x 方案矩阵），无需重新拉取数据。
+安装了 numpy 时按矩阵计算，否则逐行计算，结果相同。numpy 在第一次按矩阵计算时才导入，不计入启动耗时。
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import math
+import operator
+import threading
+
+from backend.config import get_settings
+from backend.services.snapshot_store import SnapshotCursor, SnapshotStore
+
+_numpy_module: Any = None  # None 表示尚未尝试导入，False 表示未安装
+
+def _numpy():
+    """按需导入 numpy（可选依赖，导入约 90 ms）；未安装时返回 None"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+# 特征名 -> 报告中的 (模块, 字段)
+FEATURES: Dict[str, Tuple[str, str]] = {
+    "activity_score": ("activity", "score"),
+    "total_contributors": ("community", "total_contributors"),
+    "active_contributors": ("community", "active_contributors"),
+    "bus_factor": ("community", "bus_factor"),
+    "new_issues": ("issues", "new_issues"),
+    "resolution_efficiency": ("issues", "resolution_efficiency"),
+    "avg_response_time": ("issues", "avg_response_time"),
+    "pr_acceptance_rate": ("code_quality", "pr_acceptance_rate"),
+    "code_changes": ("code_quality", "code_changes"),
+    "good_first_issues": ("newcomer", "good_first_issues"),
+    "help_wanted_issues": ("newcomer", "help_wanted_issues"),
+    "has_contributing": ("newcomer", "has_contributing"),
+}
+FEATURE_NAMES = tuple(FEATURES)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+SCORE_FEATURE = "score"
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# 与原先写死的计算一致: 活跃度 250、贡献者 20 人、Bus Factor 2、解决率 20%、PR 接受率 15% 即得满分
+DEFAULT_PROFILE = {
+    "name": "default",
+    "components": [
+        {"feature": "activity_score", "weight": 25, "saturation": 250},
+        {"feature": "total_contributors", "weight": 20, "saturation": 20},
+        {"feature": "bus_factor", "weight": 20, "saturation": 2},
+        {"feature": "resolution_efficiency", "weight": 20, "saturation": 20},
+        {"feature": "pr_acceptance_rate", "weight": 15, "saturation": 15},
+        {"feature": "good_first_issues", "weight": 10, "saturation": 10, "optional": True},
+        {"feature": "has_contributing", "weight": 5, "saturation": 1, "optional": True},
+    ],
+    "rules": [
+        {
+            "group": "beginner", "when": {"score": {">=": 80}},
+            "type": "beginner", "priority": "high", "title": "非常适合新手贡献",
+            "description": "该项目对新手非常友好，社区活跃，问题响应迅速"
+        },
+        {
+            "group": "beginner", "when": {"score": {">=": 60}},
+            "type": "beginner", "priority": "medium", "title": "适合有一定经验的贡献者",
+            "description": "项目对新手较友好，建议先熟悉代码库和贡献流程"
+        },
+        {
+            "group": "beginner",
+            "type": "beginner", "priority": "low", "title": "适合经验丰富的贡献者",
+            "description": "项目复杂度较高，建议深入了解后再贡献"
+        },
+        {
+            "when": {"bus_factor": {"<": 3}},
+            "type": "community", "priority": "high", "title": "核心贡献者较少",
+            "description": "项目依赖少数核心贡献者，你的贡献将非常有价值"
+        },
+        {
+            "when": {"resolution_efficiency": {"<": 50}},
+            "type": "maintenance", "priority": "medium", "title": "问题积压较多",
+            "description": "项目存在较多未解决问题，修复bug是很好的贡献方向"
+        },
+        {
+            "type": "general", "priority": "medium", "title": "阅读贡献指南",
+            "description": "建议先仔细阅读项目的CONTRIBUTING.md文件和代码规范"
+        },
+    ],
+}
+
+RECOMMENDATION_KEYS = ("type", "priority", "title", "description")
+
+def extract_features(report: Dict[str, Any]) -> Dict[str, float]:
+    """从分析报告（或其中几个模块）中取出数值特征，缺失的特征不出现在结果中"""
+    features = {}
+    for name, (section, field) in FEATURES.items():
+        value = (report.get(section) or {}).get(field)
+        if isinstance(value, (bool, int, float)):
+            features[name] = float(value)
+    return features
+
+def _expect(value: Any, kind: type, path: str, expected: str) -> Any:
+    """方案结构校验: 类型不符时抛出带字段路径的 ValueError"""
+    if not isinstance(value, kind):
+        raise ValueError(f"{path} must be {expected}, got {value!r}")
+    return value
+
+def _number(value: Any, path: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{path} must be a number, got {value!r}")
+    return float(value)
+
+class ScoringProfile:
+    """编译后的评分方案: 各特征的权重、饱和值和可选标记，以及建议规则"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        _expect(spec, dict, "profile", "an object")
+        self.name = spec.get("name")
+        if not self.name or not isinstance(self.name, str):
+            raise ValueError("profile requires a name")
+        self.spec = spec
+        where = f"profile {self.name!r}"
+
+        self.weights = [0.0] * len(FEATURE_NAMES)
+        self.saturations = [1.0] * len(FEATURE_NAMES)
+        self.optional = [False] * len(FEATURE_NAMES)
+        components = _expect(spec.get("components", []), list, f"{where}: components", "a list")
+        for n, component in enumerate(components):
+            path = f"{where}: components[{n}]"
+            _expect(component, dict, path, "an object")
+            feature = component.get("feature")
+            if feature not in FEATURE_INDEX:
+                raise ValueError(f"unknown feature {feature!r} in profile {self.name!r}")
+            weight = _number(component.get("weight", 0), f"{path}.weight")
+            saturation = _number(component.get("saturation", 1), f"{path}.saturation")
+            if weight < 0 or saturation <= 0:
+                raise ValueError(f"invalid weight/saturation for {feature!r} in profile {self.name!r}")
+            i = FEATURE_INDEX[feature]
+            self.weights[i] = weight
+            self.saturations[i] = saturation
+            self.optional[i] = bool(component.get("optional", False))
+
+        self.required_weight = sum(w for w, o in zip(self.weights, self.optional) if not o)
+        self.optional_weight = sum(w for w, o in zip(self.weights, self.optional) if o)
+        if self.required_weight <= 0:
+            raise ValueError(f"profile {self.name!r} has no required components")
+        # 可选特征可用时其余部分的缩放比例
+        self.optional_scale = max(self.required_weight - self.optional_weight, 0) / self.required_weight
+        self.optional_indices = [i for i, (w, o) in enumerate(zip(self.weights, self.optional)) if o and w > 0]
+
+        self.rules: List[Tuple[Optional[str], List[Tuple[str, Any, float]], Dict[str, Any]]] = []
+        rules = _expect(spec.get("rules", DEFAULT_PROFILE["rules"]), list, f"{where}: rules", "a list")
+        for n, rule in enumerate(rules):
+            path = f"{where}: rules[{n}]"
+            _expect(rule, dict, path, "an object")
+            conditions = []
+            when = _expect(rule.get("when") or {}, dict, f"{path}.when", "an object of {feature: {operator: threshold}}")
+            for feature, checks in when.items():
+                if feature != SCORE_FEATURE and feature not in FEATURE_INDEX:
+                    raise ValueError(f"unknown feature {feature!r} in rule of profile {self.name!r}")
+                _expect(checks, dict, f"{path}.when.{feature}", "an object of {operator: threshold}")
+                for op, threshold in checks.items():
+                    if op not in OPERATORS:
+                        raise ValueError(f"unknown operator {op!r} in rule of profile {self.name!r}")
+                    conditions.append((feature, op, _number(threshold, f"{path}.when.{feature}.{op}")))
+            output = {key: rule[key] for key in RECOMMENDATION_KEYS if key in rule}
+            self.rules.append((rule.get("group"), conditions, output))
+
+    def rule_features(self) -> List[str]:
+        """建议规则用到的特征（不含 score）"""
+        return sorted({feature for _, conditions, _ in self.rules
+                       for feature, _, _ in conditions if feature != SCORE_FEATURE})
+
+    def score_row(self, row: Sequence[float]) -> float:
+        """逐行计算一个特征向量的分数（NaN 表示缺失）"""
+        required = optional = 0.0
+        for value, weight, saturation, is_optional in zip(row, self.weights, self.saturations, self.optional):
+            if weight == 0 or math.isnan(value):
+                continue
+            part = min(max(value, 0.0) / saturation, 1.0) * weight
+            if is_optional:
+                optional += part
+            else:
+                required += part
+        if self.optional_indices and all(not math.isnan(row[i]) for i in self.optional_indices):
+            return round(required * self.optional_scale + optional, 2)
+        return round(required, 2)
+
+    def recommend_row(self, row: Sequence[float], score: float) -> List[Dict[str, Any]]:
+        """逐行计算满足的建议规则；缺失的特征按 0 处理"""
+        matched_groups = set()
+        result = []
+        for group, conditions, output in self.rules:
+            if group is not None and group in matched_groups:
+                continue
+            for feature, op, threshold in conditions:
+                value = score if feature == SCORE_FEATURE else row[FEATURE_INDEX[feature]]
+                if not OPERATORS[op](0.0 if math.isnan(value) else value, threshold):
+                    break
+            else:
+                if group is not None:
+                    matched_groups.add(group)
+                result.append(dict(output))
+        return result
+
+def _vector(features: Dict[str, float]) -> List[float]:
+    return [features.get(name, math.nan) for name in FEATURE_NAMES]
+
+class ScoringEngine:
+    """评分方案注册表 + 各仓库特征向量缓存"""
+
+    def __init__(self, profiles: Optional[Iterable[Dict[str, Any]]] = None, active: str = "default",
+                 use_numpy: bool = True):
+        self._use_numpy = use_numpy
+        self._profiles: Dict[str, ScoringProfile] = {}
+        self.register(DEFAULT_PROFILE)
+        for spec in profiles or []:
+            self.register(spec)
+        if active not in self._profiles:
+            raise ValueError(f"unknown scoring profile {active!r}")
+        self.active = active
+
+        self._index: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._rows: List[List[float]] = []
+        self._matrix = None  # 按需从 _rows 构建，行数变化或更新后失效
+        self._snapshot_cursor = SnapshotCursor()
+        self._lock = threading.Lock()
+
+    @property
+    def use_numpy(self) -> bool:
+        return self._use_numpy and _numpy() is not None
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if self.use_numpy else "python"
+
+    def register(self, spec: Dict[str, Any]) -> ScoringProfile:
+        """注册（或替换同名的）评分方案"""
+        profile = ScoringProfile(spec)
+        self._profiles[profile.name] = profile
+        return profile
+
+    def profile(self, name: Optional[str] = None) -> ScoringProfile:
+        name = name or self.active
+        if name not in self._profiles:
+            raise ValueError(f"unknown scoring profile {name!r}")
+        return self._profiles[name]
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        return [profile.spec for profile in self._profiles.values()]
+
+    def resolve(self, profiles: Iterable[Any]) -> List[ScoringProfile]:
+        """方案名或内联方案定义（不注册）转换为编译后的方案"""
+        return [ScoringProfile(p) if isinstance(p, dict) else self.profile(p) for p in profiles]
+
+    def score(self, features: Dict[str, float], profile: Optional[str] = None) -> float:
+        return self.profile(profile).score_row(_vector(features))
+
+    def recommend(self, features: Dict[str, float], score: float,
+                  profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.profile(profile).recommend_row(_vector(features), score)
+
+    # ---- 特征向量缓存 ----
+
+    def record(self, repo_key: str, features: Dict[str, float]) -> None:
+        """缓存（合并）一个仓库的特征，未给出的特征保留原值"""
+        with self._lock:
+            i = self._index.get(repo_key)
+            if i is None:
+                self._index[repo_key] = len(self._rows)
+                self._keys.append(repo_key)
+                self._rows.append(_vector(features))
+            else:
+                row = self._rows[i]
+                for name, value in features.items():
+                    row[FEATURE_INDEX[name]] = value
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def sync_snapshots(self, store: SnapshotStore) -> int:
+        """导入预生成快照中尚未导入的报告的特征，返回新导入的行数"""
+        count = 0
+        for key, report in self._snapshot_cursor.new_reports(store.path):
+            self.record(key, extract_features(report))
+            count += 1
+        return count
+
+    def _snapshot(self) -> Tuple[List[str], Any]:
+        """当前缓存的仓库键和特征矩阵（numpy 数组或行列表）"""
+        with self._lock:
+            if self._matrix is None:
+                rows = [list(row) for row in self._rows]
+                self._matrix = _numpy().array(rows, dtype=float).reshape(len(rows), len(FEATURE_NAMES)) \
+                    if self.use_numpy else rows
+            return list(self._keys), self._matrix
+
+    def score_matrix(self, matrix: Any, profiles: List[ScoringProfile]) -> Any:
+        """特征矩阵（仓库 x 特征，NaN 为缺失）在多个方案下的分数（仓库 x 方案）"""
+        if not self.use_numpy:
+            return [[profile.score_row(row) for profile in profiles] for row in matrix]
+
+        np = _numpy()
+        X = np.asarray(matrix, dtype=float)
+        W = np.array([p.weights for p in profiles])                 # 方案 x 特征
+        S = np.array([p.saturations for p in profiles])
+        O = np.array([p.optional for p in profiles])
+        present = ~np.isnan(X)
+        values = np.where(present, np.maximum(X, 0.0), 0.0)
+
+        parts = np.minimum(values[:, None, :] / S[None, :, :], 1.0) * W[None, :, :]  # 仓库 x 方案 x 特征
+        required = (parts * ~O[None, :, :]).sum(axis=2)
+        optional = (parts * O[None, :, :]).sum(axis=2)
+        # 方案的可选特征（权重 > 0）全部存在时才计入
+        needed = O & (W > 0)
+        available = np.all(present[:, None, :] | ~needed[None, :, :], axis=2) & needed.any(axis=1)[None, :]
+        scale = np.array([p.optional_scale for p in profiles])[None, :]
+        return np.round(np.where(available, required * scale + optional, required), 2)
+
+    def rank(self, profiles: List[ScoringProfile], limit: int = 50,
+             sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """用多个方案给所有已缓存的仓库打分，按 sort_by（默认第一个方案）降序返回前 limit 个"""
+        keys, matrix = self._snapshot()
+        if not keys:
+            return []
+        names = [p.name for p in profiles]
+        if sort_by is not None and sort_by not in names:
+            raise ValueError(f"sort_by {sort_by!r} is not one of the requested profiles")
+        column = names.index(sort_by) if sort_by else 0
+        scores = self.score_matrix(matrix, profiles)
+
+        if self.use_numpy:
+            order = _numpy().argsort(-scores[:, column], kind="stable")[:limit]
+            return [{"repo": keys[i], "scores": dict(zip(names, scores[i].tolist()))} for i in order]
+        order = sorted(range(len(keys)), key=lambda i: -scores[i][column])[:limit]
+        return [{"repo": keys[i], "scores": dict(zip(names, scores[i]))} for i in order]
+
+def _load_profiles(path: Optional[str]) -> List[Dict[str, Any]]:
+    """读取评分方案文件: 方案列表，或 {"profiles": [...]}"""
+    if not path:
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load scoring profiles from {path}: {e}")
+        return []
+    return data.get("profiles", []) if isinstance(data, dict) else data
+
+@lru_cache()
+def get_scoring_engine() -> ScoringEngine:
+    """全局实例，首次使用时创建"""
+    settings = get_settings()
+    return ScoringEngine(_load_profiles(settings.scoring_profiles_path), settings.scoring_profile)
@@ -0,0 +1,261 @@
+# backend/services/shared_cache.py
+"""
+跨进程共享缓存
+
+多个 uvicorn worker 各自维护进程内缓存时，每个进程都要冷启动并重复请求上游。
+共享缓存作为进程内缓存之后的第二级，存放指标原始数据和分析报告，并提供跨进程的
+single-flight 锁：同一个键同一时间只有一个 worker 去上游拉取，其余 worker 等待结果。
+
+后端由 settings.shared_cache_backend 选择:
+- none:   不使用共享缓存（默认，单进程部署）
+- sqlite: data/ 下的 SQLite 文件（WAL 模式），同一台机器上的多个 worker 共享
+- redis:  Redis 或兼容服务（需要安装 redis 包），也可以注入任意 redis-py 兼容的客户端
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from backend.config import get_settings
+
+class SharedCache(ABC):
+    """共享缓存接口；值为字节串，附带上游数据版本和写入时间。后端实现全部抽象方法，single_flight 由基类提供"""
+
+    @abstractmethod
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[bytes, Optional[str]]]:
+        """返回 (值, 数据版本)；不存在或超过 max_age 秒时返回 None"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, version: Optional[str] = None, ttl: Optional[float] = None) -> None:
+        """写入值；ttl 秒后过期，为 None 时不过期"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除一个键（不存在时忽略）"""
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """删除所有以 prefix 开头的键，返回删除的条数"""
+
+    @abstractmethod
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        """尝试获取 key 的锁，成功返回令牌；锁在 ttl 秒后自动过期，防止持有者崩溃后死锁"""
+
+    @abstractmethod
+    def release(self, key: str, token: str) -> None:
+        """释放 acquire 得到的锁；令牌不匹配（锁已过期并被他人获取）时不做任何事"""
+
+    @abstractmethod
+    def is_locked(self, key: str) -> bool:
+        """key 的锁当前是否被持有（未过期）"""
+
+    @contextmanager
+    def single_flight(self, key: str, ttl: float, max_age: Optional[float] = None,
+                      poll_interval: float = 0.05) -> Iterator[Optional[Tuple[bytes, Optional[str]]]]:
+        """
+        跨进程 single-flight
+
+        获得锁时产出 None，调用方负责拉取并 set()，退出时释放锁；
+        其他进程持有锁时等待，对方写入结果后产出 (值, 数据版本)。
+        锁过期（持有者崩溃或超时）仍没有结果时产出 None，调用方自行拉取。
+        """
+        found = self.get(key, max_age)
+        if found is not None:
+            yield found
+            return
+        token = self.acquire(key, ttl)
+        if token is None:
+            waited_until = time.monotonic() + ttl
+            while time.monotonic() < waited_until:
+                time.sleep(poll_interval)
+                found = self.get(key, max_age)
+                if found is not None:
+                    yield found
+                    return
+                if not self.is_locked(key):
+                    break
+            token = self.acquire(key, ttl)
+
+        # 获取锁之前持有者可能刚好写入并释放；持有者放弃（拉取失败）时也可能已由其他进程补上
+        found = self.get(key, max_age)
+        if found is not None:
+            if token is not None:
+                self.release(key, token)
+            yield found
+            return
+        try:
+            yield None
+        finally:
+            if token is not None:
+                self.release(key, token)
+
+class SQLiteSharedCache(SharedCache):
+    """
+    基于 SQLite 文件的共享缓存，适合单机多 worker
+    写入时每隔 prune_interval 秒顺带删除已过期的条目和锁，文件不会随过期数据无限增长
+    """
+
+    def __init__(self, path: str, prune_interval: float = 300.0):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._last_prune = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, version TEXT, stored_at REAL NOT NULL, expires_at REAL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程一个连接；autocommit 模式
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, max_age=None):
+        row = self._conn().execute(
+            "SELECT value, version, stored_at, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, version, stored_at, expires_at = row
+        now = time.time()
+        if (expires_at is not None and now > expires_at) or (max_age is not None and now - stored_at > max_age):
+            return None
+        return bytes(value), version
+
+    def set(self, key, value, version=None, ttl=None):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, value, version, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, version, now, now + ttl if ttl is not None else None)
+        )
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self.prune()
+
+    def prune(self) -> int:
+        """删除已过期的条目和锁，返回删除的条目数；未设置 ttl 的条目保留"""
+        self._last_prune = time.monotonic()
+        now = time.time()
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)).rowcount
+        conn.execute("DELETE FROM locks WHERE expires_at < ?", (now,))
+        return removed
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix):
+        # 不用 LIKE，避免转义 % 和 _
+        cursor = self._conn().execute(
+            "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        )
+        return cursor.rowcount
+
+    def acquire(self, key, ttl):
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM locks WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO locks (key, token, expires_at) VALUES (?, ?, ?)", (key, token, now + ttl)
+        )
+        return token if cursor.rowcount == 1 else None
+
+    def release(self, key, token):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    def is_locked(self, key):
+        row = self._conn().execute(
+            "SELECT 1 FROM locks WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+class RedisSharedCache(SharedCache):
+    """
+    基于 Redis 的共享缓存，适合多机部署
+
+    client 为 redis-py 兼容的客户端（需支持 get/set(nx, px)/delete/scan_iter），
+    测试时可以注入本地替身（backend/utils/fake_redis.py 或 fakeredis）。
+    """
+    LOCK_PREFIX = "lock:"
+
+    def __init__(self, client: Any, namespace: str = "opencompass:"):
+        self.client = client
+        self.namespace = namespace
+
+    @staticmethod
+    def _encode(value: bytes, version: Optional[str]) -> bytes:
+        # 格式: 写入时间\n数据版本\n值
+        return f"{time.time()}\n{version or ''}\n".encode("utf-8") + value
+
+    def get(self, key, max_age=None):
+        raw = self.client.get(self.namespace + key)
+        if raw is None:
+            return None
+        stored_at, version, value = raw.split(b"\n", 2)
+        if max_age is not None and time.time() - float(stored_at) > max_age:
+            return None
+        return value, version.decode("utf-8") or None
+
+    def set(self, key, value, version=None, ttl=None):
+        self.client.set(self.namespace + key, self._encode(value, version),
+                        px=int(ttl * 1000) if ttl is not None else None)
+
+    def delete(self, key):
+        self.client.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=self._escape(self.namespace + prefix) + "*"))
+        if not keys:
+            return 0
+        return self.client.delete(*keys)
+
+    @staticmethod
+    def _escape(pattern: str) -> str:
+        for char in "\\*?[]":
+            pattern = pattern.replace(char, "\\" + char)
+        return pattern
+
+    def acquire(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.client.set(self.namespace + self.LOCK_PREFIX + key, token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release(self, key, token):
+        # 只释放自己持有的锁；GET 与 DELETE 之间锁恰好过期并被他人获取的窗口可以忽略
+        lock_key = self.namespace + self.LOCK_PREFIX + key
+        current = self.client.get(lock_key)
+        if current is not None and (current.decode("utf-8") if isinstance(current, bytes) else current) == token:
+            self.client.delete(lock_key)
+
+    def is_locked(self, key):
+        return self.client.get(self.namespace + self.LOCK_PREFIX + key) is not None
+
+@lru_cache()
+def get_shared_cache() -> Optional[SharedCache]:
+    """按配置创建全局共享缓存；未启用时返回 None"""
+    settings = get_settings()
+    backend = settings.shared_cache_backend
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteSharedCache(settings.shared_cache_path)
+    if backend == "redis":
+        import redis
+        return RedisSharedCache(redis.Redis.from_url(settings.redis_url or "redis://localhost:6379/0"))
+    raise ValueError(f"unknown shared cache backend {backend!r}")
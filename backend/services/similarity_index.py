@@ -0,0 +1,194 @@
+# backend/services/similarity_index.py
+"""
+相似项目检索
+
+每个仓库由分析报告得到一个定长特征向量（活跃度、活跃度趋势、Bus Factor、响应时间、
+PR 接受率、代码变更量、技术分叉数等），各维度先做固定的变换和缩放（计数类取 log1p），
+使其大致落在 [0, 1]，再按欧氏距离查找最近邻。
+
+变换不依赖其他仓库的数据，所以仓库分析后可以直接增量写入索引，无需重建。
+向量保存在预分配的连续矩阵中，查询时一次计算与所有仓库的距离（安装了 numpy 时按矩阵计算），
+数万个仓库也只需几毫秒。numpy 在第一次写入向量时才导入，不计入启动耗时。
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import math
+import threading
+
+from backend.services.snapshot_store import SnapshotCursor, SnapshotStore
+
+_numpy_module: Any = None  # None 表示尚未尝试导入，False 表示未安装
+
+def _numpy():
+    """第一次需要矩阵时才导入 numpy（可选依赖）；未安装时返回 None"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+def _log_scale(limit: float) -> Callable[[float], float]:
+    """计数类特征: log1p 后除以 log1p(limit)，limit 附近约为 1"""
+    denominator = math.log1p(limit)
+    return lambda value: math.log1p(max(value, 0.0)) / denominator
+
+def _linear(low: float, high: float) -> Callable[[float], float]:
+    """比例类特征: 截断到 [low, high] 后线性缩放到 [0, 1]"""
+    return lambda value: (min(max(value, low), high) - low) / (high - low)
+
+def _trend_growth(report: Dict[str, Any]) -> Optional[float]:
+    summary = (report.get("trends") or {}).get("activity") or {}
+    growth = summary.get("yoy_growth")
+    return growth if growth is not None else summary.get("mom_growth")
+
+def _field(section: str, field: str) -> Callable[[Dict[str, Any]], Any]:
+    return lambda report: (report.get(section) or {}).get(field)
+
+# 特征名 -> (从报告取值, 变换)；缺失的特征按 0 处理
+VECTOR_FEATURES: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Callable[[float], float]]] = {
+    "activity": (_field("activity", "score"), _log_scale(1000)),
+    "activity_growth": (_trend_growth, _linear(-100, 200)),
+    "bus_factor": (_field("community", "bus_factor"), _log_scale(20)),
+    "active_contributors": (_field("community", "active_contributors"), _log_scale(200)),
+    "avg_response_time": (_field("issues", "avg_response_time"), _log_scale(60)),
+    "resolution_efficiency": (_field("issues", "resolution_efficiency"), _linear(0, 200)),
+    "pr_acceptance_rate": (_field("code_quality", "pr_acceptance_rate"), _linear(0, 100)),
+    "code_changes": (_field("code_quality", "code_changes"), _log_scale(1_000_000)),
+    "technical_forks": (_field("community", "technical_forks"), _log_scale(500)),
+}
+VECTOR_NAMES = tuple(VECTOR_FEATURES)
+
+def build_vector(report: Dict[str, Any]) -> Tuple[List[float], Dict[str, float]]:
+    """由完整分析报告构建 (归一化向量, 原始特征值)"""
+    vector = []
+    raw = {}
+    for name, (extract, transform) in VECTOR_FEATURES.items():
+        value = extract(report)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            value = 0.0
+        raw[name] = value
+        vector.append(transform(float(value)))
+    return vector, raw
+
+class SimilarityIndex:
+    """仓库特征向量的内存最近邻索引，可增量写入"""
+
+    def __init__(self, initial_capacity: int = 1024, use_numpy: bool = True):
+        self._use_numpy = use_numpy
+        self._initial_capacity = initial_capacity
+        self._index: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._raw: List[Dict[str, float]] = []
+        self._vectors: Any = None  # 第一次写入时分配: numpy 矩阵或行列表
+        self._norms: Any = None  # 各向量模长的平方，查询时 |a-b|² = |a|² + |b|² - 2a·b
+        self._snapshot_cursor = SnapshotCursor()
+        self._lock = threading.Lock()
+
+    @property
+    def use_numpy(self) -> bool:
+        return self._use_numpy and _numpy() is not None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, repo_key: str) -> bool:
+        return repo_key in self._index
+
+    def add(self, repo_key: str, report: Dict[str, Any]) -> None:
+        """写入（或更新）一个仓库的向量"""
+        vector, raw = build_vector(report)
+        with self._lock:
+            if self._vectors is None:
+                if self.use_numpy:
+                    self._vectors = _numpy().zeros((self._initial_capacity, len(VECTOR_NAMES)))
+                    self._norms = _numpy().zeros(self._initial_capacity)
+                else:
+                    self._vectors = []
+            i = self._index.get(repo_key)
+            if i is None:
+                i = len(self._keys)
+                self._index[repo_key] = i
+                self._keys.append(repo_key)
+                self._raw.append(raw)
+                if not self.use_numpy:
+                    self._vectors.append(vector)
+                elif i == len(self._vectors):
+                    # 容量翻倍，均摊 O(1)
+                    np = _numpy()
+                    self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+                    self._norms = np.concatenate([self._norms, np.zeros_like(self._norms)])
+            else:
+                self._raw[i] = raw
+            if self.use_numpy:
+                self._vectors[i] = vector
+                self._norms[i] = sum(v * v for v in vector)
+            else:
+                self._vectors[i] = vector
+
+    def sync_snapshots(self, store: SnapshotStore) -> int:
+        """导入预生成快照中尚未导入的报告，返回新导入的数量"""
+        count = 0
+        for key, report in self._snapshot_cursor.new_reports(store.path):
+            self.add(key, report)
+            count += 1
+        return count
+
+    def query(self, repo_key: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """与 repo_key 最相似的 limit 个仓库（不含自身），按距离升序"""
+        with self._lock:
+            target = self._index.get(repo_key)
+            if target is None:
+                raise KeyError(repo_key)
+            return self._nearest(self._vectors[target], limit, target)
+
+    def query_report(self, report: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """与一份不写入索引的报告（如不完整的报告）最相似的 limit 个仓库"""
+        vector, _ = build_vector(report)
+        with self._lock:
+            if not self._keys:
+                return []
+            return self._nearest(_numpy().asarray(vector) if self.use_numpy else vector, limit, None)
+
+    def _nearest(self, origin, limit: int, exclude: Optional[int]) -> List[Dict[str, Any]]:
+        """调用方持有锁；exclude 为查询仓库自身的下标"""
+        count = len(self._keys)
+        if self.use_numpy:
+            np = _numpy()
+            k = min(limit, count - (exclude is not None))
+            if k <= 0:
+                return []
+            squared = self._norms[:count] + origin @ origin - 2 * (self._vectors[:count] @ origin)
+            distances = np.sqrt(np.maximum(squared, 0.0))
+            if exclude is not None:
+                distances[exclude] = np.inf
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+            pairs = [(float(distances[i]), int(i)) for i in nearest]
+        else:
+            pairs = heapq.nsmallest(limit, (
+                (math.sqrt(sum((a - b) ** 2 for a, b in zip(vector, origin))), i)
+                for i, vector in enumerate(self._vectors) if i != exclude
+            ))
+        return [
+            {
+                "repo": self._keys[i],
+                "distance": round(distance, 4),
+                "similarity": round(1 / (1 + distance), 4),
+                "features": self._raw[i],
+            }
+            for distance, i in pairs
+        ]
+
+    def features(self, repo_key: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            i = self._index.get(repo_key)
+            return self._raw[i] if i is not None else None
+
+@lru_cache()
+def get_similarity_index() -> SimilarityIndex:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    return SimilarityIndex()
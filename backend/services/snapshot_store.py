@@ -0,0 +1,164 @@
+# backend/services/snapshot_store.py
+from typing import Dict, Any, Iterator, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
+import json
+import os
+import threading
+
+from backend.config import get_settings
+
+REPORTS_FILE = "reports.jsonl"
+# 每行格式: {"repo":...,"generated_at":...,"report":{...}}，report 固定为最后一个字段，
+# 这样可以直接切出报告的原始字节返回，无需反序列化
+REPORT_MARKER = b',"report":'
+
+def snapshot_key(owner: str, repo: str, platform: str = "github") -> str:
+    """快照中使用的仓库键"""
+    return f"{platform}/{owner}/{repo}"
+
+def encode_snapshot_line(key: str, report: Dict[str, Any]) -> bytes:
+    """将一份分析报告编码为紧凑的 JSON Lines 记录"""
+    header = json.dumps(
+        {"repo": key, "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds")},
+        ensure_ascii=False, separators=(",", ":")
+    )
+    body = json.dumps(report, ensure_ascii=False, separators=(",", ":"))
+    return (header[:-1] + ',"report":' + body + "}\n").encode("utf-8")
+
+def iter_snapshot_lines(path: str, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """从 start 偏移量开始逐行读取快照文件，返回 (偏移量, 行内容)；忽略末尾未写完的行"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if line.endswith(b"\n"):
+                yield offset, line
+            offset += len(line)
+
+class SnapshotCursor:
+    """增量读取快照文件中新追加的报告（文件被替换后从头读取），用于从快照导入派生数据"""
+
+    def __init__(self):
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def new_reports(self, path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """返回上次读取之后写入的 (仓库键, 报告)；跳过格式错误的行"""
+        with self._lock:
+            try:
+                inode = os.stat(path).st_ino
+            except OSError:
+                return
+            if inode != self._inode:
+                self._inode, self._offset = inode, 0
+
+            for offset, line in iter_snapshot_lines(path, self._offset):
+                self._offset = offset + len(line)
+                marker = line.find(REPORT_MARKER)
+                if marker < 0:
+                    continue
+                try:
+                    key = json.loads(line[:marker] + b"}")["repo"]
+                    report = json.loads(line[marker + len(REPORT_MARKER):line.rindex(b"}")])
+                except ValueError as e:
+                    print(f"Skipping malformed snapshot line at {offset}: {e}")
+                    continue
+                yield key, report
+
+class SnapshotStore:
+    """
+    预生成分析报告的只读存储
+
+    首次访问时扫描快照文件建立 仓库键 -> (偏移量, 长度) 索引，之后按偏移量直接读取。
+    文件只追加时增量索引新写入的行；文件被替换或变小（重新生成）时重建索引。
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        self.snapshot_dir = snapshot_dir or get_settings().snapshot_dir
+        self.path = os.path.join(self.snapshot_dir, REPORTS_FILE)
+        self._index: Dict[str, Tuple[int, int, str]] = {}
+        self._signature: Optional[Tuple[int, float, int]] = None
+        self._indexed_until = 0
+        self._lock = threading.Lock()
+
+    def _ensure_index(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+
+        signature = (stat.st_ino, stat.st_mtime, stat.st_size)
+        if signature == self._signature:
+            return True
+
+        with self._lock:
+            if signature == self._signature:
+                return True
+            if (self._signature is not None and self._signature[0] != stat.st_ino) \
+                    or stat.st_size < self._indexed_until:
+                self._index = {}
+                self._indexed_until = 0
+            index = dict(self._index)
+            for offset, line in iter_snapshot_lines(self.path, self._indexed_until):
+                self._indexed_until = offset + len(line)
+                try:
+                    header = json.loads(line[:line.index(REPORT_MARKER)] + b"}")
+                except ValueError as e:
+                    print(f"Skipping malformed snapshot line at {offset}: {e}")
+                    continue
+                # 同一仓库出现多次时以最后一次为准
+                index[header["repo"]] = (offset, len(line), header.get("generated_at", ""))
+            self._index = index
+            self._signature = signature
+        return True
+
+    def get_report_bytes(self, owner: str, repo: str, platform: str = "github") -> Optional[Tuple[bytes, str]]:
+        """返回 (报告原始JSON字节, 生成时间)，不存在时返回 None"""
+        key = snapshot_key(owner, repo, platform)
+        prefix = b'{"repo":' + json.dumps(key, ensure_ascii=False).encode("utf-8") + b","
+        for _ in range(2):
+            if not self._ensure_index():
+                return None
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+
+            offset, length, generated_at = entry
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                line = f.read(length)
+            if line.startswith(prefix):
+                start = line.index(REPORT_MARKER) + len(REPORT_MARKER)
+                return line[start:line.rindex(b"}")], generated_at
+            # 建立索引后文件被整体替换（regenerate_snapshots 完成一次运行），重建索引后重读
+            with self._lock:
+                self._signature = None
+                self._index = {}
+                self._indexed_until = 0
+        return None
+
+    def get_report(self, owner: str, repo: str, platform: str = "github") -> Optional[Dict[str, Any]]:
+        """返回反序列化后的快照报告"""
+        found = self.get_report_bytes(owner, repo, platform)
+        if found is None:
+            return None
+        return json.loads(found[0])
+
+    def invalidate(self, owner: str, repo: str, platform: str = "github") -> None:
+        """上游数据变化后丢弃某个仓库的快照，直到快照文件中追加了新的记录"""
+        self._ensure_index()
+        with self._lock:
+            self._index.pop(snapshot_key(owner, repo, platform), None)
+
+    def keys(self):
+        """所有已有快照的仓库键"""
+        if not self._ensure_index():
+            return set()
+        return set(self._index)
+
+@lru_cache()
+def get_snapshot_store() -> SnapshotStore:
+    """全局实例，首次使用时创建（也用作 FastAPI 依赖）"""
+    return SnapshotStore()
@@ -0,0 +1,267 @@
+# backend/services/trend_engine.py
+"""
+时间序列趋势与异常检测
+
+对月度序列计算滚动均值、指数平滑、环比/同比增长率和 z-score 异常标记。
+每个 (仓库, 指标) 维护一份增量状态，序列新增月份时只处理新增部分，
+因此可以在预热时对所有缓存的仓库反复运行。
+首次计算和一次追加多个月（回填、窗口查询）时，安装了 numpy 则按数组一次算出滚动窗口、
+z-score 和指数平滑，否则逐月计算，结果相同。numpy 在第一次批量计算时才导入。
+"""
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import math
+import threading
+
+from backend.services.metric_models import PeriodSeries
+
+# 参与趋势分析的指标（均为按月计数，缺失月份视为 0）
+TREND_METRICS = ("activity", "issues_new", "issues_closed", "change_requests")
+
+# 一次追加的月份数不少于此值时才按数组计算（少量新增月份逐月计算更快）
+BATCH_MIN_POINTS = 24
+
+_numpy_module: Any = None  # None 表示尚未尝试导入，False 表示未安装
+
+def _numpy():
+    """按需导入 numpy（可选依赖，导入约 90 ms）；未安装时返回 None"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy_module = numpy
+    return _numpy_module or None
+
+def next_month(key: str) -> str:
+    year, month = int(key[:4]), int(key[5:7])
+    if month == 12:
+        return f"{year + 1}-01"
+    return f"{year}-{month + 1:02d}"
+
+def dense_months(series: PeriodSeries, start: Optional[str] = None,
+                 end: Optional[str] = None, pad_start: bool = False) -> Iterator[Tuple[str, float]]:
+    """
+    按月连续遍历 [start, end] 内的数据，缺失的月份补 0；
+    pad_start 时从 start 本身开始补 0（增量追加时 start 之前的月份已处理过），否则从窗口内第一个有数据的月份开始
+    """
+    months = series.months_between(start, end)
+    if not months:
+        return
+    key, last = (start if pad_start else months[0]), months[-1]
+    values = series.values
+    while True:
+        yield key, values.get(key, 0)
+        if key == last:
+            break
+        key = next_month(key)
+
+def _growth(current: float, previous: float) -> Optional[float]:
+    if previous <= 0:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+class SeriesState:
+    """单条序列的增量计算状态"""
+    __slots__ = ("window", "short_window", "alpha", "z_threshold", "min_points",
+                 "last_key", "count", "ewma", "history", "win_sum", "win_sumsq",
+                 "latest_z", "anomalies")
+
+    def __init__(self, window: int, short_window: int, alpha: float, z_threshold: float,
+                 min_points: int, max_anomalies: int):
+        self.window = window
+        self.short_window = short_window
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_points = min_points
+        self.last_key: Optional[str] = None
+        self.count = 0
+        self.ewma: Optional[float] = None
+        # 同比需要回看 12 个月再加一个短窗口
+        self.history: deque = deque(maxlen=max(window, 12 + short_window))
+        self.win_sum = 0.0
+        self.win_sumsq = 0.0
+        self.latest_z: Optional[float] = None
+        self.anomalies: deque = deque(maxlen=max_anomalies)
+
+    def feed(self, key: str, value: float) -> None:
+        """追加一个月的数据，O(1)"""
+        history = self.history
+        size = min(len(history), self.window)
+
+        # 与之前 window 个月比较计算 z-score
+        self.latest_z = None
+        if size >= self.min_points:
+            mean = self.win_sum / size
+            std = math.sqrt(max(self.win_sumsq / size - mean * mean, 0.0))
+            if std > 0:
+                self.latest_z = round((value - mean) / std, 2)
+                if abs(self.latest_z) >= self.z_threshold:
+                    self.anomalies.append({"month": key, "value": value, "z_score": self.latest_z})
+
+        # 更新滚动窗口和累计量
+        if len(history) >= self.window:
+            dropped = history[-self.window]
+            self.win_sum -= dropped
+            self.win_sumsq -= dropped * dropped
+        history.append(value)
+        self.win_sum += value
+        self.win_sumsq += value * value
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+        self.last_key = key
+        self.count += 1
+
+    def feed_many(self, points: List[Tuple[str, float]], use_numpy: bool = True) -> None:
+        """追加多个月的数据，结果与逐个 feed 相同；月份较多且安装了 numpy 时按数组计算"""
+        np = _numpy() if use_numpy and len(points) >= BATCH_MIN_POINTS else None
+        if np is None:
+            for key, value in points:
+                self.feed(key, value)
+            return
+
+        history = self.history
+        values = [value for _, value in points]
+        # 已有的历史在前，新数据在后；第 j 个点的窗口是它之前的 min(j, window) 个点
+        series = np.array(list(history) + values, dtype=float)
+        offset = len(history)
+        sums = np.concatenate(([0.0], np.cumsum(series)))
+        sumsqs = np.concatenate(([0.0], np.cumsum(series * series)))
+        ends = np.arange(offset, len(series))
+        starts = np.maximum(ends - self.window, 0)
+        sizes = ends - starts
+
+        valid = sizes >= self.min_points
+        safe_sizes = np.where(valid, sizes, 1)
+        means = (sums[ends] - sums[starts]) / safe_sizes
+        stds = np.sqrt(np.maximum((sumsqs[ends] - sumsqs[starts]) / safe_sizes - means * means, 0.0))
+        valid &= stds > 0
+        z_scores = np.round((series[offset:] - means) / np.where(valid, stds, 1.0), 2)
+
+        for i in np.flatnonzero(valid & (np.abs(z_scores) >= self.z_threshold)):
+            key, value = points[i]
+            self.anomalies.append({"month": key, "value": value, "z_score": float(z_scores[i])})
+        self.latest_z = float(z_scores[-1]) if valid[-1] else None
+
+        # 指数平滑: ewma_n = (1-a)^n * ewma_0 + sum(a * (1-a)^(n-k) * x_k)
+        alpha = self.alpha
+        tail = series[offset:]
+        if self.ewma is None:
+            start, tail = tail[0], tail[1:]
+        else:
+            start = self.ewma
+        decay = (1 - alpha) ** np.arange(len(tail) - 1, -1, -1)
+        self.ewma = float((1 - alpha) ** len(tail) * start + alpha * np.dot(decay, tail))
+
+        history.extend(values)
+        window = series[-min(len(series), self.window):]
+        self.win_sum = float(window.sum())
+        self.win_sumsq = float(np.dot(window, window))
+        self.last_key = points[-1][0]
+        self.count += len(points)
+
+    def summary(self) -> Dict:
+        history = list(self.history)
+        short = self.short_window
+        if not history:
+            return {"trend": "unknown", "points": 0}
+
+        result = {
+            "points": self.count,
+            "latest_month": self.last_key,
+            "latest": history[-1],
+            "ewma": round(self.ewma, 2),
+            "rolling_mean_short": round(sum(history[-short:]) / len(history[-short:]), 2),
+            "rolling_mean": round(self.win_sum / min(len(history), self.window), 2),
+            "mom_growth": None,
+            "yoy_growth": None,
+            "latest_z_score": self.latest_z,
+            "anomalies": list(self.anomalies),
+        }
+
+        # 最近 short 个月 vs 之前 short 个月
+        if len(history) >= 2 * short:
+            result["mom_growth"] = _growth(sum(history[-short:]), sum(history[-2 * short:-short]))
+        # 最近 short 个月 vs 去年同期，消除季节性
+        if len(history) >= 12 + short:
+            result["yoy_growth"] = _growth(sum(history[-short:]), sum(history[-12 - short:-12]))
+
+        growth = result["yoy_growth"] if result["yoy_growth"] is not None else result["mom_growth"]
+        if growth is None:
+            result["trend"] = "stable"
+        elif growth > 10:
+            result["trend"] = "increasing"
+        elif growth < -10:
+            result["trend"] = "decreasing"
+        else:
+            result["trend"] = "stable"
+        return result
+
+class TrendEngine:
+    """维护所有 (仓库, 指标) 序列的增量状态，按 LRU 淘汰"""
+
+    def __init__(self, window: int = 12, short_window: int = 3, alpha: float = 0.3,
+                 z_threshold: float = 3.0, min_points: int = 6, max_anomalies: int = 12,
+                 max_series: int = 50000, use_numpy: bool = True):
+        self.params = (window, short_window, alpha, z_threshold, min_points, max_anomalies)
+        self.max_series = max_series
+        self.use_numpy = use_numpy
+        self._states: "OrderedDict[Tuple[str, str], SeriesState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _new_state(self) -> SeriesState:
+        return SeriesState(*self.params)
+
+    def update(self, repo_key: str, metric: str, series: PeriodSeries) -> Dict:
+        """用最新序列更新状态并返回摘要；只处理上次之后新增的月份"""
+        with self._lock:
+            state = self._states.pop((repo_key, metric), None)
+
+        latest = series.latest_month()
+        if state is None or state.last_key is None or latest is None or latest < state.last_key \
+                or series.values.get(state.last_key, 0) != state.history[-1]:
+            # 首次计算、或已处理的最后一个月数据被修订，从头计算
+            state = self._new_state()
+            points = dense_months(series)
+        else:
+            points = dense_months(series, next_month(state.last_key), pad_start=True) if latest > state.last_key else iter(())
+
+        state.feed_many(list(points), self.use_numpy)
+
+        with self._lock:
+            self._states[(repo_key, metric)] = state
+            while len(self._states) > self.max_series:
+                self._states.popitem(last=False)
+        return state.summary()
+
+    def summarize(self, series: PeriodSeries, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """对序列的某个时间窗口做一次性计算，不保留状态"""
+        state = self._new_state()
+        state.feed_many(list(dense_months(series, start, end)), self.use_numpy)
+        return state.summary()
+
+    def analyze(self, repo_key: str, metrics: Dict, start: Optional[str] = None,
+                end: Optional[str] = None, names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """对一个仓库的趋势指标逐一计算；指定窗口时不使用增量状态"""
+        result = {}
+        for metric in TREND_METRICS if names is None else names:
+            series = metrics.get(metric)
+            if series is None:
+                continue
+            if start is None and end is None:
+                result[metric] = self.update(repo_key, metric, series)
+            else:
+                result[metric] = self.summarize(series, start, end)
+        return result
+
+    def forget(self, repo_key: str) -> None:
+        """丢弃某个仓库的全部状态（数据版本变化时调用）"""
+        with self._lock:
+            for key in [key for key in self._states if key[0] == repo_key]:
+                del self._states[key]
+
+@lru_cache()
+def get_trend_engine() -> TrendEngine:
+    """全局实例，首次使用时创建"""
+    return TrendEngine()
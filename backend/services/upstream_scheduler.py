@@ -0,0 +1,327 @@
+# backend/services/upstream_scheduler.py
+"""
+上游请求调度
+
+所有对外 HTTP 请求（OpenDigger、将来的 GitHub API）都经过这里:
+- 每个 host 一个令牌桶，限制请求速率（可按 host 单独配置）
+- 三条优先级通道 interactive > batch > prefetch，令牌不足时先放行高优先级的请求，
+  批量任务和预热不会饿死用户的实时请求
+- 上游返回 429/503 + Retry-After（或 GitHub 的 X-RateLimit-Reset）时暂停该 host，必要时重试
+- 记录各 host、各通道的排队深度、放行数和平均等待时间
+
+请求所属的通道由 upstream_priority() 上下文设置，默认为 interactive；
+提交到线程池的任务需要用 contextvars.copy_context() 携带该设置。
+PriorityExecutor 是按同样的通道排队的线程池（提交时自动携带上下文），线程全忙时实时请求的任务先于批量任务执行。
+"""
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+from backend.config import get_settings
+
+INTERACTIVE, BATCH, PREFETCH = "interactive", "batch", "prefetch"
+LANES = (INTERACTIVE, BATCH, PREFETCH)
+
+class UpstreamThrottled(Exception):
+    """在 max_wait 内轮不到发出请求（host 被暂停或排队过长）"""
+
+_current_lane: ContextVar[str] = ContextVar("upstream_lane", default=INTERACTIVE)
+
+@contextmanager
+def upstream_priority(lane: str) -> Iterator[None]:
+    """在此上下文中发出的上游请求使用指定的优先级通道"""
+    if lane not in LANES:
+        raise ValueError(f"unknown upstream lane {lane!r}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def current_priority() -> str:
+    return _current_lane.get()
+
+class TokenBucket:
+    """令牌桶: 平均 rate 个/秒，最多积累 capacity 个；rate <= 0 表示不限速"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """距离有可用令牌还需等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1
+
+class _HostQueue:
+    """单个 host 的令牌桶、等待队列和统计"""
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.cond = threading.Condition()
+        self.waiting: List[Tuple[int, int]] = []  # (通道序号, 到达序号) 小顶堆
+        self.blocked_until = 0.0
+        self.queued = {lane: 0 for lane in LANES}
+        self.dispatched = {lane: 0 for lane in LANES}
+        self.wait_total = {lane: 0.0 for lane in LANES}
+        self.throttled = 0
+
+class UpstreamScheduler:
+    def __init__(self, rate: float = 0, burst: float = 1, host_limits: Optional[Dict[str, float]] = None,
+                 max_retries: int = 1, max_retry_wait: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.host_limits = host_limits or {}
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self._hosts: Dict[str, _HostQueue] = {}
+        self._hosts_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _host(self, host: str) -> _HostQueue:
+        queue = self._hosts.get(host)
+        if queue is None:
+            with self._hosts_lock:
+                queue = self._hosts.get(host)
+                if queue is None:
+                    if host in self.host_limits:
+                        # 单独配置的 host（如 GitHub API）按其速率允许约 1 秒的突发
+                        rate = self.host_limits[host]
+                        queue = _HostQueue(rate, max(rate, 1))
+                    else:
+                        queue = _HostQueue(self.rate, self.burst)
+                    self._hosts[host] = queue
+        return queue
+
+    def _wait_turn(self, queue: _HostQueue, lane: str, max_wait: Optional[float] = None) -> None:
+        """排队直到本请求位于队首、且 host 未被暂停并有可用令牌；超过 max_wait 秒抛出 UpstreamThrottled"""
+        ticket = (LANES.index(lane), next(self._sequence))
+        started = time.monotonic()
+        give_up = None if max_wait is None else started + max_wait
+        with queue.cond:
+            heapq.heappush(queue.waiting, ticket)
+            queue.queued[lane] += 1
+            # 新请求可能优先级更高，让正在计时等待的队首重新检查
+            queue.cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    if queue.waiting[0] == ticket:
+                        delay = max(queue.blocked_until - now, queue.bucket.wait_time(now))
+                        if delay <= 0:
+                            queue.bucket.take()
+                            heapq.heappop(queue.waiting)
+                            break
+                    else:
+                        delay = None
+                    if give_up is not None:
+                        if now + (delay or 0) > give_up:
+                            raise UpstreamThrottled(f"no upstream slot within {max_wait}s")
+                        delay = give_up - now if delay is None else delay
+                    queue.cond.wait(delay)
+            except BaseException:
+                if ticket in queue.waiting:
+                    queue.waiting.remove(ticket)
+                    heapq.heapify(queue.waiting)
+                raise
+            finally:
+                queue.queued[lane] -= 1
+                queue.cond.notify_all()
+            queue.dispatched[lane] += 1
+            queue.wait_total[lane] += time.monotonic() - started
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        """上游要求等待的秒数；不是限流响应时返回 None"""
+        headers = response.headers
+        if response.status_code in (429, 503) and headers.get("Retry-After"):
+            value = headers["Retry-After"]
+            if value.isdigit():
+                return float(value)
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+        # GitHub 主限额耗尽时返回 403/429，并给出重置时间
+        if response.status_code in (403, 429) and headers.get("X-RateLimit-Remaining") == "0" \
+                and headers.get("X-RateLimit-Reset", "").isdigit():
+            return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0.0)
+        return None
+
+    def request(self, method: str, url: str, max_wait: Optional[float] = None, **kwargs):
+        """
+        按当前优先级通道排队后发出请求（其余参数同 requests.request）
+        max_wait 限制排队时间，超过时抛出 UpstreamThrottled 而不是一直等到限流解除
+        """
+        import requests
+
+        lane = current_priority()
+        queue = self._host(urlsplit(url).netloc)
+        attempt = 0
+        while True:
+            self._wait_turn(queue, lane, max_wait)
+            response = requests.request(method, url, **kwargs)
+            retry_after = self._retry_after(response)
+            if retry_after is None:
+                return response
+
+            with queue.cond:
+                queue.throttled += 1
+                queue.blocked_until = max(queue.blocked_until, time.monotonic() + retry_after)
+            print(f"Upstream {urlsplit(url).netloc} throttled, pausing for {retry_after:.1f}s")
+            if attempt >= self.max_retries or retry_after > self.max_retry_wait \
+                    or (max_wait is not None and retry_after > max_wait):
+                return response
+            attempt += 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """各 host 的排队深度、放行数和平均等待时间"""
+        result = {}
+        with self._hosts_lock:
+            hosts = list(self._hosts.items())
+        for host, queue in hosts:
+            with queue.cond:
+                result[host] = {
+                    "rate_limit": queue.bucket.rate or None,
+                    "queued": dict(queue.queued),
+                    "dispatched": dict(queue.dispatched),
+                    "avg_wait_ms": {
+                        lane: round(queue.wait_total[lane] / queue.dispatched[lane] * 1000, 2)
+                        if queue.dispatched[lane] else 0.0
+                        for lane in LANES
+                    },
+                    "throttled": queue.throttled,
+                    "paused_for_s": round(max(queue.blocked_until - time.monotonic(), 0.0), 2),
+                }
+        return result
+
+class _WorkItem:
+    __slots__ = ("future", "context", "fn", "args", "lane", "taken")
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, lane: int):
+        self.future = future
+        self.context = contextvars.copy_context()
+        self.fn = fn
+        self.args = args
+        self.lane = lane
+        self.taken = False
+
+    def run(self) -> Any:
+        # 在提交时的上下文中执行；被提升过的任务按提升后的通道发出上游请求
+        with upstream_priority(LANES[self.lane]):
+            return self.fn(*self.args)
+
+class PriorityExecutor:
+    """
+    按通道优先级取任务的线程池（接口与 ThreadPoolExecutor 的 submit/shutdown 相同）
+    任务在提交时的上下文中执行，通道为提交时的 current_priority()；同一通道内先进先出
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "priority-worker"):
+        self.max_workers = max(max_workers, 1)
+        self.thread_name_prefix = thread_name_prefix
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int, _WorkItem]] = []  # (通道序号, 到达序号, 任务) 小顶堆
+        self._pending: Dict[Future, _WorkItem] = {}  # 尚未开始执行的任务
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        future = Future()
+        item = _WorkItem(future, fn, args, LANES.index(current_priority()))
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._pending[future] = item
+            heapq.heappush(self._queue, (item.lane, next(self._seq), item))
+            if self._idle >= len(self._pending):
+                self._cond.notify()
+            elif len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._worker, name=f"{self.thread_name_prefix}_{len(self._threads)}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def promote(self, future: Future, lane: str) -> None:
+        """尚未开始执行的任务提升到更高优先级的通道（如实时请求合并进了预热任务）"""
+        index = LANES.index(lane)
+        with self._cond:
+            item = self._pending.get(future)
+            if item is not None and index < item.lane:
+                # 旧的堆元素保留，取出时因 taken 已置位而被跳过
+                item.lane = index
+                heapq.heappush(self._queue, (index, next(self._seq), item))
+
+    def queued(self) -> Dict[str, int]:
+        """各通道等待执行的任务数"""
+        with self._cond:
+            counts = {lane: 0 for lane in LANES}
+            for item in self._pending.values():
+                counts[LANES[item.lane]] += 1
+            return counts
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._shutdown:
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                if not self._pending:
+                    return
+                _, _, item = heapq.heappop(self._queue)
+                if item.taken:
+                    continue
+                item.taken = True
+                del self._pending[item.future]
+            if not item.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = item.context.run(item.run)
+            except BaseException as e:
+                item.future.set_exception(e)
+            else:
+                item.future.set_result(result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """不再接受新任务；已提交的任务执行完后线程退出"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+@lru_cache()
+def get_upstream_scheduler() -> UpstreamScheduler:
+    """全局实例，首次使用时创建"""
+    settings = get_settings()
+    return UpstreamScheduler(
+        rate=settings.upstream_rate_limit,
+        burst=settings.upstream_burst,
+        host_limits=settings.upstream_host_limits,
+    )
@@ -0,0 +1,113 @@
+# backend/utils/benchmark_contributor_index.py
+"""
+贡献者倒排索引基准
+
+随机生成一批仓库的 contributors_detail / new_contributors_detail / activity_details 写入索引，
+测量建索引耗时、倒排表占用和查询延迟，并与直接遍历原始指标的结果对比检查。
+
+    python backend/utils/benchmark_contributor_index.py --repos 2000 --logins 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.contributor_index import ContributorIndex, leaf_periods
+from backend.services.metric_models import NameListSeries, ScoredNameSeries
+
+MONTHS = [f"{year}-{month:02d}" for year in range(2020, 2025) for month in range(1, 13)]
+
+def random_repo(rng: random.Random, logins: int):
+    """一个仓库的三项指标；核心成员长期活跃，其余贡献者偶尔出现"""
+    core = [f"user-{rng.randrange(logins)}" for _ in range(rng.randint(2, 15))]
+    activity = {}
+    contributors = {}
+    new_contributors = {}
+    seen = set()
+    for month in MONTHS[rng.randrange(len(MONTHS) // 2):]:
+        names = [name for name in core if rng.random() < 0.7]
+        names += [f"user-{rng.randrange(logins)}" for _ in range(rng.randint(0, 10))]
+        names = list(dict.fromkeys(names))
+        contributors[month] = names
+        new_contributors[month] = [name for name in names if name not in seen]
+        seen.update(names)
+        activity[month] = [[name, round(rng.uniform(0.5, 30), 2)] for name in names]
+    # 年度汇总与月份重叠，索引时应被忽略
+    for year in {month[:4] for month in contributors}:
+        contributors[year] = sorted({n for m, names in contributors.items() if m.startswith(year + "-") for n in names})
+    return {
+        "contributors_detail": NameListSeries(contributors),
+        "new_contributors_detail": NameListSeries(new_contributors),
+        "activity_details": ScoredNameSeries(activity),
+    }
+
+def scan_repos(repos, login: str):
+    """不用索引，直接遍历所有仓库的 activity_details"""
+    totals = {}
+    for key, models in repos.items():
+        activity = models["activity_details"]
+        for period in leaf_periods(activity):
+            for name, score in activity.values[period]:
+                if name == login:
+                    totals[key] = totals.get(key, 0.0) + score
+    return totals
+
+def percentile(sorted_values, pct: float) -> float:
+    return sorted_values[min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="贡献者倒排索引基准")
+    parser.add_argument("--repos", type=int, default=2000, help="仓库数量")
+    parser.add_argument("--logins", type=int, default=50000, help="贡献者登录名的取值范围")
+    parser.add_argument("--queries", type=int, default=200, help="查询次数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    repos = {f"github/bench/repo-{i}": random_repo(rng, args.logins) for i in range(args.repos)}
+
+    index = ContributorIndex(opendigger=object())
+    started = time.perf_counter()
+    for key, models in repos.items():
+        index.index_repo(key, models)
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = index.stats()
+    print(f"建索引: {args.repos} 个仓库 {build_ms:.0f} ms，{stats['contributors']} 名贡献者，"
+          f"{stats['postings']} 条倒排项，{stats['postings_bytes'] / 1024 / 1024:.1f} MB "
+          f"({stats['postings_bytes'] / max(stats['postings'], 1):.0f} 字节/条)")
+
+    logins = [login for login in (f"user-{rng.randrange(args.logins)}" for _ in range(args.queries * 3))
+              if index.contributor_repos(login, limit=1)][:args.queries]
+    keys = list(repos)
+
+    timings = {"contributor_repos": [], "scan": [], "mentors": [], "shared": []}
+    mismatches = 0
+    for login in logins:
+        started = time.perf_counter()
+        result = index.contributor_repos(login, limit=10000)
+        timings["contributor_repos"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        expected = scan_repos(repos, login)
+        timings["scan"].append((time.perf_counter() - started) * 1000)
+        actual = {r["repo"]: r["activity"] for r in result if "active" in r["roles"]}
+        if actual.keys() != expected.keys() or any(abs(actual[k] - expected[k]) > 0.01 * max(expected[k], 1)
+                                                   for k in expected):
+            mismatches += 1
+
+        started = time.perf_counter()
+        index.mentors(rng.choice(keys))
+        timings["mentors"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        index.shared_contributors([r["repo"] for r in result[:2]] if len(result) >= 2 else rng.sample(keys, 2))
+        timings["shared"].append((time.perf_counter() - started) * 1000)
+
+    print(f"{'query':<20}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, values in timings.items():
+        values.sort()
+        print(f"{name:<20}{percentile(values, 50):>10.3f}{percentile(values, 95):>10.3f}")
+    print(f"{'✅' if not mismatches else '❌'} 索引与直接遍历结果不一致: {mismatches}/{len(logins)}")
@@ -0,0 +1,99 @@
+# backend/utils/benchmark_metric_memory.py
+"""
+每个缓存仓库的常驻内存（RSS）测量
+
+在独立的子进程中从本地 OpenDigger 模拟服务拉取一批仓库的全部指标并各分析一次，
+比较两种缓存方式下平均每个仓库增加的内存:
+- objects: 指标全部以 json 解析出的 Python 对象缓存（metric_snapshot_dir 为空）
+- mmap:    大体积指标以二进制快照 mmap 缓存（见 backend/services/metric_snapshot.py）
+
+RssAnon 为进程私有内存；RssFile 为映射文件占用的页，可由映射同一文件的多个 worker 共享。
+Python 分配器不一定把解析时的临时内存归还操作系统，--heap 额外用 tracemalloc 统计
+实际保留的 Python 对象内存（会拖慢运行并抬高 RSS，两组数字不要混用）。
+
+    python backend/utils/benchmark_metric_memory.py --repos 50 --payload-scale 4
+"""
+from multiprocessing import Process, Queue
+from typing import Dict
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import METRIC_NAMES, OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def read_rss() -> Dict[str, int]:
+    """读取 /proc/self/status 中的内存统计（KB）"""
+    usage = {}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                usage[name] = int(value.split()[0])
+    return usage
+
+def measure(stub_url: str, repos: int, snapshot_dir: str, heap: bool, results: Queue) -> None:
+    if heap:
+        tracemalloc.start()
+    service = OpenDiggerService()
+    service.base_url = stub_url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = snapshot_dir
+    service.scheduler = UpstreamScheduler()  # 模拟服务不限速
+    analyzer = ProjectAnalyzer(opendigger=service)
+    analyzer.github = None  # 只测 OpenDigger 部分
+
+    # 先分析一个仓库，让导入、线程池等一次性开销不计入
+    analyzer.analyze_project("warmup", "repo")
+    gc.collect()
+    before = read_rss()
+    if heap:
+        before["heap"] = tracemalloc.get_traced_memory()[0] // 1024
+    for i in range(repos):
+        service.get_typed_metrics("bench", f"repo-{i}", METRIC_NAMES)
+        analyzer.analyze_project("bench", f"repo-{i}")
+    gc.collect()
+    after = read_rss()
+    if heap:
+        after["heap"] = tracemalloc.get_traced_memory()[0] // 1024
+    service.close()
+    results.put({name: (after[name] - before[name]) / repos for name in after})
+
+def run(stub_url: str, repos: int, snapshot_dir: str, heap: bool) -> Dict[str, float]:
+    results: Queue = Queue()
+    process = Process(target=measure, args=(stub_url, repos, snapshot_dir, heap, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="每个缓存仓库的常驻内存测量")
+    parser.add_argument("--repos", type=int, default=50, help="缓存的仓库数量")
+    parser.add_argument("--payload-scale", type=int, default=1, help="模拟数据规模倍数")
+    parser.add_argument("--heap", action="store_true", help="同时统计保留的 Python 对象内存")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="metric-memory-bench-")
+    try:
+        with OpenDiggerStub(payload_scale=args.payload_scale) as stub:
+            rows = [
+                ("objects", run(stub.url, args.repos, "", args.heap)),
+                ("mmap", run(stub.url, args.repos, workdir, args.heap)),
+            ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"每个仓库的内存增量（KB），{args.repos} 个仓库，数据规模 x{args.payload_scale}")
+    print(f"{'mode':<10}{'VmRSS':>10}{'RssAnon':>10}{'RssFile':>10}" + (f"{'heap':>10}" if args.heap else ""))
+    for mode, usage in rows:
+        print(f"{mode:<10}{usage['VmRSS']:>10.1f}{usage['RssAnon']:>10.1f}{usage['RssFile']:>10.1f}"
+              + (f"{usage['heap']:>10.1f}" if args.heap else ""))
@@ -0,0 +1,43 @@
+# backend/utils/benchmark_metric_parse.py
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.metric_models import parse_metrics
+
+def benchmark_metric_parse(data_path: str = "opendigger-api", iterations: int = 200):
+    """测量解析一个仓库全部指标的耗时（使用本地 OpenDigger 数据）"""
+    raw_metrics = {}
+    for filename in sorted(os.listdir(data_path)):
+        if filename.endswith(".json"):
+            with open(os.path.join(data_path, filename), "r", encoding="utf-8") as f:
+                raw_metrics[filename[:-5]] = json.load(f)
+
+    print(f"⏱️  解析 {len(raw_metrics)} 个指标 x {iterations} 次...")
+    print("=" * 50)
+
+    # 整个仓库
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parsed, errors = parse_metrics(raw_metrics)
+    per_repo = (time.perf_counter() - start) / iterations
+    print(f"每个仓库: {per_repo * 1000:.3f} ms")
+    if errors:
+        print(f"⚠️  形状校验失败: {errors}")
+
+    # 逐个指标
+    costs = []
+    for metric, data in raw_metrics.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse_metrics({metric: data})
+        costs.append(((time.perf_counter() - start) / iterations, metric))
+
+    for cost, metric in sorted(costs, reverse=True):
+        print(f"  {metric:<40} {cost * 1e6:9.1f} µs")
+
+if __name__ == "__main__":
+    benchmark_metric_parse()
@@ -0,0 +1,100 @@
+# backend/utils/benchmark_scoring.py
+"""
+批量重新打分基准
+
+随机生成一批仓库的特征向量，用多个评分方案一次性重新打分，
+比较 numpy 矩阵计算与逐行计算的耗时，并检查两者以及默认方案与原先写死的公式结果一致。
+
+    python backend/utils/benchmark_scoring.py --repos 10000 --profiles 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.scoring_engine import FEATURE_NAMES, ScoringEngine
+
+def legacy_score(features) -> float:
+    """引入评分方案之前 _calculate_newbie_friendly_score 的计算"""
+    score = 0.0
+    score += min(features.get("activity_score", 0) / 1000, 0.25)
+    score += min(features.get("total_contributors", 0) / 100, 0.20)
+    score += min(features.get("bus_factor", 0) / 10, 0.20)
+    score += min(features.get("resolution_efficiency", 0) / 100, 0.20)
+    score += min(features.get("pr_acceptance_rate", 0) / 100, 0.15)
+    if "good_first_issues" in features:
+        score = score * 0.85
+        score += min(features["good_first_issues"] / 10, 1) * 0.10
+        score += 0.05 if features["has_contributing"] else 0
+    return round(score * 100, 2)
+
+def random_features(rng: random.Random):
+    features = {
+        "activity_score": rng.uniform(0, 500),
+        "total_contributors": rng.randint(0, 60),
+        "active_contributors": rng.randint(0, 20),
+        "bus_factor": rng.randint(0, 6),
+        "new_issues": rng.randint(0, 50),
+        "resolution_efficiency": rng.uniform(0, 150),
+        "avg_response_time": rng.uniform(0, 30),
+        "pr_acceptance_rate": rng.uniform(0, 100),
+        "code_changes": rng.randint(0, 10000),
+    }
+    if rng.random() < 0.5:
+        features["good_first_issues"] = rng.randint(0, 20)
+        features["help_wanted_issues"] = rng.randint(0, 20)
+        features["has_contributing"] = float(rng.random() < 0.7)
+    return features
+
+def random_profile(rng: random.Random, name: str):
+    return {
+        "name": name,
+        "components": [
+            {"feature": feature, "weight": rng.randint(1, 30), "saturation": rng.choice([1, 10, 100, 500]),
+             "optional": feature in ("good_first_issues", "has_contributing")}
+            for feature in FEATURE_NAMES
+        ],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量重新打分基准")
+    parser.add_argument("--repos", type=int, default=10000, help="仓库数量")
+    parser.add_argument("--profiles", type=int, default=8, help="评分方案数量（含默认方案）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    specs = [random_profile(rng, f"profile-{i}") for i in range(1, args.profiles)]
+    rows = [random_features(rng) for _ in range(args.repos)]
+
+    engines = {}
+    for use_numpy in (True, False):
+        engine = ScoringEngine(specs, use_numpy=use_numpy)
+        for i, features in enumerate(rows):
+            engine.record(f"github/bench/repo-{i}", features)
+        engines[engine.backend] = engine
+
+    mismatches = sum(
+        1 for features in rows
+        if engines["python"].score(features) != legacy_score(features)
+    )
+    print(f"默认方案与原公式不一致: {mismatches}/{len(rows)}")
+
+    results = {}
+    print(f"{'backend':<10}{'repos':>8}{'profiles':>10}{'elapsed ms':>12}")
+    for backend, engine in engines.items():
+        profiles = engine.resolve(["default"] + [spec["name"] for spec in specs])
+        engine.rank(profiles, limit=1)  # 构建特征矩阵，不计入打分耗时
+        started = time.perf_counter()
+        results[backend] = engine.rank(profiles, limit=args.repos)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{backend:<10}{args.repos:>8}{len(profiles):>10}{elapsed:>12.1f}")
+
+    if "numpy" in results:
+        same = all(a["scores"] == b["scores"] for a, b in zip(
+            sorted(results["numpy"], key=lambda r: r["repo"]), sorted(results["python"], key=lambda r: r["repo"])
+        ))
+        print(f"numpy 与逐行计算结果一致: {same}")
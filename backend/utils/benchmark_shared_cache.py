@@ -0,0 +1,93 @@
+# backend/utils/benchmark_shared_cache.py
+"""
+多 worker 共享缓存基准
+
+启动本地 OpenDigger 模拟服务，用多个进程（模拟多个 uvicorn worker）同时分析同一批仓库，
+比较不使用共享缓存和使用共享缓存时的上游请求数与耗时。共享缓存生效时，
+上游请求数应与 worker 数量无关。
+
+    python backend/utils/benchmark_shared_cache.py --workers 4 --repos 10
+    python backend/utils/benchmark_shared_cache.py --backend redis --redis-url redis://localhost:6379/15
+"""
+from multiprocessing import Process
+from typing import Dict, Optional
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.shared_cache import RedisSharedCache, SQLiteSharedCache
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def make_shared_cache(backend: str, path: str, redis_url: Optional[str]):
+    if backend == "sqlite":
+        return SQLiteSharedCache(path)
+    if backend == "redis":
+        import redis
+        return RedisSharedCache(redis.Redis.from_url(redis_url), namespace=f"bench-{os.getppid()}:")
+    return None
+
+def worker(stub_url: str, repos: int, backend: str, path: str, redis_url: Optional[str]) -> None:
+    service = OpenDiggerService()
+    service.base_url = stub_url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = ""
+    service.scheduler = UpstreamScheduler()  # 模拟服务不限速
+    service.shared_cache = make_shared_cache(backend, path, redis_url)
+    analyzer = ProjectAnalyzer(opendigger=service)
+    analyzer.github = None  # 只测 OpenDigger 部分
+    analyzer.shared_cache = service.shared_cache
+    try:
+        for i in range(repos):
+            analyzer.analyze_project("bench", f"repo-{i}")
+    finally:
+        service.close()
+
+def run(stub: OpenDiggerStub, args, backend: str, path: str) -> Dict:
+    before = stub.request_count
+    started = time.perf_counter()
+    processes = [
+        Process(target=worker, args=(stub.url, args.repos, backend, path, args.redis_url))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return {
+        "backend": backend,
+        "workers": args.workers,
+        "repos": args.repos,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "upstream_requests": stub.request_count - before,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多 worker 共享缓存基准")
+    parser.add_argument("--workers", type=int, default=4, help="模拟的 worker 进程数")
+    parser.add_argument("--repos", type=int, default=10, help="每个 worker 分析的仓库数")
+    parser.add_argument("--latency-ms", type=float, default=20, help="模拟上游延迟")
+    parser.add_argument("--backend", choices=["sqlite", "redis"], default="sqlite")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="shared-cache-bench-")
+    try:
+        with OpenDiggerStub(latency_ms=args.latency_ms, seed=0) as stub:
+            results = [
+                run(stub, args, "none", ""),
+                run(stub, args, args.backend, os.path.join(workdir, "cache.sqlite3")),
+            ]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'backend':<10}{'workers':>9}{'repos':>7}{'elapsed s':>11}{'upstream':>10}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['workers']:>9}{r['repos']:>7}{r['elapsed_s']:>11}{r['upstream_requests']:>10}")
@@ -0,0 +1,71 @@
+# backend/utils/benchmark_similarity.py
+"""
+相似项目查询基准
+
+随机生成一批仓库的分析报告写入相似项目索引，测量增量写入耗时和查询延迟，
+并检查 numpy 矩阵计算与逐行计算返回的近邻一致。
+
+    python backend/utils/benchmark_similarity.py --repos 50000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.similarity_index import SimilarityIndex
+
+def random_report(rng: random.Random):
+    scale = rng.lognormvariate(0, 1.5)
+    return {
+        "activity": {"score": round(20 * scale, 2)},
+        "community": {
+            "bus_factor": max(int(2 * scale), 0),
+            "active_contributors": int(10 * scale),
+            "technical_forks": int(5 * scale),
+        },
+        "issues": {"avg_response_time": round(rng.uniform(0, 30), 2), "resolution_efficiency": rng.uniform(0, 150)},
+        "code_quality": {"pr_acceptance_rate": rng.uniform(0, 100), "code_changes": int(2000 * scale)},
+        "trends": {"activity": {"yoy_growth": round(rng.uniform(-80, 150), 2)}},
+    }
+
+def percentile(sorted_values, pct: float) -> float:
+    return sorted_values[min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="相似项目查询基准")
+    parser.add_argument("--repos", type=int, default=50000, help="索引中的仓库数量")
+    parser.add_argument("--queries", type=int, default=200, help="查询次数")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reports = [random_report(rng) for _ in range(args.repos)]
+    targets = [f"github/bench/repo-{rng.randrange(args.repos)}" for _ in range(args.queries)]
+
+    answers = {}
+    print(f"{'backend':<10}{'repos':>8}{'add us':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for use_numpy in (True, False):
+        index = SimilarityIndex(use_numpy=use_numpy)
+        backend = "numpy" if index.use_numpy else "python"
+        started = time.perf_counter()
+        for i, report in enumerate(reports):
+            index.add(f"github/bench/repo-{i}", report)
+        add_us = (time.perf_counter() - started) / args.repos * 1e6
+
+        latencies = []
+        results = []
+        for key in targets:
+            started = time.perf_counter()
+            results.append([r["repo"] for r in index.query(key, args.limit)])
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        answers[backend] = results
+        print(f"{backend:<10}{args.repos:>8}{add_us:>10.1f}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}")
+
+    if "numpy" in answers:
+        same = sum(a == b for a, b in zip(answers["numpy"], answers["python"]))
+        print(f"numpy 与逐行计算近邻一致: {same}/{len(targets)}")
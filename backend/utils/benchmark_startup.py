@@ -0,0 +1,53 @@
+# backend/utils/benchmark_startup.py
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def measure_import_time(module: str = "backend.main"):
+    """在全新解释器中用 -X importtime 测量导入耗时，返回 (总耗时us, [(累计us, 模块名)])"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式: "import time:  self_us | cumulative_us | <缩进>module"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative = int(cumulative_us)
+        imports.append((cumulative, name.rstrip()))
+        # 目标模块自身那一行的累计耗时即总耗时（不含解释器启动时的 site 等导入）
+        if name.strip() == module:
+            total = cumulative
+    return total, imports
+
+def benchmark_startup(budget_ms: float, top: int = 15) -> int:
+    """测量 API 进程导入耗时并与预算比较"""
+    print("🚀 测量 backend.main 导入耗时...")
+    print("=" * 50)
+
+    total_us, imports = measure_import_time()
+    print(f"总导入耗时: {total_us / 1000:.1f} ms（预算 {budget_ms:.0f} ms）")
+    print(f"\n最慢的 {top} 个导入（累计耗时）:")
+    for cumulative, name in sorted(imports, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+    if total_us / 1000 > budget_ms:
+        print(f"\n❌ 超出导入耗时预算 {total_us / 1000 - budget_ms:.1f} ms")
+        return 1
+    print("\n✅ 导入耗时在预算内")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API 进程启动导入耗时基准")
+    parser.add_argument("--budget-ms", type=float, default=800, help="导入耗时预算（毫秒）")
+    args = parser.parse_args()
+    sys.exit(benchmark_startup(args.budget_ms))
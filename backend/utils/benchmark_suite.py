@@ -0,0 +1,193 @@
+# backend/utils/benchmark_suite.py
+"""
+离线性能基准
+
+在本地启动 OpenDigger 模拟服务（见 opendigger_stub.py），对分析流程运行以下场景:
+- single-cold: 每次使用全新的服务实例（缓存为空）分析同一个仓库
+- single-hot:  缓存已预热后重复分析同一个仓库
+- batch:       并发分析一批不同的仓库（缓存为空）
+- page-load:   模拟前端打开项目页，同时请求报告、/metrics、/recommendations 和原始指标（缓存为空），
+               同一指标的并发拉取应被合并，上游请求数与单次分析相同
+
+输出吞吐量、p50/p95/p99 延迟和内存占用；--json 输出机器可读结果，便于比较回归。
+
+    python backend/utils/benchmark_suite.py --latency-ms 20 --batch-size 50
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer, parse_fields
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def make_analyzer(stub_url: str) -> ProjectAnalyzer:
+    """创建指向模拟服务、且不回退到本地文件的分析器"""
+    service = OpenDiggerService()
+    service.base_url = stub_url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = ""
+    service.scheduler = UpstreamScheduler()  # 模拟服务不限速
+    analyzer = ProjectAnalyzer(opendigger=service)
+    analyzer.github = None  # 只测 OpenDigger 部分
+    return analyzer
+
+def analyze_once(stub_url: str, owner: str, repo: str) -> None:
+    analyzer = make_analyzer(stub_url)
+    try:
+        analyzer.analyze_project(owner, repo)
+    finally:
+        analyzer.opendigger.close()
+
+def page_load_once(stub_url: str, owner: str, repo: str) -> None:
+    """前端项目页同时发出的四个请求"""
+    analyzer = make_analyzer(stub_url)
+    projections = [
+        None,
+        parse_fields("basic_info,activity.score,community,issues,code_quality,newbie_friendly_score"),
+        parse_fields("newbie_friendly_score,community.bus_factor,issues.resolution_efficiency"),
+    ]
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(analyzer.analyze_project, owner, repo, fields=fields) for fields in projections]
+            futures.append(executor.submit(analyzer.opendigger.get_specific_metric, owner, repo, "activity"))
+            for future in futures:
+                future.result()
+    finally:
+        analyzer.opendigger.close()
+
+def run_scenario(name: str, stub: OpenDiggerStub, calls: List[Callable[[], object]], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    upstream_before = stub.request_count
+
+    def timed(call):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed, calls))
+    else:
+        for call in calls:
+            timed(call)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(calls),
+        "concurrency": concurrency,
+        "throughput_rps": round(len(calls) / elapsed, 2) if elapsed else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_traced_mb": round(peak / 1024 / 1024, 2),
+        # Linux 下 ru_maxrss 单位为 KB
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        "upstream_requests": stub.request_count - upstream_before,
+    }
+
+def run_benchmarks(args) -> List[Dict]:
+    results = []
+    with OpenDiggerStub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, payload_scale=args.payload_scale, seed=0) as stub:
+        # 单仓库，冷缓存：每次都新建服务实例
+        results.append(run_scenario(
+            "single-cold", stub,
+            [lambda: analyze_once(stub.url, "bench", "repo") for _ in range(args.iterations)],
+            concurrency=1
+        ))
+
+        # 单仓库，热缓存
+        hot = make_analyzer(stub.url)
+        hot.analyze_project("bench", "repo")
+        results.append(run_scenario(
+            "single-hot", stub,
+            [lambda: hot.analyze_project("bench", "repo") for _ in range(args.iterations)],
+            concurrency=args.concurrency
+        ))
+
+        # 批量不同仓库，冷缓存
+        batch = make_analyzer(stub.url)
+        results.append(run_scenario(
+            "batch", stub,
+            [lambda i=i: batch.analyze_project("bench", f"repo-{i}") for i in range(args.batch_size)],
+            concurrency=args.concurrency
+        ))
+
+        # 前端项目页的并发请求，冷缓存
+        results.append(run_scenario(
+            "page-load", stub,
+            [lambda: page_load_once(stub.url, "bench", "repo") for _ in range(args.iterations)],
+            concurrency=1
+        ))
+    return results
+
+def print_results(results: List[Dict]) -> None:
+    print("📊 基准结果")
+    print("=" * 96)
+    print(f"{'scenario':<14}{'requests':>9}{'conc':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'peak MB':>10}{'rss MB':>10}{'upstream':>10}")
+    for r in results:
+        print(f"{r['scenario']:<14}{r['requests']:>9}{r['concurrency']:>6}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['peak_traced_mb']:>10}{r['max_rss_mb']:>10}"
+              f"{r['upstream_requests']:>10}")
+
+def compare_with_baseline(results: List[Dict], baseline_path: str, max_regression: float) -> int:
+    """与之前保存的 --json 结果比较，p95 延迟退化超过 max_regression 时返回 1"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["scenario"]: r for r in json.load(f)}
+
+    regressed = 0
+    for r in results:
+        base = baseline.get(r["scenario"])
+        if not base or not base["p95_ms"]:
+            continue
+        change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        status = "❌" if change > max_regression else "✅"
+        print(f"{status} {r['scenario']}: p95 {base['p95_ms']} -> {r['p95_ms']} ms ({change:+.0%})")
+        if change > max_regression:
+            regressed += 1
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线性能基准")
+    parser.add_argument("--iterations", type=int, default=20, help="单仓库场景的请求次数")
+    parser.add_argument("--batch-size", type=int, default=20, help="批量场景的仓库数量")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=10, help="模拟上游延迟")
+    parser.add_argument("--jitter-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--payload-scale", type=int, default=1, help="模拟数据规模倍数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--baseline", help="之前保存的 --json 结果，用于检测性能回归")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的 p95 退化比例")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+    if args.baseline:
+        sys.exit(compare_with_baseline(results, args.baseline, args.max_regression))
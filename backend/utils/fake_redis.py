@@ -0,0 +1,95 @@
+# backend/utils/fake_redis.py
+"""
+进程内的 Redis 替身
+
+只实现 RedisSharedCache 用到的 redis-py 接口: get、set(nx, px)、delete、scan_iter(match)，
+键值为字节串，px 过期按真实时间计算。用于在没有 Redis 服务的环境中验证 RedisSharedCache。
+"""
+from typing import Dict, Iterator, Optional, Tuple, Union
+import re
+import threading
+import time
+
+def _glob_to_regex(pattern: str) -> "re.Pattern":
+    """Redis glob 模式（*、?、[...]、反斜杠转义）转为正则"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        if char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                parts.append("[" + pattern[i + 1:end].replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return re.compile("".join(parts) + r"\Z", re.S)
+
+class FakeRedis:
+    """线程安全的内存键值存储，行为与 redis-py 客户端一致（返回 bytes）"""
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.commands = 0
+
+    @staticmethod
+    def _bytes(value: Union[str, bytes]) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        # 调用方持有锁
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: Union[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            self.commands += 1
+            return self._live(self._bytes(key))
+
+    def set(self, key: Union[str, bytes], value: Union[str, bytes], nx: bool = False,
+            px: Optional[int] = None) -> Optional[bool]:
+        key = self._bytes(key)
+        with self._lock:
+            self.commands += 1
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (self._bytes(value), time.monotonic() + px / 1000 if px is not None else None)
+            return True
+
+    def delete(self, *keys: Union[str, bytes]) -> int:
+        with self._lock:
+            self.commands += 1
+            removed = 0
+            for key in keys:
+                key = self._bytes(key)
+                if self._live(key) is not None:
+                    del self._data[key]
+                    removed += 1
+            return removed
+
+    def scan_iter(self, match: Optional[str] = None) -> Iterator[bytes]:
+        regex = _glob_to_regex(match) if match is not None else None
+        with self._lock:
+            self.commands += 1
+            keys = [key for key in list(self._data) if self._live(key) is not None]
+        for key in keys:
+            if regex is None or regex.match(key.decode("utf-8")):
+                yield key
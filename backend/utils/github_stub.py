@@ -0,0 +1,197 @@
+# backend/utils/github_stub.py
+"""
+本地 GitHub API 模拟服务
+
+响应 GitHubService 用到的接口，所有仓库返回同一组构造的问题数据；
+名字以 missing 开头的仓库视为不存在。
+- POST /graphql: 按变量 o{i}/n{i} 返回别名 r{i} 的仓库字段
+- GET /repos/{owner}/{repo}[/issues|/community/profile]: 带 ETag，If-None-Match 匹配时返回 304
+- rate_limited 为 True 时所有请求返回 403 和限额耗尽的响应头
+
+    python backend/utils/github_stub.py --port 8766
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+
+# 构造的未关闭问题: (编号, 标签)，其中包含两个 PR
+ISSUES = [
+    (1, ["good first issue", "bug"]),
+    (2, ["good first issue", "documentation"]),
+    (3, ["help wanted", "enhancement"]),
+    (4, ["bug"]),
+    (5, ["enhancement"]),
+    (6, ["good first issue", "help wanted"]),
+    (7, ["bug"]),
+]
+PULL_REQUESTS = {4, 7}
+
+def _issue_items(label: Optional[str] = None) -> List[Dict[str, Any]]:
+    items = []
+    for number, labels in ISSUES:
+        if label is not None and label not in labels:
+            continue
+        item: Dict[str, Any] = {"number": number, "labels": [{"name": name} for name in labels]}
+        if number in PULL_REQUESTS:
+            item["pull_request"] = {"url": f"/pulls/{number}"}
+        items.append(item)
+    return items
+
+def _graphql_repository() -> Dict[str, Any]:
+    issues = [labels for number, labels in ISSUES if number not in PULL_REQUESTS]
+    names = sorted({name for labels in issues for name in labels})
+    count = lambda name: sum(1 for labels in issues if name in labels)
+    return {
+        "goodFirstIssues": {"totalCount": count("good first issue")},
+        "helpWanted": {"totalCount": count("help wanted")},
+        "openIssues": {"totalCount": len(issues)},
+        "contributingGuidelines": {"url": "https://example.com/CONTRIBUTING.md"},
+        "labels": {"nodes": [{"name": name, "issues": {"totalCount": count(name)}} for name in names]},
+    }
+
+class GitHubStub:
+    """可在进程内启动/停止的模拟服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.graphql_count = 0
+        self.rest_count = 0
+        self.not_modified_count = 0
+        self.graphql_repos: List[int] = []  # 每次 GraphQL 调用覆盖的仓库数
+        self.rate_limited = False
+        self._count_lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _rest_payload(self, path: str, query: Dict[str, List[str]]) -> Optional[Any]:
+        match = re.fullmatch(r"/repos/([^/]+)/([^/]+)(/issues|/community/profile)?", path)
+        if match is None or match.group(2).startswith("missing"):
+            return None
+        owner, repo, endpoint = match.groups()
+        if endpoint is None:
+            return {"full_name": f"{owner}/{repo}", "open_issues_count": len(ISSUES)}
+        if endpoint == "/issues":
+            return _issue_items(query.get("labels", [None])[0])
+        return {"files": {"contributing": {"url": "https://example.com/CONTRIBUTING.md"}}}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, data: Any, etag: Optional[str] = None):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_rate_limited(self) -> bool:
+                if not stub.rate_limited:
+                    return False
+                body = b'{"message": "API rate limit exceeded"}'
+                self.send_response(403)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-RateLimit-Remaining", "0")
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                self.end_headers()
+                self.wfile.write(body)
+                return True
+
+            def do_POST(self):
+                if stub.latency_ms > 0:
+                    time.sleep(stub.latency_ms / 1000)
+                if self._send_rate_limited():
+                    return
+                if urlsplit(self.path).path != "/graphql":
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                variables = payload.get("variables", {})
+
+                data, errors = {}, []
+                i = 0
+                while f"o{i}" in variables:
+                    if variables[f"n{i}"].startswith("missing"):
+                        data[f"r{i}"] = None
+                        errors.append({"type": "NOT_FOUND", "path": [f"r{i}"], "message": "Could not resolve to a Repository"})
+                    else:
+                        data[f"r{i}"] = _graphql_repository()
+                    i += 1
+                with stub._count_lock:
+                    stub.graphql_count += 1
+                    stub.graphql_repos.append(i)
+                self._send_json(200, {"data": data, "errors": errors} if errors else {"data": data})
+
+            def do_GET(self):
+                if stub.latency_ms > 0:
+                    time.sleep(stub.latency_ms / 1000)
+                if self._send_rate_limited():
+                    return
+                parts = urlsplit(self.path)
+                data = stub._rest_payload(parts.path, parse_qs(parts.query))
+                with stub._count_lock:
+                    stub.rest_count += 1
+                if data is None:
+                    self._send_json(404, {"message": "Not Found"})
+                    return
+
+                etag = '"%s"' % hashlib.md5(json.dumps(data).encode("utf-8")).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    with stub._count_lock:
+                        stub.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self._send_json(200, data, etag)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "GitHubStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="github-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "GitHubStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 GitHub API 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求的固定延迟")
+    args = parser.parse_args()
+
+    stub = GitHubStub(args.host, args.port, args.latency_ms)
+    print(f"GitHub stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
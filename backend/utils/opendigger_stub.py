@@ -0,0 +1,153 @@
+# backend/utils/opendigger_stub.py
+"""
+本地 OpenDigger 模拟服务
+
+用 opendigger-api/ 下的样例数据响应 /{platform}/{owner}/{repo}/{metric}.json，
+所有仓库返回同一份数据。可配置延迟、错误率和数据规模，用于离线基准测试。
+
+    python backend/utils/opendigger_stub.py --port 8765 --latency-ms 50 --error-rate 0.01
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+FIXTURE_PATH = os.path.join(PROJECT_ROOT, "opendigger-api")
+
+def _shift_period(key: str, years: int) -> str:
+    return f"{int(key[:4]) - years}{key[4:]}"
+
+def scale_payload(data: Any, scale: int) -> Any:
+    """把按周期组织的数据向前复制 scale-1 份，模拟历史更长的大仓库"""
+    if scale <= 1 or not isinstance(data, dict) or not data:
+        return data
+    if not next(iter(data))[:4].isdigit():
+        # 分布指标: {avg: {...}, levels: {...}, ...}
+        return {name: scale_payload(series, scale) for name, series in data.items()}
+
+    years = [int(key[:4]) for key in data]
+    span = max(years) - min(years) + 1
+    scaled = {}
+    for copy in range(scale - 1, 0, -1):
+        for key, value in data.items():
+            scaled[_shift_period(key, copy * span)] = value
+    scaled.update(data)
+    return scaled
+
+class OpenDiggerStub:
+    """可在进程内启动/停止的模拟服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0, payload_scale: int = 1,
+                 fixture_path: str = FIXTURE_PATH, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+        # 预先编码所有响应体
+        self.payloads: Dict[str, bytes] = {}
+        for filename in os.listdir(fixture_path):
+            if filename.endswith(".json"):
+                with open(os.path.join(fixture_path, filename), "r", encoding="utf-8") as f:
+                    data = scale_payload(json.load(f), payload_scale)
+                self.payloads[filename[:-5]] = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        self.etags = {metric: '"%s"' % hashlib.md5(body).hexdigest() for metric, body in self.payloads.items()}
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(with_body=True)
+
+            def do_HEAD(self):
+                self._respond(with_body=False)
+
+            def _respond(self, with_body: bool):
+                with stub._count_lock:
+                    stub.request_count += 1
+
+                delay = stub.latency_ms + stub.random.uniform(0, stub.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                parts = self.path.split("?", 1)[0].strip("/").split("/")
+                metric = parts[-1][:-5] if len(parts) == 4 and parts[-1].endswith(".json") else None
+                if metric not in stub.payloads:
+                    self.send_error(404)
+                    return
+                if stub.error_rate and stub.random.random() < stub.error_rate:
+                    self.send_error(500)
+                    return
+
+                etag = stub.etags[metric]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                body = stub.payloads[metric]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                if with_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "OpenDiggerStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="opendigger-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "OpenDiggerStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 OpenDigger 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求的固定延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="额外的随机延迟上限")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回 500 的比例")
+    parser.add_argument("--payload-scale", type=int, default=1, help="数据规模倍数")
+    args = parser.parse_args()
+
+    stub = OpenDiggerStub(args.host, args.port, args.latency_ms, args.jitter_ms,
+                          args.error_rate, args.payload_scale)
+    print(f"OpenDigger stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,144 @@
+# backend/utils/test_contributor_index.py
+"""
+贡献者索引与查询验证（离线，使用本地 OpenDigger 模拟服务）
+
+- /contributors/{login}/repos、/shared、/mentors 的结果与直接遍历样例数据一致
+- 不认识的贡献者返回 404，格式错误的仓库返回 400
+- 后台同步从二进制快照建索引，不请求上游，也不把快照放入进程内缓存
+- ensure_repo 在快照齐全时不请求上游，没有快照时拉取一次
+
+    python backend/utils/test_contributor_index.py
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi import HTTPException
+
+from backend.api import contributors as contributors_api
+from backend.services.contributor_index import CONTRIBUTOR_METRICS, ContributorIndex, leaf_periods
+from backend.services.metric_models import parse_metric
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import FIXTURE_PATH, OpenDiggerStub
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_service(stub: OpenDiggerStub, snapshot_dir: str = "") -> OpenDiggerService:
+    service = OpenDiggerService()
+    service.base_url = stub.url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = snapshot_dir
+    service.scheduler = UpstreamScheduler()
+    service.shared_cache = None
+    return service
+
+def expected_activity() -> dict:
+    """直接遍历样例 activity_details: 登录名 -> (活跃度合计, 周期数)"""
+    with open(os.path.join(FIXTURE_PATH, "activity_details.json"), "r", encoding="utf-8") as f:
+        model = parse_metric("activity_details", json.load(f))
+    totals = {}
+    for period in leaf_periods(model):
+        for login in {login for login, _ in model.values[period]}:
+            score = sum(s for name, s in model.values[period] if name == login)
+            total, periods = totals.get(login, (0.0, 0))
+            totals[login] = (total + score, periods + 1)
+    return totals
+
+def call(endpoint, *args, **kwargs):
+    """直接调用接口函数，HTTPException 转为 (状态码, None)"""
+    try:
+        return 200, asyncio.run(endpoint(*args, **kwargs))
+    except HTTPException as e:
+        return e.status_code, None
+
+def test_contributor_index() -> bool:
+    print("🔍 验证贡献者索引...")
+    print("=" * 50)
+    results = []
+    totals = expected_activity()
+    top_login = max(totals, key=lambda login: totals[login][0])
+    workdir = tempfile.mkdtemp(prefix="contributor-index-")
+
+    try:
+        with OpenDiggerStub() as stub:
+            print("\n1. 查询接口...")
+            service = make_service(stub)
+            index = ContributorIndex(opendigger=service)
+            status, body = call(contributors_api.get_shared_contributors, repo=["alpha/one", "beta/two"],
+                                platform="github", since=None, limit=200, contributor_index=index)
+            results.append(check(status == 200 and stub.request_count == 2 * len(CONTRIBUTOR_METRICS),
+                                 f"首次查询拉取两个仓库的指标，上游请求 {stub.request_count} 次"))
+            shared = {entry["login"]: entry for entry in body["data"]["contributors"]} if body else {}
+            # 两个仓库数据相同，所有有活跃度记录的贡献者都是共同贡献者
+            results.append(check(top_login in shared and set(shared[top_login]["repos"]) == {
+                "github/alpha/one", "github/beta/two"}, f"共同贡献者 {len(shared)} 人，包含 {top_login}"))
+            mins = [entry["min_activity"] for entry in body["data"]["contributors"]] if body else []
+            results.append(check(mins == sorted(mins, reverse=True), "按最低活跃度降序"))
+
+            status, body = call(contributors_api.get_contributor_repos, top_login, since=None, limit=20,
+                                contributor_index=index)
+            repos = body["data"]["repos"] if body else []
+            total, periods = totals[top_login]
+            results.append(check(len(repos) == 2 and all(abs(r["activity"] - round(total, 2)) < 0.01
+                                                         and r["periods"] == periods for r in repos),
+                                 f"{top_login}: 活跃度 {round(total, 2)}、{periods} 个周期，与遍历样例数据一致"))
+            status, body = call(contributors_api.get_contributor_repos, top_login, since="2025", limit=20,
+                                contributor_index=index)
+            results.append(check(status == 200 and all(r["first_period"] >= "2025" for r in body["data"]["repos"]),
+                                 "since 只统计之后的周期"))
+            status, _ = call(contributors_api.get_contributor_repos, "no-such-user", since=None, limit=20,
+                             contributor_index=index)
+            results.append(check(status == 404, f"不认识的贡献者返回 {status}"))
+
+            status, body = call(contributors_api.get_mentors, repo="alpha/one", platform="github", since=None,
+                                min_periods=6, limit=10, contributor_index=index)
+            mentors = body["data"]["mentors"] if body else []
+            results.append(check(status == 200 and mentors and all(m["tenure_periods"] >= 6 for m in mentors),
+                                 f"mentors 返回 {len(mentors)} 人，资历均不少于 6 个周期"))
+            scores = [m["recent_activity"] for m in mentors]
+            results.append(check(scores == sorted(scores, reverse=True) and all(m["other_repos"] == 1 for m in mentors),
+                                 "按近期活跃度降序，other_repos 计入另一个仓库"))
+            status, _ = call(contributors_api.get_mentors, repo="not-a-repo", platform="github", since=None,
+                             min_periods=6, limit=10, contributor_index=index)
+            results.append(check(status == 400, f"格式错误的仓库返回 {status}"))
+            service.close()
+
+            print("\n2. 从二进制快照同步...")
+            writer = make_service(stub, workdir)
+            writer.get_typed_metrics("alpha", "one", CONTRIBUTOR_METRICS)
+            writer.close()
+            requests = stub.request_count
+
+            service = make_service(stub, workdir)  # 模拟重启后的新进程
+            index = ContributorIndex(opendigger=service)
+            updated = index.sync(force=True)
+            results.append(check(updated == 1 and stub.request_count == requests,
+                                 f"同步索引 {updated} 个仓库，未请求上游"))
+            results.append(check(not service.cached_repos(), "快照没有放入进程内缓存"))
+            results.append(check(index.contributor_repos(top_login) is not None, "同步后可查询"))
+            results.append(check(index.sync(force=True) == 0, "快照未变化时不重新索引"))
+
+            index = ContributorIndex(opendigger=service)
+            results.append(check(index.ensure_repo("alpha", "one") and stub.request_count == requests,
+                                 "快照齐全时 ensure_repo 不请求上游"))
+            results.append(check(index.ensure_repo("gamma", "three")
+                                 and stub.request_count == requests + len(CONTRIBUTOR_METRICS),
+                                 "没有快照的仓库拉取一次"))
+            service.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_contributor_index() else 1)
@@ -0,0 +1,116 @@
+# backend/utils/test_fetch_coalescing.py
+"""
+同一指标并发拉取合并验证（离线，使用带延迟的本地 OpenDigger 模拟服务）
+
+- 多个线程同时请求同一仓库的一组指标，每个指标只请求上游一次，fetch_stats 计入 collapsed
+- get_specific_metric_async 的并发协程共享同一次拉取
+- 拉取失败不缓存: 等待者都得到 None，下一次请求重新拉取
+- 合并进排队中的低优先级拉取时，该拉取提升到当前请求的通道
+
+    python backend/utils/test_fetch_coalescing.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.upstream_scheduler import (
+    BATCH, INTERACTIVE, PREFETCH, PriorityExecutor, UpstreamScheduler, upstream_priority
+)
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+METRICS = ["activity", "bus_factor", "issues_new", "issues_closed", "contributors", "change_requests"]
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_service(stub: OpenDiggerStub) -> OpenDiggerService:
+    service = OpenDiggerService()
+    service.base_url = stub.url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = ""
+    service.scheduler = UpstreamScheduler()
+    service.shared_cache = None
+    return service
+
+def test_fetch_coalescing() -> bool:
+    print("🔍 验证并发拉取合并...")
+    print("=" * 50)
+    results = []
+
+    with OpenDiggerStub(latency_ms=100) as stub:
+        print("\n1. 多线程同时请求...")
+        service = make_service(stub)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            loaded = list(executor.map(lambda _: service.get_metrics("same", "repo", METRICS)[0], range(8)))
+        stats = service.fetch_stats()
+        results.append(check(stub.request_count == len(METRICS), f"8 个请求 x {len(METRICS)} 个指标，"
+                                                                 f"上游请求 {stub.request_count} 次"))
+        results.append(check(stats["started"] == len(METRICS) and stats["collapsed"] > 0 and stats["in_flight"] == 0,
+                             f"fetch_stats: {stats}"))
+        results.append(check(all(m == loaded[0] for m in loaded) and all(loaded[0][name] for name in METRICS),
+                             "所有请求得到相同的数据"))
+
+        print("\n2. 协程并发...")
+        requests = stub.request_count
+
+        async def gather():
+            return await asyncio.gather(*(
+                service.get_specific_metric_async("async", "repo", "activity") for _ in range(10)
+            ))
+        values = asyncio.run(gather())
+        same = all(v == values[0] for v in values) and bool(values[0])
+        results.append(check(stub.request_count - requests == 1 and same,
+                             f"10 个协程上游请求 {stub.request_count - requests} 次"))
+        service.close()
+
+    with OpenDiggerStub(latency_ms=100, error_rate=1.0) as stub:
+        print("\n3. 拉取失败...")
+        service = make_service(stub)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            values = list(executor.map(lambda _: service.get_specific_metric("broken", "repo", "activity"), range(4)))
+        requests = stub.request_count
+        results.append(check(values == [None] * 4 and service.fetch_stats()["in_flight"] == 0,
+                             f"4 个等待者都得到 None（上游请求 {requests} 次）"))
+        service.get_specific_metric("broken", "repo", "activity")
+        results.append(check(stub.request_count > requests and service.fetch_stats()["started"] == 2,
+                             "失败不缓存，下一次请求重新拉取"))
+        service.close()
+
+    with OpenDiggerStub(latency_ms=300) as stub:
+        print("\n4. 合并时提升优先级...")
+        service = make_service(stub)
+        service._executor = PriorityExecutor(max_workers=1)  # 单线程，后续任务排队
+        with upstream_priority(PREFETCH):
+            running = service._metric_future("lane", "repo", "activity", "github")
+            while not running.running() and not running.done():
+                time.sleep(0.005)  # 等唯一的线程取走第一个任务
+            prefetch = service._metric_future("lane", "repo", "bus_factor", "github")
+        with upstream_priority(BATCH):
+            batch = service._metric_future("lane", "repo", "issues_new", "github")
+        before = service._executor.queued()
+        with upstream_priority(INTERACTIVE):
+            joined = service._metric_future("lane", "repo", "bus_factor", "github")
+        after = service._executor.queued()
+        results.append(check(joined is prefetch, "实时请求合并进排队中的预热拉取"))
+        results.append(check(before == {INTERACTIVE: 0, BATCH: 1, PREFETCH: 1}
+                             and after == {INTERACTIVE: 1, BATCH: 1, PREFETCH: 0}, f"排队: {before} -> {after}"))
+        finished = []
+        for name, future in (("prefetch", prefetch), ("batch", batch)):
+            future.add_done_callback(lambda _, name=name: finished.append(name))
+        for future in (running, prefetch, batch):
+            future.result()
+        results.append(check(finished == ["prefetch", "batch"], f"提升后先于批量任务执行: {finished}"))
+        service.close()
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_fetch_coalescing() else 1)
@@ -0,0 +1,120 @@
+# backend/utils/test_field_projection.py
+"""
+fields 投影验证（离线，使用本地 OpenDigger 模拟服务）
+
+- parse_fields 解析与报错（接口返回 400）
+- 投影报告只包含请求的字段和元信息字段，值与完整报告一致
+- 只拉取所需的指标；newbie_friendly_score 自动带上评分依赖的字段
+- 投影报告不写入评分引擎和相似项目索引
+- 命中预生成快照时同样按 fields 裁剪
+
+    python backend/utils/test_field_projection.py
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi import HTTPException
+
+from backend.api import projects as projects_api
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import (
+    REPORT_META_FIELDS, SECTION_METRICS, ProjectAnalyzer, parse_fields
+)
+from backend.services.scoring_engine import ScoringEngine
+from backend.services.similarity_index import SimilarityIndex
+from backend.services.trend_engine import TrendEngine
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+DEFAULT_WINDOW = {"start": None, "end": None, "granularity": "month"}
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_analyzer(stub: OpenDiggerStub) -> ProjectAnalyzer:
+    service = OpenDiggerService()
+    service.base_url = stub.url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = ""
+    service.scheduler = UpstreamScheduler()
+    service.shared_cache = None
+    analyzer = ProjectAnalyzer(opendigger=service, trend_engine=TrendEngine(), scoring=ScoringEngine(),
+                               similarity=SimilarityIndex())
+    analyzer.github = None
+    analyzer.shared_cache = None
+    return analyzer
+
+class StaticSnapshotStore:
+    """只返回一份预生成报告的快照存储"""
+
+    def __init__(self, report):
+        self.report_bytes = json.dumps(report).encode("utf-8")
+
+    def get_report_bytes(self, owner, repo, platform="github"):
+        return self.report_bytes, "2026-01-01T00:00:00Z"
+
+def test_field_projection() -> bool:
+    print("🔍 验证 fields 投影...")
+    print("=" * 50)
+    results = []
+
+    print("\n1. 解析...")
+    spec = parse_fields("activity.score, community.bus_factor,community,newbie_friendly_score")
+    results.append(check(spec == {"activity": {"score"}, "community": None, "newbie_friendly_score": None},
+                         f"整个模块覆盖其中的字段: {spec}"))
+    results.append(check(parse_fields("") is None and parse_fields(None) is None, "空值表示不投影"))
+    for bad in ("activity.nope", "unknown", "basic_info.owner"):
+        try:
+            projects_api.field_projection(bad)
+            results.append(check(False, f"{bad!r} 未报错"))
+        except HTTPException as e:
+            results.append(check(e.status_code == 400, f"{bad!r} 返回 400: {e.detail}"))
+
+    with OpenDiggerStub() as stub:
+        full = make_analyzer(stub).analyze_project("full", "repo")
+        requests = stub.request_count
+
+        print("\n2. 投影报告...")
+        analyzer = make_analyzer(stub)
+        report = analyzer.analyze_project("projected", "repo", fields=parse_fields("activity.score,community.bus_factor"))
+        fetched = stub.request_count - requests
+        results.append(check(fetched == 2, f"只拉取 activity 和 bus_factor（{fetched}/{requests} 个指标）"))
+        results.append(check(set(report) == {"activity", "community", *REPORT_META_FIELDS},
+                             f"只包含请求的模块和元信息: {sorted(report)}"))
+        results.append(check(report["activity"] == {"score": full["activity"]["score"]}
+                             and report["community"] == {"bus_factor": full["community"]["bus_factor"]},
+                             "字段值与完整报告一致"))
+        results.append(check(not report["partial"] and report["incomplete_sections"] == [], "未请求的模块不算不完整"))
+        results.append(check(len(analyzer.scoring) == 0 and len(analyzer.similarity) == 0,
+                             "投影报告不写入评分引擎和相似项目索引"))
+
+        requests = stub.request_count
+        report = make_analyzer(stub).analyze_project("score", "repo", fields=parse_fields("newbie_friendly_score"))
+        fetched = stub.request_count - requests
+        results.append(check(report["newbie_friendly_score"] == full["newbie_friendly_score"]
+                             and fetched == len(SECTION_METRICS["newbie_friendly_score"]),
+                             f"newbie_friendly_score 与完整报告一致，拉取 {fetched} 个评分依赖的指标"))
+        results.append(check("activity" not in report, "评分依赖的模块只参与计算，不返回"))
+
+        print("\n3. 快照投影...")
+        body = asyncio.run(projects_api.get_project_analysis(
+            "full", "repo", platform="github", deadline=None, x_request_deadline=None, fresh=False,
+            window=DEFAULT_WINDOW, fields=parse_fields("issues.new_issues,basic_info"),
+            project_analyzer=None, snapshot_store=StaticSnapshotStore(full)
+        ))
+        data = body["data"]
+        results.append(check(set(data) == {"issues", "basic_info", *REPORT_META_FIELDS}
+                             and data["issues"] == {"new_issues": full["issues"]["new_issues"]},
+                             f"快照报告按 fields 裁剪: {sorted(data)}"))
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_field_projection() else 1)
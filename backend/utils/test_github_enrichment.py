@@ -0,0 +1,135 @@
+# backend/utils/test_github_enrichment.py
+"""
+GitHub 新手信号验证（离线，使用本地 GitHub / OpenDigger 模拟服务）
+
+    python backend/utils/test_github_enrichment.py
+"""
+from concurrent.futures import wait
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.github_service import GitHubService
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.shared_cache import SQLiteSharedCache
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.github_stub import GitHubStub
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def make_service(api_base: str, cache_path: str, token: str = "") -> GitHubService:
+    """创建指向模拟服务的 GitHubService；token 为空时只走 REST"""
+    service = GitHubService()
+    service.api_base = api_base
+    service.token = token
+    service.headers.pop("Authorization", None)
+    if token:
+        service.headers["Authorization"] = f"Bearer {token}"
+    service.cache = SQLiteSharedCache(cache_path)
+    service.scheduler = UpstreamScheduler()  # 模拟服务不限速
+    return service
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def test_github_enrichment() -> bool:
+    print("🔍 验证 GitHub 新手信号...")
+    print("=" * 50)
+    workdir = tempfile.mkdtemp(prefix="github-enrichment-")
+    results = []
+    try:
+        with GitHubStub(latency_ms=5) as stub:
+            # 1. GraphQL 批量查询
+            print("\n1. GraphQL 批量查询...")
+            service = make_service(stub.url, os.path.join(workdir, "graphql.sqlite3"), token="test-token")
+            futures = [service.request_signals("bench", f"repo-{i}") for i in range(30)]
+            futures.append(service.request_signals("bench", "missing-repo"))
+            futures.append(service.request_signals("bench", "repo-0"))  # 重复请求共享结果
+            wait(futures, timeout=10)
+            signals = futures[0].result()
+            results.append(check(stub.graphql_count == 2, f"31 个仓库 {stub.graphql_count} 次 GraphQL 调用 {stub.graphql_repos}"))
+            results.append(check(stub.rest_count == 0, f"REST 请求 {stub.rest_count} 次"))
+            results.append(check(futures[-1] is futures[0], "同一仓库的并发请求合并"))
+            results.append(check(signals["good_first_issues"] == 3 and signals["has_contributing"],
+                                 f"信号: {signals}"))
+            results.append(check(futures[-2].result() is None, "不存在的仓库返回 None"))
+
+            # 2. 持久化缓存: 新实例（模拟重启）不再请求上游
+            print("\n2. 持久化缓存...")
+            before = stub.graphql_count + stub.rest_count
+            restarted = make_service(stub.url, os.path.join(workdir, "graphql.sqlite3"), token="test-token")
+            cached = restarted.get_signals("Bench", "REPO-1", timeout=5)
+            results.append(check(cached == signals, "重启后从缓存读取（仓库名不区分大小写）"))
+            results.append(check(restarted.get_signals("bench", "missing-repo", timeout=5) is None, "不存在的仓库同样被缓存"))
+            results.append(check(stub.graphql_count + stub.rest_count == before, "没有新的上游请求"))
+            service.close()
+            restarted.close()
+
+            # 3. 无 token 时回退 REST，信号过期后用 ETag 条件请求重新验证
+            print("\n3. REST 回退与条件请求...")
+            rest = make_service(stub.url, os.path.join(workdir, "rest.sqlite3"))
+            rest_signals = rest.get_signals("bench", "repo-rest", timeout=5)
+            results.append(check(rest_signals is not None and rest_signals["source"] == "rest", f"REST 信号: {rest_signals}"))
+            results.append(check(
+                rest_signals is not None and {k: v for k, v in rest_signals.items() if k != "source"}
+                == {k: v for k, v in signals.items() if k != "source"},
+                "与 GraphQL 结果一致"
+            ))
+            rest.cache.delete("github:signals:bench/repo-rest")
+            before_304 = stub.not_modified_count
+            rest.get_signals("bench", "repo-rest", timeout=5)
+            results.append(check(stub.not_modified_count - before_304 == 5,
+                                 f"重新验证 {stub.not_modified_count - before_304} 次 304"))
+
+            # 3b. 限流时返回过期的缓存信号，未缓存的仓库不阻塞
+            print("\n3b. 限流...")
+            rest.cache_ttl = 0.001  # 让已缓存的信号过期
+            time.sleep(0.01)
+            stub.rate_limited = True
+            started = time.monotonic()
+            stale = rest.get_signals("bench", "repo-rest", timeout=5)
+            results.append(check(stale is not None and stale.get("stale") and stale["good_first_issues"] == 3,
+                                 f"过期信号: {stale}"))
+            results.append(check(rest.get_signals("bench", "repo-uncached", timeout=5) is None, "未缓存的仓库返回 None"))
+            before = stub.rest_count
+            again = rest.get_signals("bench", "repo-rest", timeout=5)
+            results.append(check(again is not None and stub.rest_count == before and time.monotonic() - started < 5,
+                                 f"限额恢复前不再请求上游 (rate_limited={rest.stats['rate_limited']})"))
+            stub.rate_limited = False
+            rest.close()
+
+            # 4. 分析报告
+            print("\n4. 分析报告集成...")
+            with OpenDiggerStub() as opendigger_stub:
+                opendigger = OpenDiggerService()
+                opendigger.base_url = opendigger_stub.url
+                opendigger.local_data_path = os.devnull
+                opendigger.metric_snapshot_dir = ""
+                opendigger.scheduler = UpstreamScheduler()
+                github = make_service(stub.url, os.path.join(workdir, "analyzer.sqlite3"), token="test-token")
+                analyzer = ProjectAnalyzer(opendigger=opendigger, github=github)
+                analyzer.shared_cache = None
+                report = analyzer.analyze_project("bench", "repo-report")
+                results.append(check(report["newcomer"].get("good_first_issues") == 3, f"newcomer: {report['newcomer']}"))
+                results.append(check(not report["partial"], "报告完整"))
+
+                analyzer.github = None
+                baseline = analyzer.analyze_project("bench", "repo-report")
+                results.append(check(report["newbie_friendly_score"] != baseline["newbie_friendly_score"],
+                                     f"新手友好度 {baseline['newbie_friendly_score']} -> {report['newbie_friendly_score']}"))
+                opendigger.close()
+                github.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_github_enrichment() else 1)
@@ -0,0 +1,152 @@
+# backend/utils/test_metric_resample.py
+"""
+指标切片与重采样验证（离线，使用 opendigger-api/ 样例数据）
+
+对每类指标模型检查 month/quarter/year 重采样:
+- 数值指标: 可相加的指标按月相加，其余取均值；完整覆盖的周期使用上游预计算值
+- 贡献者名单（contributors_detail、activity_details）: 同一登录名只出现一次，
+  无论窗口是否完整覆盖该季度，结果形状一致
+- 每周小时分布、分布指标（avg / levels / quantile_*）
+- mmap 二进制快照与 Python 对象模型结果一致
+
+    python backend/utils/test_metric_resample.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.metric_models import bucket_months, parse_metric
+from backend.services.metric_snapshot import MetricSnapshot, write_metric_snapshot
+
+FIXTURE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "opendigger-api"))
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def load(metric: str):
+    with open(os.path.join(FIXTURE_PATH, f"{metric}.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data, parse_metric(metric, data)
+
+def latest_full_quarter(model) -> str:
+    """样例数据中三个月齐全的最近一个季度"""
+    for quarter in reversed(model.quarter_keys):
+        first, last = bucket_months(quarter)
+        if len(model.months_between(first, last)) == 3:
+            return quarter
+    raise AssertionError("no complete quarter in fixture")
+
+def test_metric_resample() -> bool:
+    print("🔍 验证指标重采样...")
+    print("=" * 50)
+    results = []
+
+    # 1. 可相加的数值指标
+    print("\n1. 数值指标 activity（按月相加）...")
+    data, model = load("activity")
+    quarter = latest_full_quarter(model)
+    first, last = bucket_months(quarter)
+    months = model.months_between(first, last)
+    full = model.resample(first, last, "quarter")
+    results.append(check(full == {quarter: data[quarter]}, f"完整覆盖 {quarter} 使用预计算值 {full}"))
+    partial = model.resample(months[1], last, "quarter")
+    expected = round(sum(data[m] for m in months[1:]), 2)
+    results.append(check(partial == {quarter: expected}, f"部分覆盖按月相加 {partial}"))
+    monthly = model.resample(first, last, "month")
+    results.append(check(list(monthly) == months, f"month 粒度返回窗口内月份 {list(monthly)}"))
+
+    # 2. 不可相加的数值指标
+    print("\n2. 数值指标 bus_factor（取均值）...")
+    data, model = load("bus_factor")
+    quarter = latest_full_quarter(model)
+    first, last = bucket_months(quarter)
+    months = model.months_between(first, last)
+    partial = model.resample(months[1], last, "quarter")
+    expected = round(sum(data[m] for m in months[1:]) / 2, 2)
+    results.append(check(partial == {quarter: expected}, f"部分覆盖取均值 {partial}"))
+
+    # 3. 贡献者名单
+    for metric in ("contributors_detail", "activity_details"):
+        print(f"\n3. 贡献者名单 {metric}...")
+        data, model = load(metric)
+        quarter = latest_full_quarter(model)
+        first, last = bucket_months(quarter)
+        months = model.months_between(first, last)
+        full = model.resample(first, last, "quarter")[quarter]
+        partial = model.resample(months[1], last, "quarter")[quarter]
+        logins = [entry[0] if metric == "activity_details" else entry for entry in full]
+        results.append(check(len(logins) == len(set(logins)),
+                             f"完整覆盖 {quarter} 不含重复登录名（{len(logins)} 个）"))
+        monthly_logins = {entry[0] if metric == "activity_details" else entry
+                          for m in months for entry in data[m]}
+        results.append(check(set(logins) == monthly_logins, "与各月登录名并集一致"))
+        results.append(check(type(full) is type(partial) and all(type(e) is type(full[0]) for e in partial),
+                             "完整覆盖与部分覆盖的结果形状一致"))
+        if metric == "activity_details":
+            totals = {}
+            for m in months:
+                for login, score in data[m]:
+                    totals[login] = totals.get(login, 0) + score
+            results.append(check(all(abs(score - totals[login]) < 0.01 for login, score in full),
+                                 f"同一登录名的活跃度相加: {full[:3]}"))
+            scores = [score for _, score in full]
+            results.append(check(scores == sorted(scores, reverse=True), "按活跃度合计降序"))
+            year = model.resample(f"{quarter[:4]}-01", f"{quarter[:4]}-12", "year")[quarter[:4]]
+            results.append(check(len(year) == len({login for login, _ in year}), "年粒度同样合并"))
+
+    # 4. 每周小时分布
+    print("\n4. 每周小时分布 active_dates_and_times...")
+    data, model = load("active_dates_and_times")
+    quarter = latest_full_quarter(model)
+    first, last = bucket_months(quarter)
+    months = model.months_between(first, last)
+    partial = model.resample(months[1], last, "quarter")[quarter]
+    expected = [sum(hours) for hours in zip(*(data[m] for m in months[1:]))]
+    results.append(check(len(partial) == 168 and partial == expected, "按小时逐项相加"))
+
+    # 5. 分布指标
+    print("\n5. 分布指标 issue_response_time...")
+    data, model = load("issue_response_time")
+    months = model.avg.month_keys[-3:]
+    result = model.resample(months[0], months[-1], "month")
+    quantiles = sorted(name for name in data if name.startswith("quantile_"))
+    results.append(check(set(result) == {"avg", "levels", *quantiles}, f"包含 {sorted(result)}"))
+    results.append(check(list(result["avg"]) == months, "avg 按窗口切片"))
+    if data.get("levels"):
+        level_months = [m for m in months if m in data["levels"]]
+        if level_months:
+            year = model.resample(months[0], months[-1], "year")["levels"]
+            expected = [sum(level) for level in zip(*(data["levels"][m] for m in level_months))]
+            results.append(check(list(year.values())[-1] == expected, "levels 按档位相加"))
+
+    # 6. 二进制快照
+    print("\n6. mmap 二进制快照...")
+    workdir = tempfile.mkdtemp(prefix="metric-resample-")
+    try:
+        for metric in ("activity_details", "contributors_detail", "active_dates_and_times", "issue_response_time"):
+            data, model = load(metric)
+            path = os.path.join(workdir, f"{metric}.bin")
+            write_metric_snapshot(path, metric, data, None)
+            mapped = MetricSnapshot(path).model()
+            for granularity in ("month", "quarter", "year"):
+                a = json.dumps(model.resample("2024-02", "2025-06", granularity), sort_keys=True)
+                b = json.dumps(mapped.resample("2024-02", "2025-06", granularity), sort_keys=True)
+                if a != b:
+                    results.append(check(False, f"{metric} {granularity} 与对象模型不一致"))
+                    break
+            else:
+                results.append(check(True, f"{metric} 与对象模型一致"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_metric_resample() else 1)
@@ -0,0 +1,122 @@
+# backend/utils/test_request_deadline.py
+"""
+请求时间预算（deadline）验证（离线，使用带延迟的本地 OpenDigger 模拟服务）
+
+- 到期时返回部分结果: partial、missing_metrics、incomplete_sections，已缓存的指标照常计算
+- 部分结果不写入共享缓存、评分引擎和相似项目索引
+- 到期后仍在进行的拉取完成后写入缓存，下一次请求得到完整报告且不再请求上游
+- 接口的 deadline 参数与 X-Request-Deadline 请求头取较小值，受 max_request_deadline 限制
+
+    python backend/utils/test_request_deadline.py
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.api import projects as projects_api
+from backend.config import get_settings
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import SECTION_METRICS, ProjectAnalyzer
+from backend.services.scoring_engine import ScoringEngine
+from backend.services.shared_cache import SQLiteSharedCache
+from backend.services.similarity_index import SimilarityIndex
+from backend.services.trend_engine import TrendEngine
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+LATENCY_MS = 400
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_analyzer(stub: OpenDiggerStub, workdir: str) -> ProjectAnalyzer:
+    service = OpenDiggerService()
+    service.base_url = stub.url
+    service.local_data_path = os.devnull
+    service.metric_snapshot_dir = ""
+    service.scheduler = UpstreamScheduler()
+    service.shared_cache = None
+    analyzer = ProjectAnalyzer(opendigger=service, trend_engine=TrendEngine(), scoring=ScoringEngine(),
+                               similarity=SimilarityIndex(),
+                               shared_cache=SQLiteSharedCache(os.path.join(workdir, "cache.sqlite3")))
+    analyzer.github = None
+    return analyzer
+
+def test_request_deadline() -> bool:
+    print("🔍 验证请求时间预算...")
+    print("=" * 50)
+    results = []
+    workdir = tempfile.mkdtemp(prefix="request-deadline-")
+
+    try:
+        with OpenDiggerStub(latency_ms=LATENCY_MS) as stub:
+            analyzer = make_analyzer(stub, workdir)
+            service = analyzer.opendigger
+            # 预先缓存活跃度模块的指标，其余指标需要 LATENCY_MS 才能取回
+            cached = SECTION_METRICS["activity"]
+            service.get_metrics("deadline", "repo", cached)
+            requests = stub.request_count
+
+            print("\n1. 到期返回部分结果...")
+            started = time.perf_counter()
+            report = analyzer.analyze_project("deadline", "repo", deadline=time.monotonic() + 0.1)
+            elapsed = (time.perf_counter() - started) * 1000
+            results.append(check(elapsed < LATENCY_MS, f"{elapsed:.0f} ms 内返回（上游延迟 {LATENCY_MS} ms）"))
+            missing = set(report["missing_metrics"])
+            results.append(check(report["partial"] and missing and not missing & set(cached),
+                                 f"partial，缺少 {len(missing)} 个未缓存的指标"))
+            expected_sections = sorted(section for section, names in SECTION_METRICS.items() if missing & set(names))
+            results.append(check(sorted(report["incomplete_sections"]) == expected_sections
+                                 and "activity" not in report["incomplete_sections"],
+                                 f"incomplete_sections: {report['incomplete_sections']}"))
+            results.append(check(report["activity"].get("score") is not None, "已缓存指标的模块照常计算"))
+            key = "github/deadline/repo"
+            results.append(check(len(analyzer.scoring) == 0 and key not in analyzer.similarity
+                                 and analyzer._get_shared_report("deadline", "repo", "github") is None,
+                                 "部分结果未写入评分引擎、相似项目索引和共享缓存"))
+
+            print("\n2. 迟到的指标写入缓存...")
+            time.sleep(LATENCY_MS * 2 / 1000)
+            fetched = stub.request_count - requests
+            results.append(check(fetched == len(missing), f"到期后拉取继续完成（{fetched} 次请求）"))
+            report = analyzer.analyze_project("deadline", "repo", deadline=time.monotonic() + 0.1)
+            results.append(check(not report["partial"] and not report["missing_metrics"]
+                                 and not report["incomplete_sections"], "下一次请求得到完整报告"))
+            results.append(check(stub.request_count - requests == fetched, "没有再次请求上游"))
+            results.append(check(key in analyzer.similarity and len(analyzer.scoring) == 1
+                                 and analyzer._get_shared_report("deadline", "repo", "github") is not None,
+                                 "完整报告写入评分引擎、相似项目索引和共享缓存"))
+            service.close()
+
+            print("\n3. 接口参数...")
+            analyzer = make_analyzer(stub, os.path.join(workdir, "api"))
+            started = time.perf_counter()
+            body = asyncio.run(projects_api.get_project_analysis(
+                "api", "repo", platform="github", deadline=5, x_request_deadline=0.1, fresh=True,
+                window={"start": None, "end": None, "granularity": "month"}, fields=None,
+                project_analyzer=analyzer, snapshot_store=None
+            ))
+            elapsed = (time.perf_counter() - started) * 1000
+            results.append(check(body["data"]["partial"] and elapsed < LATENCY_MS,
+                                 f"请求头预算更小时按请求头返回部分结果（{elapsed:.0f} ms）"))
+            resolved = projects_api._resolve_deadline(10 ** 6, None) - time.monotonic()
+            limit = get_settings().max_request_deadline
+            results.append(check(resolved <= limit, f"预算受 max_request_deadline={limit} 限制"))
+            results.append(check(projects_api._resolve_deadline(None, None) is None, "未提供预算时不设截止时间"))
+            time.sleep(LATENCY_MS * 2 / 1000)  # 等待到期后仍在进行的拉取，再停止模拟服务
+            analyzer.opendigger.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_request_deadline() else 1)
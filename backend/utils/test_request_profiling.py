@@ -0,0 +1,144 @@
+# backend/utils/test_request_profiling.py
+"""
+请求剖析与慢请求记录验证（离线，使用本地 OpenDigger 模拟服务）
+
+用 ProfilingMiddleware 包装一个在线程池中调用 analyze_project 的最小 ASGI 应用，检查:
+- 带 X-Profile 请求头的请求有阶段时间线和调用栈采样，并返回 X-Profile-Id
+- 未剖析的慢请求只记录耗时，快请求不记录；缓冲区有界
+- 随机抽样剖析的请求即使很快也会记录
+- 未剖析时 stage() 的开销
+
+    python backend/utils/test_request_profiling.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.request_profiler import ProfilingMiddleware, RequestProfiler, stage
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_app(analyzer: ProjectAnalyzer):
+    async def app(scope, receive, send):
+        _, owner, repo = scope["path"].rsplit("/", 2)
+        await run_in_threadpool(analyzer.analyze_project, owner, repo)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+def call(app, path: str, headers=()) -> dict:
+    """发出一次 ASGI 请求，返回响应头"""
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.update({name.decode(): value.decode() for name, value in message["headers"]})
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"",
+             "headers": [(name.lower().encode(), value.encode()) for name, value in headers]}
+    asyncio.run(app(scope, receive, send))
+    return response
+
+def stage_overhead_ns(iterations: int = 1_000_000) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    baseline = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with stage("noop"):
+            pass
+    return (time.perf_counter() - started - baseline) / iterations * 1e9
+
+def test_request_profiling() -> bool:
+    print("🔍 验证请求剖析...")
+    print("=" * 50)
+    results = []
+    with OpenDiggerStub(latency_ms=20) as stub:
+        service = OpenDiggerService()
+        service.base_url = stub.url
+        service.local_data_path = os.devnull
+        service.metric_snapshot_dir = ""
+        service.scheduler = UpstreamScheduler()
+        analyzer = ProjectAnalyzer(opendigger=service)
+        analyzer.github = None
+        analyzer.shared_cache = None
+
+        profiler = RequestProfiler(admin_token="secret", slow_threshold=0.015, buffer_size=3, sample_interval=0.002)
+        app = ProfilingMiddleware(make_app(analyzer), profiler)
+
+        # 1. 通过请求头剖析（缓存为空，需要拉取指标）
+        print("\n1. 请求头剖析...")
+        headers = call(app, "/api/v1/projects/bench/repo-1", [("X-Profile", "secret")])
+        profile = profiler.get(headers.get("x-profile-id", ""))
+        results.append(check(profile is not None and profile["reason"] == "header", f"X-Profile-Id: {headers}"))
+        if profile is not None:
+            totals = profile["stage_totals"]
+            for name, total in list(totals.items())[:8]:
+                print(f"      {name:<22}{total['count']:>4} 次 {total['total_ms']:>9.1f} ms")
+            results.append(check(
+                totals.get("load_metric", {}).get("count", 0) >= 10 and "upstream_request" in totals
+                and "json_decode" in totals and "analyze_community" in totals,
+                "时间线包含指标拉取、上游请求、JSON 解码和各分析阶段"
+            ))
+            worker_threads = {s["thread"] for s in profile["stages"] if s["name"] == "load_metric"}
+            results.append(check(all(t.startswith("opendigger-fetch") for t in worker_threads),
+                                 f"拉取线程中的阶段也被记录: {sorted(worker_threads)[:3]}"))
+            call_profile = profile["call_profile"]
+            results.append(check(call_profile["samples"] > 0, f"调用栈采样 {call_profile['samples']} 次"))
+            for function in call_profile["functions"][:3]:
+                print(f"      {function['function']:<40}{function['self_samples']:>5}")
+
+        # 2. 错误的令牌不剖析
+        print("\n2. 错误的令牌...")
+        headers = call(app, "/api/v1/projects/bench/repo-1", [("X-Profile", "wrong")])
+        results.append(check("x-profile-id" not in headers, "不返回 X-Profile-Id"))
+
+        # 3. 慢请求记录与缓冲区容量
+        print("\n3. 慢请求...")
+        for i in range(2, 6):
+            call(app, f"/api/v1/projects/bench/repo-{i}")  # 缓存为空，超过阈值
+        call(app, "/api/v1/projects/bench/repo-2")  # 缓存命中，低于阈值
+        summaries = profiler.profiles()
+        results.append(check(len(summaries) == 3, f"缓冲区保留最近 {len(summaries)} 条"))
+        results.append(check(
+            [s["path"] for s in summaries] == [f"/api/v1/projects/bench/repo-{i}" for i in (5, 4, 3)],
+            "快请求不记录"
+        ))
+        results.append(check(not summaries[0]["profiled"] and summaries[0]["duration_ms"] >= 15,
+                             f"未剖析的慢请求只有耗时 {summaries[0]['duration_ms']} ms"))
+
+        # 4. 抽样剖析的快请求
+        print("\n4. 抽样剖析...")
+        profiler.sample_rate = 1.0
+        headers = call(app, "/api/v1/projects/bench/repo-3")  # 缓存命中，低于阈值
+        profile = profiler.get(headers.get("x-profile-id", ""))
+        results.append(check(profile is not None and profile["reason"] == "sample"
+                             and profile["duration_ms"] < 15, "抽样剖析的快请求写入缓冲区"))
+        service.close()
+
+    # 5. 未剖析时的开销
+    print("\n5. 未剖析时的开销...")
+    overhead = stage_overhead_ns()
+    results.append(check(overhead < 1000, f"stage() 每次 {overhead:.0f} ns"))
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_request_profiling() else 1)
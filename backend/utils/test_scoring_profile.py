@@ -0,0 +1,143 @@
+# backend/utils/test_scoring_profile.py
+"""
+默认评分方案验证（离线）
+
+检查默认方案与引入评分方案之前写死的计算一致:
+- 新手友好度分数: 随机特征向量、饱和值边界、有无 GitHub 新手信号
+- 贡献建议: 分数 80/60 档位、bus_factor < 3、解决率 < 50 的边界，缺失特征按 0 处理
+- 完整分析报告中的 newbie_friendly_score 与原公式按报告字段计算的结果一致
+  （两者浮点运算顺序不同，恰好落在 x.xx5 上时四舍五入可能差最后一位）
+- numpy 与逐行计算批量打分结果一致
+
+    python backend/utils/test_scoring_profile.py
+"""
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.scoring_engine import ScoringEngine, _numpy
+from backend.services.similarity_index import SimilarityIndex
+from backend.services.trend_engine import TrendEngine
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.benchmark_scoring import legacy_score, random_features, random_profile
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def legacy_recommendations(score: float, features) -> list:
+    """引入评分方案之前 /recommendations 的规则，返回 (type, priority, title)"""
+    result = []
+    if score >= 80:
+        result.append(("beginner", "high", "非常适合新手贡献"))
+    elif score >= 60:
+        result.append(("beginner", "medium", "适合有一定经验的贡献者"))
+    else:
+        result.append(("beginner", "low", "适合经验丰富的贡献者"))
+    if features.get("bus_factor", 0) < 3:
+        result.append(("community", "high", "核心贡献者较少"))
+    if features.get("resolution_efficiency", 0) < 50:
+        result.append(("maintenance", "medium", "问题积压较多"))
+    result.append(("general", "medium", "阅读贡献指南"))
+    return result
+
+def recommended(engine: ScoringEngine, features, score: float) -> list:
+    return [(r["type"], r["priority"], r["title"]) for r in engine.recommend(features, score)]
+
+def test_scoring_profile() -> bool:
+    print("🔍 验证默认评分方案...")
+    print("=" * 50)
+    results = []
+    engine = ScoringEngine()
+    rng = random.Random(0)
+
+    print("\n1. 新手友好度分数...")
+    rows = [random_features(rng) for _ in range(5000)]
+    mismatches = [f for f in rows if engine.score(f) != legacy_score(f)]
+    with_signals = sum(1 for f in rows if "good_first_issues" in f)
+    results.append(check(not mismatches, f"随机特征 {len(rows)} 组（{with_signals} 组含新手信号）"
+                                         f"不一致 {len(mismatches)} 组"))
+    boundaries = [
+        {"activity_score": 250, "total_contributors": 20, "bus_factor": 2,
+         "resolution_efficiency": 20, "pr_acceptance_rate": 15},
+        {"activity_score": 249.99, "total_contributors": 19, "bus_factor": 1,
+         "resolution_efficiency": 19.99, "pr_acceptance_rate": 14.99},
+        {"activity_score": 5000, "total_contributors": 500, "bus_factor": 50,
+         "resolution_efficiency": 150, "pr_acceptance_rate": 100,
+         "good_first_issues": 10, "help_wanted_issues": 0, "has_contributing": 1.0},
+        {"activity_score": 0, "good_first_issues": 3, "help_wanted_issues": 0, "has_contributing": 0.0},
+        {},
+    ]
+    scores = [engine.score(f) for f in boundaries]
+    results.append(check(scores == [legacy_score(f) for f in boundaries] and scores[0] == 100 and scores[2] == 100,
+                         f"饱和值边界与空特征: {scores}"))
+
+    print("\n2. 贡献建议...")
+    cases = [(score, {"bus_factor": bus, "resolution_efficiency": eff})
+             for score in (0, 59.99, 60, 79.99, 80, 100) for bus in (0, 2.99, 3) for eff in (0, 49.99, 50)]
+    cases += [(55.0, {}), (85.0, {"bus_factor": 5})]
+    wrong = [(s, f) for s, f in cases if recommended(engine, f, s) != legacy_recommendations(s, f)]
+    results.append(check(not wrong, f"{len(cases)} 组边界组合不一致 {len(wrong)} 组"))
+    wrong = [f for f in rows[:1000] if recommended(engine, f, engine.score(f))
+             != legacy_recommendations(legacy_score(f), f)]
+    results.append(check(not wrong, f"随机特征 1000 组不一致 {len(wrong)} 组"))
+
+    print("\n3. 分析报告...")
+    with OpenDiggerStub() as stub:
+        service = OpenDiggerService()
+        service.base_url = stub.url
+        service.local_data_path = os.devnull
+        service.metric_snapshot_dir = ""
+        service.scheduler = UpstreamScheduler()
+        service.shared_cache = None
+        analyzer = ProjectAnalyzer(opendigger=service, trend_engine=TrendEngine(), scoring=ScoringEngine(),
+                                   similarity=SimilarityIndex())
+        analyzer.github = None
+        analyzer.shared_cache = None
+        report = analyzer.analyze_project("score", "repo")
+        service.close()
+    features = {
+        "activity_score": report["activity"]["score"],
+        "total_contributors": report["community"]["total_contributors"],
+        "bus_factor": report["community"]["bus_factor"],
+        "resolution_efficiency": report["issues"]["resolution_efficiency"],
+        "pr_acceptance_rate": report["code_quality"]["pr_acceptance_rate"],
+    }
+    expected = legacy_score(features)
+    results.append(check(abs(report["newbie_friendly_score"] - expected) <= 0.01 + 1e-9,
+                         f"报告分数 {report['newbie_friendly_score']} 与原公式 {expected} 一致"))
+    newcomer = {"good_first_issues": 4, "help_wanted_issues": 2, "has_contributing": True}
+    score = analyzer._calculate_newbie_friendly_score(report["activity"], report["community"], report["issues"],
+                                                      report["code_quality"], newcomer)
+    expected = legacy_score({**features, "good_first_issues": 4, "has_contributing": 1.0})
+    results.append(check(abs(score - expected) <= 0.01 + 1e-9, f"含新手信号 {score} 与原公式 {expected} 一致"))
+
+    print("\n4. 批量打分...")
+    if _numpy() is None:
+        print("   ⚠️ 未安装 numpy，跳过")
+    else:
+        specs = [random_profile(rng, f"profile-{i}") for i in range(3)]
+        ranked = {}
+        for use_numpy in (True, False):
+            batch = ScoringEngine(specs, use_numpy=use_numpy)
+            for i, f in enumerate(rows[:500]):
+                batch.record(f"github/bench/repo-{i}", f)
+            profiles = batch.resolve(["default"] + [spec["name"] for spec in specs])
+            ranked[batch.backend] = {r["repo"]: r["scores"] for r in batch.rank(profiles, limit=500)}
+        default = [ranked["python"][f"github/bench/repo-{i}"]["default"] for i in range(500)]
+        results.append(check(ranked["numpy"] == ranked["python"]
+                             and all(math.isclose(s, legacy_score(f)) for s, f in zip(default, rows)),
+                             "numpy 与逐行计算一致，默认方案列与原公式一致"))
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_scoring_profile() else 1)
@@ -0,0 +1,166 @@
+# backend/utils/test_shared_cache.py
+"""
+跨进程共享缓存验证（离线；Redis 后端使用进程内替身 backend/utils/fake_redis.py）
+
+对 SQLite 和 Redis 两个后端检查:
+- get/set、数据版本、max_age 与 ttl 过期
+- delete / delete_prefix（前缀中含 glob 特殊字符）
+- 锁: acquire/release/is_locked、令牌不匹配时不释放、锁过期
+- single_flight: 并发请求只有一个去拉取；持有者放弃时等待者自行拉取
+- 两个 OpenDiggerService（模拟两个 worker）共享指标，上游只请求一次
+以及 SQLite 写入时清理过期条目。
+
+    python backend/utils/test_shared_cache.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.shared_cache import RedisSharedCache, SharedCache, SQLiteSharedCache
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.fake_redis import FakeRedis
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def check_backend(cache: SharedCache) -> list:
+    results = []
+
+    cache.set("metric/a", b"payload", '"v1"')
+    results.append(check(cache.get("metric/a") == (b"payload", '"v1"'), "get 返回值和数据版本"))
+    results.append(check(cache.get("missing") is None, "不存在的键返回 None"))
+    cache.set("metric/old", b"x")
+    time.sleep(0.05)
+    results.append(check(cache.get("metric/old", max_age=0.01) is None and cache.get("metric/old") is not None,
+                         "超过 max_age 视为不存在"))
+    cache.set("metric/ttl", b"x", ttl=0.05)
+    time.sleep(0.1)
+    results.append(check(cache.get("metric/ttl") is None, "超过 ttl 过期"))
+
+    cache.delete("metric/a")
+    results.append(check(cache.get("metric/a") is None, "delete"))
+    for key in ("repo/a*b[1]/x", "repo/a*b[1]/y", "repo/aXb1/x", "repo/a*b[1]"):
+        cache.set(key, b"x")
+    removed = cache.delete_prefix("repo/a*b[1]/")
+    results.append(check(removed == 2 and cache.get("repo/aXb1/x") is not None and cache.get("repo/a*b[1]") is not None,
+                         f"delete_prefix 按字面前缀删除 {removed} 条"))
+
+    token = cache.acquire("lock-key", ttl=5)
+    results.append(check(token is not None and cache.is_locked("lock-key"), "获取锁"))
+    results.append(check(cache.acquire("lock-key", ttl=5) is None, "锁被持有时再次获取失败"))
+    cache.release("lock-key", "wrong-token")
+    results.append(check(cache.is_locked("lock-key"), "令牌不匹配时不释放"))
+    cache.release("lock-key", token)
+    results.append(check(not cache.is_locked("lock-key"), "释放锁"))
+    cache.acquire("lock-expire", ttl=0.05)
+    time.sleep(0.1)
+    results.append(check(not cache.is_locked("lock-expire") and cache.acquire("lock-expire", ttl=5) is not None,
+                         "锁过期后可重新获取"))
+
+    fetches = []
+    fetch_lock = threading.Lock()
+
+    def load(key: str, give_up: bool = False):
+        with cache.single_flight(key, ttl=2, poll_interval=0.01) as found:
+            if found is not None:
+                return found[0]
+            with fetch_lock:
+                fetches.append(key)
+            time.sleep(0.1)
+            if give_up and len(fetches) == 1:
+                return None  # 持有者拉取失败，不写入
+            cache.set(key, b"fetched")
+            return b"fetched"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(executor.map(load, ["flight"] * 8))
+    results.append(check(len(fetches) == 1 and values == [b"fetched"] * 8,
+                         f"single_flight: 8 个并发请求拉取 {len(fetches)} 次"))
+    fetches.clear()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(load, "abandoned", True)
+        time.sleep(0.02)
+        second = executor.submit(load, "abandoned", True)
+        values = [first.result(), second.result()]
+    results.append(check(len(fetches) == 2 and values == [None, b"fetched"], "持有者放弃后等待者自行拉取"))
+    return results
+
+def check_workers(make_cache) -> list:
+    """两个服务实例共用一个共享缓存，模拟两个 worker 同时分析同一仓库"""
+    with OpenDiggerStub(latency_ms=30) as stub:
+        cache = make_cache()
+        services = []
+        for _ in range(2):
+            service = OpenDiggerService()
+            service.base_url = stub.url
+            service.local_data_path = os.devnull
+            service.metric_snapshot_dir = ""
+            service.scheduler = UpstreamScheduler()
+            service.shared_cache = cache
+            services.append(service)
+        metrics = ["activity", "bus_factor", "issues_new", "contributors"]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            loaded = list(executor.map(lambda s: s.get_metrics("bench", "repo-1", metrics)[0], services))
+        for service in services:
+            service.close()
+        return [check(stub.request_count == len(metrics) and all(len(m) == len(metrics) for m in loaded),
+                      f"两个 worker 加载 {len(metrics)} 个指标，上游请求 {stub.request_count} 次")]
+
+def test_shared_cache() -> bool:
+    print("🔍 验证共享缓存...")
+    print("=" * 50)
+    workdir = tempfile.mkdtemp(prefix="shared-cache-")
+    results = []
+    try:
+        print("\n1. SQLite 后端...")
+        results += check_backend(SQLiteSharedCache(os.path.join(workdir, "cache.sqlite3")))
+        results += check_workers(lambda: SQLiteSharedCache(os.path.join(workdir, "workers.sqlite3")))
+
+        print("\n2. Redis 后端（FakeRedis）...")
+        client = FakeRedis()
+        results += check_backend(RedisSharedCache(client, namespace="test:"))
+        results.append(check(all(key.startswith(b"test:") for key in client.scan_iter()), "所有键带命名空间前缀"))
+        results += check_workers(lambda: RedisSharedCache(FakeRedis(), namespace="workers:"))
+
+        print("\n3. SQLite 清理过期条目...")
+        cache = SQLiteSharedCache(os.path.join(workdir, "prune.sqlite3"), prune_interval=0.05)
+        for i in range(20):
+            cache.set(f"expiring/{i}", b"x" * 1000, ttl=0.01)
+        cache.set("permanent", b"x")
+        cache.acquire("stale-lock", ttl=0.01)
+        time.sleep(0.1)
+        cache.set("trigger", b"x", ttl=60)
+        conn = cache._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        locks = conn.execute("SELECT COUNT(*) FROM locks").fetchone()[0]
+        results.append(check(entries == 2 and locks == 0, f"写入时删除过期条目和锁，剩余 {entries} 条"))
+        results.append(check(cache.get("permanent") is not None, "未设置 ttl 的条目保留"))
+
+        print("\n4. 不完整的后端...")
+
+        class Incomplete(SharedCache):
+            def get(self, key, max_age=None):
+                return None
+        try:
+            Incomplete()
+            results.append(check(False, "缺少方法的后端可以创建"))
+        except TypeError as e:
+            results.append(check(True, f"创建时报错: {e}"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_shared_cache() else 1)
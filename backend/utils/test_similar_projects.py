@@ -0,0 +1,170 @@
+# backend/utils/test_similar_projects.py
+"""
+相似项目检索验证（离线）
+
+- 结果按距离升序、不含自身、数量受 limit 限制，与逐个计算距离的排序一致
+- numpy 与逐行计算的排序和距离一致
+- 更新仓库的报告后排序随之变化；容量翻倍后仍可检索
+- query_report 检索不在索引中的报告
+- 从预生成快照增量导入
+- /similar 接口: 不完整的报告不写入索引，只用于本次查询
+
+    python backend/utils/test_similar_projects.py
+"""
+import asyncio
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.api import projects as projects_api
+from backend.services.opendigger_service import OpenDiggerService
+from backend.services.project_analyzer import ProjectAnalyzer
+from backend.services.scoring_engine import ScoringEngine
+from backend.services.similarity_index import SimilarityIndex, _numpy, build_vector
+from backend.services.snapshot_store import REPORTS_FILE, SnapshotStore, encode_snapshot_line
+from backend.services.trend_engine import TrendEngine
+from backend.services.upstream_scheduler import UpstreamScheduler
+from backend.utils.opendigger_stub import OpenDiggerStub
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def make_report(activity: float = 100, bus_factor: int = 3, response: float = 5, acceptance: float = 60,
+                growth: float = 0) -> dict:
+    return {
+        "activity": {"score": activity},
+        "community": {"bus_factor": bus_factor, "active_contributors": 10, "technical_forks": 4},
+        "issues": {"avg_response_time": response, "resolution_efficiency": 90},
+        "code_quality": {"pr_acceptance_rate": acceptance, "code_changes": 5000},
+        "trends": {"activity": {"yoy_growth": growth}},
+    }
+
+def random_report(rng: random.Random) -> dict:
+    return make_report(rng.uniform(0, 2000), rng.randint(0, 20), rng.uniform(0, 60), rng.uniform(0, 100),
+                       rng.uniform(-100, 200))
+
+def brute_force(reports: dict, origin: dict, exclude: str = None) -> list:
+    """逐个计算欧氏距离后排序"""
+    target = build_vector(origin)[0]
+    distances = []
+    for key, report in reports.items():
+        if key != exclude:
+            vector = build_vector(report)[0]
+            distances.append((math.sqrt(sum((a - b) ** 2 for a, b in zip(vector, target))), key))
+    return [key for _, key in sorted(distances)]
+
+def test_similar_projects() -> bool:
+    print("🔍 验证相似项目检索...")
+    print("=" * 50)
+    results = []
+
+    print("\n1. 排序...")
+    # 只有活跃度不同，离基准越远越不相似
+    reports = {"base": make_report(activity=100)}
+    for activity in (110, 150, 300, 800, 1500, 50, 10):
+        reports[f"activity-{activity}"] = make_report(activity=activity)
+    index = SimilarityIndex(initial_capacity=4)
+    for key, report in reports.items():
+        index.add(key, report)
+    similar = index.query("base", limit=5)
+    repos = [item["repo"] for item in similar]
+    results.append(check(repos == brute_force(reports, reports["base"], "base")[:5],
+                         f"与逐个计算距离的排序一致: {repos}"))
+    distances = [item["distance"] for item in similar]
+    results.append(check("base" not in repos and len(repos) == 5 and distances == sorted(distances)
+                         and all(0 < item["similarity"] <= 1 for item in similar),
+                         "不含自身、数量为 limit、按距离升序"))
+    results.append(check(len(index) == len(reports), f"初始容量 4，写入 {len(index)} 个仓库后仍可检索"))
+
+    index.add("activity-1500", make_report(activity=101))
+    results.append(check(index.query("base", limit=1)[0]["repo"] == "activity-1500" and len(index) == len(reports),
+                         "更新报告后排序随之变化，不重复计数"))
+    nearest = index.query_report(make_report(activity=800), limit=2)
+    results.append(check(nearest[0]["repo"] == "activity-800" and nearest[0]["distance"] == 0,
+                         "query_report: 不在索引中的报告，相同向量距离为 0"))
+    try:
+        index.query("missing")
+        results.append(check(False, "查询不存在的仓库未报错"))
+    except KeyError:
+        results.append(check(True, "查询不存在的仓库抛出 KeyError"))
+
+    print("\n2. numpy 与逐行计算...")
+    if _numpy() is None:
+        print("   ⚠️ 未安装 numpy，跳过")
+    else:
+        rng = random.Random(0)
+        reports = {f"github/bench/repo-{i}": random_report(rng) for i in range(2000)}
+        indexes = [SimilarityIndex(use_numpy=use_numpy) for use_numpy in (True, False)]
+        for index in indexes:
+            for key, report in reports.items():
+                index.add(key, report)
+        mismatches = 0
+        for key in list(reports)[:50]:
+            a, b = (index.query(key, limit=10) for index in indexes)
+            if [x["repo"] for x in a] != [x["repo"] for x in b] \
+                    or any(abs(x["distance"] - y["distance"]) > 1e-4 for x, y in zip(a, b)) \
+                    or [x["repo"] for x in a] != brute_force(reports, reports[key], key)[:10]:
+                mismatches += 1
+        results.append(check(mismatches == 0, f"2000 个仓库，50 次查询不一致 {mismatches} 次"))
+
+    workdir = tempfile.mkdtemp(prefix="similar-projects-")
+    try:
+        print("\n3. 从快照导入...")
+        store = SnapshotStore(workdir)
+        with open(os.path.join(workdir, REPORTS_FILE), "wb") as f:
+            for i in range(3):
+                f.write(encode_snapshot_line(f"github/snap/repo-{i}", make_report(activity=100 * (i + 1))))
+        index = SimilarityIndex()
+        imported = index.sync_snapshots(store)
+        with open(os.path.join(workdir, REPORTS_FILE), "ab") as f:
+            f.write(encode_snapshot_line("github/snap/repo-3", make_report(activity=120)))
+        appended = index.sync_snapshots(store)
+        results.append(check(imported == 3 and appended == 1 and index.sync_snapshots(store) == 0,
+                             f"首次导入 {imported} 个，追加后导入 {appended} 个"))
+        results.append(check(index.query("github/snap/repo-0", limit=1)[0]["repo"] == "github/snap/repo-3",
+                             "追加的报告参与检索"))
+
+        print("\n4. /similar 接口...")
+        with OpenDiggerStub(latency_ms=300) as stub:
+            service = OpenDiggerService()
+            service.base_url = stub.url
+            service.local_data_path = os.devnull
+            service.metric_snapshot_dir = ""
+            service.scheduler = UpstreamScheduler()
+            service.shared_cache = None
+            analyzer = ProjectAnalyzer(opendigger=service, trend_engine=TrendEngine(), scoring=ScoringEngine(),
+                                       similarity=index)
+            analyzer.github = None
+            analyzer.shared_cache = None
+
+            def similar(deadline):
+                return asyncio.run(projects_api.get_similar_projects(
+                    "api", "repo", platform="github", limit=2, deadline=deadline, x_request_deadline=None,
+                    project_analyzer=analyzer, snapshot_store=store, similarity_index=index
+                ))["data"]
+
+            data = similar(0.05)
+            results.append(check(data["partial"] and "github/api/repo" not in index and len(data["similar"]) == 2
+                                 and data["indexed_repos"] == 4, "不完整的报告只用于本次查询，不写入索引"))
+            time.sleep(0.6)
+            data = similar(None)
+            results.append(check(not data["partial"] and "github/api/repo" in index and data["indexed_repos"] == 5
+                                 and all(item["repo"] != "github/api/repo" for item in data["similar"]),
+                                 "完整分析后写入索引，结果不含自身"))
+            service.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_similar_projects() else 1)
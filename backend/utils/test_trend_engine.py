@@ -0,0 +1,85 @@
+# backend/utils/test_trend_engine.py
+"""
+趋势引擎验证（离线，使用 opendigger-api/ 样例数据和随机序列）
+
+检查 numpy 批量计算与逐月计算的摘要一致:
+- 样例数据中的 TREND_METRICS，全量和指定窗口
+- 随机整数序列（含突增的异常点），全量计算和先算一部分再增量追加
+
+    python backend/utils/test_trend_engine.py
+"""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.metric_models import parse_metric
+from backend.services.trend_engine import BATCH_MIN_POINTS, TREND_METRICS, TrendEngine, _numpy, next_month
+
+FIXTURE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "opendigger-api"))
+
+def check(ok: bool, message: str) -> bool:
+    print(f"   {'✅' if ok else '❌'} {message}")
+    return ok
+
+def random_series(rng: random.Random, months: int) -> dict:
+    values = {}
+    key = "2015-01"
+    for i in range(months):
+        if rng.random() > 0.1:  # 留出缺失月份
+            values[key] = rng.randint(0, 50) + (400 if rng.random() < 0.03 else 0)
+        key = next_month(key)
+    return values
+
+def test_trend_engine() -> bool:
+    print("🔍 验证趋势引擎...")
+    print("=" * 50)
+    results = []
+    if _numpy() is None:
+        print("   ⚠️ 未安装 numpy，只能验证逐月计算")
+
+    batch, single = TrendEngine(use_numpy=True), TrendEngine(use_numpy=False)
+
+    print("\n1. 样例数据...")
+    for metric in TREND_METRICS:
+        with open(os.path.join(FIXTURE_PATH, f"{metric}.json"), "r", encoding="utf-8") as f:
+            series = parse_metric(metric, json.load(f))
+        a = batch.update("github/sample/repo", metric, series)
+        b = single.update("github/sample/repo", metric, series)
+        results.append(check(a == b, f"{metric}: {a['points']} 个月，趋势 {a['trend']}，异常 {len(a['anomalies'])} 个"))
+        a = batch.summarize(series, "2022-01", "2024-12")
+        b = single.summarize(series, "2022-01", "2024-12")
+        results.append(check(a == b, f"{metric}: 指定窗口一致"))
+
+    print("\n2. 随机序列...")
+    rng = random.Random(0)
+    mismatches = anomalies = 0
+    for i in range(200):
+        values = random_series(rng, rng.randint(BATCH_MIN_POINTS, 180))
+        series = parse_metric("issues_new", values)
+        a = batch.update(f"github/bench/repo-{i}", "issues_new", series)
+        b = single.update(f"github/bench/repo-{i}", "issues_new", series)
+        mismatches += a != b
+        anomalies += len(a["anomalies"])
+    results.append(check(mismatches == 0, f"200 条序列全量计算不一致 {mismatches} 条（共 {anomalies} 个异常点）"))
+
+    mismatches = 0
+    for i in range(50):
+        values = random_series(rng, 160)
+        keys = sorted(values)
+        head = parse_metric("issues_new", {k: values[k] for k in keys[:len(keys) // 3]})
+        full = parse_metric("issues_new", values)
+        batch.update(f"github/grow/repo-{i}", "issues_new", head)
+        a = batch.update(f"github/grow/repo-{i}", "issues_new", full)
+        b = single.summarize(full)
+        mismatches += a != b
+    results.append(check(mismatches == 0, f"50 条序列增量追加后与一次计算不一致 {mismatches} 条"))
+
+    print("\n" + "=" * 50)
+    print(f"{'✅ 全部通过' if all(results) else '❌ 存在失败'} ({sum(results)}/{len(results)})")
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if test_trend_engine() else 1)